@@ -0,0 +1,215 @@
+"""
+Офлайн-бенчмарки стадий обработки EEG на синтетических данных.
+
+Для каждой стадии и для всего конвейера измеряются пропускная способность
+(сэмплов в секунду), перцентили задержки обработки одного блока и пиковая
+память. Результаты сохраняются в JSON и могут сравниваться с базовыми.
+
+Запуск из корня репозитория::
+
+    python -m bench.run_benchmarks --fs 500 --channels 16 --output baseline.json
+    python -m bench.run_benchmarks --fs 500 --channels 16 --compare baseline.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from bench.synthetic import SyntheticEEG, SyntheticSource
+from blink.blink_detector import BlinkDetector, BlinkDetectorListener
+from jaws.jaw_clench_detector import JawClenchDetector, JawClenchDetectorListener
+from processor.eeg_processor import EEGProcessor
+from rhytm.rhytm_analyzer import RhythmAnalyzer, RhythmAnalyzerListener
+
+Chunk = Tuple[np.ndarray, np.ndarray]
+StageBuilder = Callable[[], Tuple[Callable[[np.ndarray, np.ndarray], None], "CountingListener"]]
+
+
+class CountingListener(BlinkDetectorListener, JawClenchDetectorListener, RhythmAnalyzerListener):
+    """Слушатель, только считающий события."""
+
+    def __init__(self):
+        self.events = 0
+
+    def on_blink(self, timestamp: float) -> None:
+        self.events += 1
+
+    def on_clench(self, timestamp: float) -> None:
+        self.events += 1
+
+    def on_rhythm(self, alpha_power: float, beta_power: float, alpha_beta_ratio: float) -> None:
+        self.events += 1
+
+    def on_blinks(self, timestamps: np.ndarray) -> None:
+        self.events += len(timestamps)
+
+    def on_clenches(self, timestamps: np.ndarray) -> None:
+        self.events += len(timestamps)
+
+    def on_rhythms(self, rhythms: np.ndarray) -> None:
+        self.events += len(rhythms)
+
+
+def build_stages(eeg: SyntheticEEG, chunk_size: int, streaming: bool = False) -> Dict[str, StageBuilder]:
+    """
+    Возвращает фабрики стадий. Каждая фабрика создаёт стадию со свежим
+    состоянием и возвращает функцию обработки одного блока и слушатель.
+
+    :param eeg: Синтетическая запись
+    :param chunk_size: Размер блока в сэмплах
+    :param streaming: Потоковый фильтр детекторов вместо ``filtfilt`` по окну
+    :return: Фабрики по имени стадии
+    """
+
+    def blink():
+        detector = BlinkDetector(fs=eeg.fs, streaming=streaming)
+        listener = CountingListener()
+        return lambda samples, timestamps: detector.detect(samples, timestamps, listener), listener
+
+    def jaw():
+        detector = JawClenchDetector(fs=eeg.fs, streaming=streaming)
+        listener = CountingListener()
+        return lambda samples, timestamps: detector.detect(samples, timestamps, listener), listener
+
+    def rhythm():
+        analyzer = RhythmAnalyzer(fs=eeg.fs)
+        listener = CountingListener()
+        return lambda samples, timestamps: analyzer.analyze(samples, listener), listener
+
+    def pipeline():
+        listener = CountingListener()
+        processor = EEGProcessor(blink_listener=listener, clench_listener=listener, rhythm_listener=listener,
+                                 source=SyntheticSource(eeg, chunk_size), streaming=streaming)
+        processor.initialize_stream()
+        return lambda samples, timestamps: processor.step(), listener
+
+    return {"blink": blink, "jaw": jaw, "rhythm": rhythm, "pipeline": pipeline}
+
+
+def measure(build: StageBuilder, chunks: List[Chunk]) -> dict:
+    """
+    Прогоняет стадию по всем блокам и собирает метрики.
+
+    Перед замером стадия прогревается на нескольких блоках отдельного
+    экземпляра. Память измеряется отдельным прогоном под tracemalloc, чтобы
+    его накладные расходы не искажали время.
+
+    :param build: Фабрика стадии
+    :param chunks: Блоки записи
+    :return: Метрики стадии
+    """
+    warmup, _ = build()
+    for samples, timestamps in chunks[:10]:
+        warmup(samples, timestamps)
+
+    process, listener = build()
+    latencies = np.empty(len(chunks))
+    started = time.perf_counter()
+    for i, (samples, timestamps) in enumerate(chunks):
+        chunk_started = time.perf_counter()
+        process(samples, timestamps)
+        latencies[i] = time.perf_counter() - chunk_started
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    process, _ = build()
+    for samples, timestamps in chunks:
+        process(samples, timestamps)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total_samples = sum(len(timestamps) for _, timestamps in chunks)
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1e3
+    return {
+        "samples_per_sec": total_samples / elapsed,
+        "latency_ms": {"p50": p50, "p90": p90, "p99": p99, "max": latencies.max() * 1e3},
+        "peak_memory_kb": peak / 1024,
+        "events": listener.events,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Сравнивает результаты с базовыми и возвращает описания регрессий.
+
+    Регрессия — падение пропускной способности или рост p99 задержки больше
+    чем на ``tolerance``.
+
+    :param results: Текущие результаты
+    :param baseline: Базовые результаты
+    :param tolerance: Допустимое относительное ухудшение
+    :return: Список описаний регрессий
+    """
+    if results["config"] != baseline["config"]:
+        print(f"Внимание: конфигурация отличается от базовой: {baseline['config']}")
+
+    regressions = []
+    for name, current in results["stages"].items():
+        reference = baseline["stages"].get(name)
+        if reference is None:
+            continue
+        throughput = current["samples_per_sec"] / reference["samples_per_sec"]
+        latency = current["latency_ms"]["p99"] / max(reference["latency_ms"]["p99"], 1e-9)
+        print(f"{name:>10}: пропускная способность ×{throughput:.2f}, p99 задержка ×{latency:.2f}")
+        if throughput < 1 - tolerance:
+            regressions.append(f"{name}: пропускная способность упала до ×{throughput:.2f}")
+        if latency > 1 + tolerance:
+            regressions.append(f"{name}: p99 задержка выросла до ×{latency:.2f}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки стадий обработки EEG")
+    parser.add_argument("--fs", type=int, default=125, help="Частота дискретизации, Гц")
+    parser.add_argument("--channels", type=int, default=8, help="Число каналов")
+    parser.add_argument("--chunk", type=int, default=32, help="Размер блока в сэмплах")
+    parser.add_argument("--duration", type=float, default=60.0, help="Длительность записи, с")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора")
+    parser.add_argument("--stages", nargs="+", help="Запускаемые стадии (по умолчанию все)")
+    parser.add_argument("--streaming", action="store_true", help="Потоковый фильтр детекторов")
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON")
+    parser.add_argument("--compare", help="Файл базовых результатов для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Допустимое относительное ухудшение")
+    args = parser.parse_args(argv)
+
+    eeg = SyntheticEEG(fs=args.fs, channels=args.channels, duration=args.duration, seed=args.seed)
+    chunks = list(eeg.chunks(args.chunk))
+    stages = build_stages(eeg, args.chunk, args.streaming)
+    selected = args.stages or list(stages)
+
+    results = {
+        "config": {"fs": args.fs, "channels": args.channels, "chunk": args.chunk,
+                   "duration": args.duration, "seed": args.seed, "streaming": args.streaming},
+        "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                        "machine": platform.machine()},
+        "stages": {},
+    }
+    for name in selected:
+        metrics = measure(stages[name], chunks)
+        results["stages"][name] = metrics
+        latency = metrics["latency_ms"]
+        print(f"{name:>10}: {metrics['samples_per_sec']:12.0f} сэмпл/с  "
+              f"p50 {latency['p50']:.3f} мс  p99 {latency['p99']:.3f} мс  "
+              f"память {metrics['peak_memory_kb']:.0f} КБ  событий {metrics['events']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from processor.sources import SampleSource
+
+
+class SyntheticEEG:
+    """
+    Генератор синтетической многоканальной ЭЭГ с внедрёнными событиями.
+
+    Фон — розоватый шум с сетевой наводкой 50 Гц. Поверх него добавляются
+    моргания (медленная волна 100 мкВ на лобных каналах F3/F4), сжатия
+    челюсти (смещение и широкополосная ЭМГ-вспышка на F3/F4) и альфа-вспышки
+    (10 Гц на всех каналах). Времена событий доступны в ``blinks``,
+    ``clenches`` и ``alpha_bursts``.
+
+    :param fs: Частота дискретизации в Гц
+    :param channels: Число каналов (не меньше 5, так как детекторы читают каналы 3 и 4)
+    :param duration: Длительность записи в секундах
+    :param blink_rate: Средняя частота морганий в событиях в минуту
+    :param clench_rate: Средняя частота сжатий в событиях в минуту
+    :param alpha_rate: Средняя частота альфа-вспышек в событиях в минуту
+    :param seed: Зерно генератора случайных чисел
+    """
+
+    def __init__(self, fs: int = 125, channels: int = 8, duration: float = 60.0,
+                 blink_rate: float = 12.0, clench_rate: float = 4.0, alpha_rate: float = 3.0,
+                 seed: int = 0):
+        if channels < 5:
+            raise ValueError("Нужно не меньше 5 каналов")
+        self.fs = fs
+        self.channels = channels
+        self.duration = duration
+        self.__rng = np.random.default_rng(seed)
+
+        n = int(duration * fs)
+        self.timestamps = np.arange(n) / fs
+        self.samples = self.__background(n)
+        self.blinks = self.__schedule(blink_rate, 0.6)
+        self.clenches = self.__schedule(clench_rate, 1.0)
+        self.alpha_bursts = self.__schedule(alpha_rate, 3.0)
+
+        for start in self.blinks:
+            self.__inject_blink(start)
+        for start in self.clenches:
+            self.__inject_clench(start)
+        for start in self.alpha_bursts:
+            self.__inject_alpha(start)
+
+    def chunks(self, chunk_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Делит запись на блоки, как их отдавал бы pull_chunk.
+
+        :param chunk_size: Число сэмплов в блоке
+        :return: Итератор пар (сэмплы, временные метки)
+        """
+        for start in range(0, len(self.timestamps), chunk_size):
+            yield self.samples[start:start + chunk_size], self.timestamps[start:start + chunk_size]
+
+    def __background(self, n: int) -> np.ndarray:
+        """
+        Генерирует фон: шум 1/f, нормированный к 10 мкВ, и наводку 50 Гц.
+        """
+        white = self.__rng.normal(size=(n, self.channels))
+        spectrum = np.fft.rfft(white, axis=0)
+        freqs = np.fft.rfftfreq(n, d=1 / self.fs)
+        spectrum[1:] /= np.sqrt(freqs[1:])[:, None]
+        spectrum[0] = 0
+        pink = np.fft.irfft(spectrum, n=n, axis=0)
+        pink *= 10 / pink.std(axis=0)
+        mains = 2 * np.sin(2 * np.pi * 50 * self.timestamps)[:, None]
+        return pink + mains
+
+    def __schedule(self, rate: float, length: float) -> List[float]:
+        """
+        Случайно расставляет непересекающиеся события заданной длины.
+        """
+        count = int(self.duration / 60 * rate)
+        starts = np.sort(self.__rng.uniform(0, max(self.duration - length, 0), size=count))
+        accepted = []
+        for start in starts:
+            if not accepted or start - accepted[-1] > length:
+                accepted.append(float(start))
+        return accepted
+
+    def __span(self, start: float, length: float) -> slice:
+        """
+        Переводит интервал в секундах в срез отсчётов.
+        """
+        first = int(start * self.fs)
+        return slice(first, min(first + int(length * self.fs), len(self.timestamps)))
+
+    def __inject_blink(self, start: float):
+        """
+        Добавляет моргание: полуволну 100 мкВ длительностью 0.4 с на F3/F4.
+        """
+        span = self.__span(start, 0.4)
+        n = span.stop - span.start
+        self.samples[span, 3:5] += (100 * np.hanning(n))[:, None]
+
+    def __inject_clench(self, start: float):
+        """
+        Добавляет сжатие: смещение 200 мкВ и ЭМГ-шум длительностью 0.8 с на F3/F4.
+        """
+        span = self.__span(start, 0.8)
+        n = span.stop - span.start
+        envelope = np.hanning(n)[:, None]
+        emg = self.__rng.normal(scale=60, size=(n, 2))
+        self.samples[span, 3:5] += envelope * (200 + emg)
+
+    def __inject_alpha(self, start: float):
+        """
+        Добавляет альфа-вспышку 10 Гц длительностью 2.5 с на все каналы.
+        """
+        span = self.__span(start, 2.5)
+        t = self.timestamps[span]
+        self.samples[span] += (20 * np.sin(2 * np.pi * 10 * t))[:, None]
+
+
+class SyntheticSource(SampleSource):
+    """
+    Источник для EEGProcessor, отдающий синтетическую запись блоками без задержек.
+
+    :param eeg: Сгенерированная запись
+    :param chunk_size: Число сэмплов в блоке
+    """
+
+    def __init__(self, eeg: SyntheticEEG, chunk_size: int = 32):
+        self.__eeg = eeg
+        self.__chunk_size = chunk_size
+        self.__chunks = None
+        self.__done = False
+
+    def open(self) -> bool:
+        self.__chunks = self.__eeg.chunks(self.__chunk_size)
+        self.__done = False
+        return True
+
+    @property
+    def exhausted(self) -> bool:
+        return self.__done
+
+    @property
+    def nominal_srate(self) -> Optional[float]:
+        return self.__eeg.fs
+
+    def pull_chunk(self, timeout: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        chunk = next(self.__chunks, None)
+        if chunk is None:
+            self.__done = True
+            return np.zeros((0, self.__eeg.channels)), np.zeros(0)
+        return chunk
@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
-from collections import deque
 from typing import List
 
-from filter.signal_filter import SignalFilter
+import numpy as np
+
+from filter.decimator import decimation_factor
+from filter.preprocessing import FilteredStreamSpec, PreprocessedChunk, Preprocessor
+from filter.refractory import apply_refractory, threshold_window_mask
 
 
 class BlinkDetectorListener(ABC):
@@ -18,42 +21,114 @@ class BlinkDetectorListener(ABC):
         pass
 
 
+class BlinkBatchListener(BlinkDetectorListener):
+    """
+    Слушатель, получающий все моргания блока одним вызовом.
+
+    Подходит везде, где ожидается BlinkDetectorListener: одиночный ``on_blink``
+    передаётся в ``on_blinks`` массивом из одного элемента.
+    """
+
+    @abstractmethod
+    def on_blinks(self, timestamps: np.ndarray) -> None:
+        """
+        Обрабатывает все моргания блока.
+
+        :param timestamps: Времена событий в секундах по возрастанию
+        """
+        pass
+
+    def on_blink(self, timestamp: float) -> None:
+        self.on_blinks(np.array([timestamp]))
+
+
+def emit_blinks(listener: BlinkDetectorListener, timestamps: np.ndarray):
+    """
+    Передаёт слушателю моргания блока: одним вызовом ``on_blinks``, если
+    слушатель его поддерживает, иначе по одному через ``on_blink``.
+
+    :param listener: Слушатель
+    :param timestamps: Времена событий в секундах
+    """
+    if len(timestamps) == 0:
+        return
+    on_blinks = getattr(listener, "on_blinks", None)
+    if on_blinks is not None:
+        on_blinks(timestamps)
+    else:
+        for timestamp in timestamps:
+            listener.on_blink(float(timestamp))
+
+
 class BlinkDetector:
     """
     Детектор одиночных морганий по каналам F3/F4.
+
+    Режим ``streaming=True`` использует причинный потоковый фильтр: блок
+    фильтруется за один вызов, стоимость на отсчёт — O(1). Результат
+    отличается от исходного режима, где ``filtfilt`` пересчитывается по
+    окну длиной ``fs`` для каждого отсчёта.
+
+    Моргание — медленная волна (ФНЧ 10 Гц), поэтому при частоте выше
+    ``target_rate`` каналы прореживаются до неё перед фильтрацией.
+
+    :param fs: Частота дискретизации входных блоков в Гц
+    :param target_rate: Частота, до которой прореживаются каналы; None — без прореживания
     """
 
-    def __init__(self, threshold_min=50, threshold_max=150, min_interval=0.3, fs=125):
+    def __init__(self, threshold_min=50, threshold_max=150, min_interval=0.3, fs=125, streaming=False,
+                 target_rate=125):
         self.__threshold_min = threshold_min
         self.__threshold_max = threshold_max
         self.__min_interval = min_interval
+        self.__last_blink_time = 0
+        mode = 'causal' if streaming else 'window'
+        decimation = decimation_factor(fs, target_rate)
+        self.__f3 = FilteredStreamSpec(3, mode=mode, decimation=decimation)
+        self.__f4 = FilteredStreamSpec(4, mode=mode, decimation=decimation)
+        # Собственная предобработка нужна только при вызове detect() напрямую;
+        # в EEGProcessor детектор получает готовые блоки из общей предобработки
         self.__fs = fs
+        self.__preprocessor = None
+
+    def reset(self):
+        """
+        Сбрасывает состояние детектора, например после разрыва в данных.
+        """
+        if self.__preprocessor is not None:
+            self.__preprocessor.reset()
         self.__last_blink_time = 0
-        self.__f3_buffer = deque(maxlen=fs)
-        self.__f4_buffer = deque(maxlen=fs)
-        self.__filter = SignalFilter(fs=fs)
+
+    @property
+    def streams(self) -> List[FilteredStreamSpec]:
+        """Отфильтрованные потоки, необходимые детектору."""
+        return [self.__f3, self.__f4]
 
     def detect(self, samples: List[List[float]], timestamps: List[float], listener: BlinkDetectorListener):
         """
         Анализирует поток данных и сообщает о моргании при обнаружении.
 
-        :param samples: Список сэмплов (массив каналов)
-        :param timestamps: Список временных меток
+        :param samples: Сэмплы блока (n_samples × n_channels), список или массив numpy
+        :param timestamps: Временные метки блока
         :param listener: Объект, реализующий интерфейс BlinkDetectorListener
         """
-        for i in range(len(samples)):
-            self.__f3_buffer.append(samples[i][3])
-            self.__f4_buffer.append(samples[i][4])
+        if self.__preprocessor is None:
+            self.__preprocessor = Preprocessor(fs=self.__fs)
+            self.__preprocessor.require(self.streams)
+        self.detect_preprocessed(self.__preprocessor.process(samples, timestamps), listener)
 
-            if len(self.__f3_buffer) < self.__fs:
-                continue
+    def detect_preprocessed(self, chunk: PreprocessedChunk, listener: BlinkDetectorListener):
+        """
+        Анализирует блок, уже отфильтрованный общей стадией предобработки.
 
-            f3_val = abs(self.__filter.lowpass_filter(list(self.__f3_buffer))[-1])
-            f4_val = abs(self.__filter.lowpass_filter(list(self.__f4_buffer))[-1])
+        Пороги проверяются масками для всего блока сразу, рефрактерный
+        интервал применяется к отобранным кандидатам.
 
-            if self.__threshold_min < f3_val < self.__threshold_max or \
-                    self.__threshold_min < f4_val < self.__threshold_max:
-                current_time = timestamps[i]
-                if current_time - self.__last_blink_time > self.__min_interval:
-                    listener.on_blink(current_time)
-                    self.__last_blink_time = current_time
+        :param chunk: Результат Preprocessor.process с потоками из ``streams``
+        :param listener: Объект, реализующий интерфейс BlinkDetectorListener
+        """
+        amplitude = np.abs(np.column_stack((chunk.get(self.__f3), chunk.get(self.__f4))))
+        hits = threshold_window_mask(amplitude, self.__threshold_min, self.__threshold_max)
+        timestamps = chunk.timestamps_for(self.__f3)
+        events, self.__last_blink_time = apply_refractory(timestamps[hits], self.__last_blink_time, self.__min_interval)
+        emit_blinks(listener, events)
@@ -0,0 +1,95 @@
+from typing import Optional
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Предвыделенный многоканальный кольцевой буфер отсчётов.
+
+    Каждый отсчёт записывается дважды — в позицию ``i`` и ``i + capacity``,
+    поэтому последние N отсчётов всегда доступны как непрерывное
+    представление массива без копирования.
+
+    :param capacity: Максимальное число хранимых отсчётов
+    :param channels: Число каналов; None — одноканальный буфер формы (n,)
+    :param dtype: Тип данных (по умолчанию float64)
+    """
+
+    def __init__(self, capacity: int, channels: Optional[int] = None, dtype=np.float64):
+        if capacity <= 0:
+            raise ValueError("Ёмкость буфера должна быть положительной")
+        shape = (2 * capacity,) if channels is None else (2 * capacity, channels)
+        self.__data = np.zeros(shape, dtype=dtype)
+        self.__capacity = capacity
+        self.__head = 0
+        self.__total = 0
+
+    @property
+    def capacity(self) -> int:
+        """Ёмкость буфера в отсчётах."""
+        return self.__capacity
+
+    @property
+    def total(self) -> int:
+        """Абсолютное число отсчётов, записанных с момента создания или очистки."""
+        return self.__total
+
+    def __len__(self) -> int:
+        return min(self.__total, self.__capacity)
+
+    def extend(self, chunk: np.ndarray):
+        """
+        Добавляет блок отсчётов; при переполнении вытесняются самые старые.
+
+        :param chunk: Блок формы (n_samples,) или (n_samples, n_channels)
+        """
+        chunk = np.asarray(chunk)
+        n = len(chunk)
+        if n == 0:
+            return
+
+        capacity = self.__capacity
+        self.__total += n
+        if n >= capacity:
+            tail = chunk[n - capacity:]
+            self.__data[:capacity] = tail
+            self.__data[capacity:] = tail
+            self.__head = 0
+            return
+
+        head = self.__head
+        first = min(n, capacity - head)
+        self.__data[head:head + first] = chunk[:first]
+        self.__data[capacity + head:capacity + head + first] = chunk[:first]
+        rest = n - first
+        if rest:
+            self.__data[:rest] = chunk[first:]
+            self.__data[capacity:capacity + rest] = chunk[first:]
+        self.__head = (head + n) % capacity
+
+    def latest(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Возвращает последние ``n`` отсчётов в хронологическом порядке без копирования.
+
+        Представление действительно до следующей записи, которая может его перезаписать.
+
+        :param n: Число отсчётов (по умолчанию — все накопленные)
+        :return: Представление только для чтения формы (n,) или (n, n_channels)
+        """
+        available = len(self)
+        n = available if n is None else n
+        if n > available:
+            raise ValueError(f"Запрошено {n} отсчётов, в буфере {available}")
+
+        end = self.__capacity + self.__head
+        view = self.__data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        """
+        Очищает буфер и сбрасывает счётчик отсчётов.
+        """
+        self.__head = 0
+        self.__total = 0
@@ -0,0 +1,241 @@
+import json
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Заголовок сегмента: счётчики записи, размеры и признак завершения писателя
+_BEGIN, _COMMIT, _CAPACITY, _WIDTH, _CLOSED, _NAMES_SIZE = range(6)
+_HEADER_FIELDS = 8
+_HEADER_SIZE = _HEADER_FIELDS * 8
+_NAMES_CAPACITY = 4096
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Подключается к существующему сегменту, не передавая его трекеру ресурсов.
+
+    Иначе трекер удалил бы сегмент при завершении процесса-читателя.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        segment = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+class SharedRingBuffer:
+    """
+    Кольцевой буфер строк в разделяемой памяти с одним писателем.
+
+    Как и RingBuffer, каждая строка записывается дважды — в позицию ``i`` и
+    ``i + capacity``, поэтому любой диапазон последних строк читается как
+    непрерывное представление без копирования. Синхронизация — два счётчика
+    последовательности в заголовке: перед записью писатель объявляет номер
+    ``begin``, после — ``commit``. Читатели никогда не блокируют писателя:
+    отставший читатель по счётчикам узнаёт, какие строки уже перезаписаны.
+
+    Сегмент создаётся писателем и удаляется при ``close``; читатели
+    подключаются по имени через SharedRingReader.
+
+    :param name: Имя сегмента разделяемой памяти
+    :param columns: Названия столбцов строки
+    :param capacity: Максимальное число хранимых строк
+    """
+
+    def __init__(self, name: str, columns: Sequence[str], capacity: int):
+        if capacity <= 0:
+            raise ValueError("Ёмкость буфера должна быть положительной")
+        names = json.dumps(list(columns)).encode()
+        if len(names) > _NAMES_CAPACITY:
+            raise ValueError("Слишком длинные названия столбцов")
+
+        width = len(columns)
+        size = _HEADER_SIZE + _NAMES_CAPACITY + 2 * capacity * width * 8
+        try:
+            self.__segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Сегмент остался от писателя, завершившегося без close
+            stale = _attach(name)
+            stale.close()
+            stale.unlink()
+            self.__segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        buf = self.__segment.buf
+        self.__header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=buf)
+        self.__header[:] = 0
+        self.__header[_CAPACITY] = capacity
+        self.__header[_WIDTH] = width
+        self.__header[_NAMES_SIZE] = len(names)
+        buf[_HEADER_SIZE:_HEADER_SIZE + len(names)] = names
+        self.__data = np.ndarray((2 * capacity, width), dtype=np.float64, buffer=buf,
+                                 offset=_HEADER_SIZE + _NAMES_CAPACITY)
+        self.__capacity = capacity
+        self.name = name
+        self.columns = list(columns)
+
+    @property
+    def sequence(self) -> int:
+        """Число строк, записанных с момента создания."""
+        return int(self.__header[_COMMIT])
+
+    def write(self, rows: np.ndarray):
+        """
+        Добавляет строки; при переполнении вытесняются самые старые.
+
+        :param rows: Строки формы (n_rows, n_columns)
+        """
+        rows = np.asarray(rows, dtype=np.float64)
+        n = len(rows)
+        if n == 0:
+            return
+
+        header = self.__header
+        capacity = self.__capacity
+        total = int(header[_COMMIT])
+        header[_BEGIN] = total + n
+        if n > capacity:
+            rows = rows[n - capacity:]
+            total += n - capacity
+            n = capacity
+
+        head = total % capacity
+        first = min(n, capacity - head)
+        self.__data[head:head + first] = rows[:first]
+        self.__data[capacity + head:capacity + head + first] = rows[:first]
+        rest = n - first
+        if rest:
+            self.__data[:rest] = rows[first:]
+            self.__data[capacity:capacity + rest] = rows[first:]
+        header[_COMMIT] = header[_BEGIN]
+
+    def close(self):
+        """
+        Сообщает читателям о завершении записи и удаляет сегмент.
+
+        Уже подключённые читатели дочитывают данные: память освобождается
+        после закрытия последнего отображения.
+        """
+        if self.__segment is None:
+            return
+        self.__header[_CLOSED] = 1
+        del self.__header, self.__data
+        self.__segment.unlink()
+        self.__segment.close()
+        self.__segment = None
+
+
+class SharedRingReader:
+    """
+    Читатель SharedRingBuffer из любого процесса.
+
+    Читатель хранит только свою позицию ``cursor``, поэтому читателей может
+    быть сколько угодно и они не влияют ни друг на друга, ни на писателя.
+
+    :param name: Имя сегмента разделяемой памяти
+    :param wait_time: Сколько секунд ждать появления сегмента
+    """
+
+    def __init__(self, name: str, wait_time: float = 0.0):
+        deadline = time.monotonic() + wait_time
+        while True:
+            try:
+                self.__segment = _attach(name)
+                break
+            except FileNotFoundError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+        buf = self.__segment.buf
+        self.__header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=buf)
+        self.__capacity = int(self.__header[_CAPACITY])
+        width = int(self.__header[_WIDTH])
+        names_size = int(self.__header[_NAMES_SIZE])
+        data = np.ndarray((2 * self.__capacity, width), dtype=np.float64, buffer=buf,
+                          offset=_HEADER_SIZE + _NAMES_CAPACITY)
+        data.setflags(write=False)
+        self.__data = data
+        self.name = name
+        self.columns: List[str] = json.loads(bytes(buf[_HEADER_SIZE:_HEADER_SIZE + names_size]))
+        self.cursor = 0
+
+    @property
+    def capacity(self) -> int:
+        """Ёмкость буфера в строках."""
+        return self.__capacity
+
+    @property
+    def sequence(self) -> int:
+        """Число строк, записанных писателем."""
+        return int(self.__header[_COMMIT])
+
+    @property
+    def closed(self) -> bool:
+        """Писатель завершил запись."""
+        return bool(self.__header[_CLOSED])
+
+    def seek_latest(self):
+        """
+        Переносит позицию в конец: читаться будут только новые строки.
+        """
+        self.cursor = self.sequence
+
+    def view(self) -> Tuple[np.ndarray, int]:
+        """
+        Возвращает непрочитанные строки без копирования и сдвигает позицию.
+
+        Представление указывает прямо в разделяемую память: писатель может
+        перезаписать его, если успеет добавить ``capacity`` строк. После
+        использования строк это проверяется вызовом ``is_valid``.
+
+        :return: Представление только для чтения формы (n_rows, n_columns) и
+                 номер его первой строки; строки между прежней позицией и
+                 этим номером уже перезаписаны и потеряны
+        """
+        end = int(self.__header[_COMMIT])
+        start = max(self.cursor, end - self.__capacity)
+        head = start % self.__capacity
+        self.cursor = end
+        return self.__data[head:head + end - start], start
+
+    def is_valid(self, start: int) -> bool:
+        """
+        Проверяет, что строки, начиная с номера ``start``, ещё не перезаписаны.
+
+        :param start: Номер первой строки, полученный из ``view``
+        """
+        return start >= int(self.__header[_BEGIN]) - self.__capacity
+
+    def read(self) -> Tuple[np.ndarray, int]:
+        """
+        Копирует непрочитанные строки и сдвигает позицию.
+
+        Строки, перезаписанные писателем во время копирования, отбрасываются.
+
+        :return: Копия строк и число потерянных строк, которые читатель не успел прочитать
+        """
+        cursor = self.cursor
+        rows, start = self.view()
+        rows = rows.copy()
+        first_valid = int(self.__header[_BEGIN]) - self.__capacity
+        if start < first_valid:
+            rows = rows[first_valid - start:]
+            start = min(first_valid, self.cursor)
+        return rows, start - cursor
+
+    def close(self):
+        """
+        Отключается от сегмента.
+        """
+        if self.__segment is None:
+            return
+        del self.__header, self.__data
+        try:
+            self.__segment.close()
+        except BufferError:
+            # Представления из view ещё используются; отображение освободится вместе с ними
+            pass
+        self.__segment = None
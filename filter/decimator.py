@@ -0,0 +1,126 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import firwin
+
+# Допустимое относительное отклонение частоты ниже целевой при выборе коэффициента прореживания
+_RATE_TOLERANCE = 1e-3
+
+
+@lru_cache(maxsize=32)
+def _design(factor: int, numtaps: int) -> np.ndarray:
+    """
+    Проектирует антиалиасинговый КИХ-фильтр с частотой среза 0.8 от новой частоты Найквиста.
+
+    :return: Коэффициенты в обратном порядке (для свёртки скалярным произведением), только для чтения
+    """
+    taps = firwin(numtaps, 0.8 / factor)[::-1].copy()
+    taps.setflags(write=False)
+    return taps
+
+
+def decimation_factor(fs: float, target_rate: Optional[float]) -> int:
+    """
+    Возвращает наибольший целый коэффициент прореживания, при котором частота
+    не опускается ниже целевой.
+
+    Частота ниже целевой на долю до _RATE_TOLERANCE считается равной ей:
+    частота, оценённая по временным меткам записи (например, 499.99 Гц
+    вместо 500), даёт тот же коэффициент, что и номинальная.
+
+    :param fs: Исходная частота дискретизации в Гц
+    :param target_rate: Минимальная нужная частота в Гц; None — без прореживания
+    :return: Коэффициент прореживания, не меньше 1
+    """
+    if target_rate is None or target_rate <= 0:
+        return 1
+    return max(1, int(fs * (1 + _RATE_TOLERANCE) // target_rate))
+
+
+class Decimator:
+    """
+    Потоковое прореживание в целое число раз с антиалиасинговым КИХ-фильтром.
+
+    Вычисляются только оставляемые отсчёты (каждый ``factor``-й), а не весь
+    отфильтрованный сигнал. Между блоками хранится хвост из ``numtaps - 1``
+    отсчётов, так что отсчёты на выходе не зависят от разбиения на блоки.
+    Фильтр линейно-фазовый; каждому выходному отсчёту сопоставляется
+    временная метка центра окна фильтра, то есть задержка фильтра учтена в
+    метках.
+
+    До первого блока хвост заполняется первым отсчётом, а метки хвоста
+    продолжаются назад с шагом ``1 / fs`` от первой метки блока — первого
+    или первого после блоков без меток. Без ``fs`` шаг оценивается по этому
+    блоку, и метки ближайших выходных отсчётов зависят от его длины; если в
+    блоке один отсчёт, они все равны его метке.
+
+    :param factor: Коэффициент прореживания
+    :param numtaps: Длина фильтра (нечётная); по умолчанию 16 × factor + 1
+    :param fs: Номинальная частота входных отсчётов в Гц для меток начального хвоста
+    """
+
+    def __init__(self, factor: int, numtaps: Optional[int] = None, fs: Optional[float] = None):
+        if factor < 1:
+            raise ValueError("Коэффициент прореживания должен быть не меньше 1")
+        self.factor = factor
+        self.numtaps = 16 * factor + 1 if numtaps is None else numtaps | 1
+        self.__taps = _design(factor, self.numtaps) if factor > 1 else None
+        self.__period = None if fs is None else 1.0 / fs
+        self.__tail: Optional[np.ndarray] = None
+        self.__tail_timestamps: Optional[np.ndarray] = None
+        self.__consumed = 0
+
+    def process(self, samples: np.ndarray,
+                timestamps: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Прореживает блок.
+
+        :param samples: Отсчёты блока (n_samples) или (n_samples × n_channels)
+        :param timestamps: Временные метки блока; None — метки не нужны
+        :return: Прореженные отсчёты и их временные метки (None, если метки не переданы)
+        """
+        samples = np.asarray(samples, dtype=float)
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype=float)
+        if self.factor == 1:
+            return samples, timestamps
+        if len(samples) == 0:
+            return samples, timestamps
+
+        history = self.numtaps - 1
+        if self.__tail is None:
+            # Начальное состояние — установившееся по первому отсчёту
+            self.__tail = np.repeat(samples[:1], history, axis=0)
+        if timestamps is None:
+            self.__tail_timestamps = None
+        elif self.__tail_timestamps is None:
+            # Метки хвоста продолжены назад от первой известной метки
+            if self.__period is not None:
+                step = self.__period
+            else:
+                step = np.median(np.diff(timestamps)) if len(timestamps) > 1 else 0.0
+            self.__tail_timestamps = timestamps[0] - step * np.arange(history, 0, -1)
+
+        x = np.concatenate((self.__tail, samples))
+        start = -self.__consumed % self.factor
+        windows = sliding_window_view(x, self.numtaps, axis=0)[start::self.factor]
+        out = windows @ self.__taps
+        self.__tail = x[-history:]
+        self.__consumed += len(samples)
+
+        out_timestamps = None
+        if timestamps is not None:
+            x_timestamps = np.concatenate((self.__tail_timestamps, timestamps))
+            out_timestamps = x_timestamps[history // 2 + start::self.factor][:len(out)]
+            self.__tail_timestamps = x_timestamps[-history:]
+        return out, out_timestamps
+
+    def reset(self):
+        """
+        Сбрасывает хвост предыдущих блоков.
+        """
+        self.__tail = None
+        self.__tail_timestamps = None
+        self.__consumed = 0
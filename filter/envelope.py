@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class RunningRMS:
+    """
+    Скользящее среднеквадратичное значение по окну фиксированной длины.
+
+    Сумма квадратов по окну получается разностью накопленных сумм, поэтому
+    стоимость на отсчёт постоянна и не зависит от длины окна; блок
+    обрабатывается за один вызов. Накопленные суммы считаются заново в
+    каждом блоке от сохранённого хвоста, так что ошибка округления не
+    накапливается. Пока окно не заполнено конечными значениями, результат — NaN.
+
+    :param window: Длина окна в отсчётах
+    """
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("Длина окна должна быть не меньше 1")
+        self.window = window
+        self.__tail_squares = None
+        self.__tail_valid = None
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Вычисляет огибающую для очередного блока.
+
+        :param chunk: Блок формы (n_samples,) или (n_samples, n_channels); NaN считаются пропусками
+        :return: Скользящее СКЗ той же формы
+        """
+        x = np.asarray(chunk, dtype=float)
+        valid = np.isfinite(x)
+        squares = np.where(valid, x, 0.0) ** 2
+        if self.__tail_squares is None:
+            self.__tail_squares = squares[:0]
+            self.__tail_valid = valid[:0]
+
+        squares = np.concatenate((self.__tail_squares, squares))
+        valid = np.concatenate((self.__tail_valid, valid))
+        head = len(self.__tail_squares)
+
+        zero = np.zeros((1,) + squares.shape[1:])
+        sums = np.concatenate((zero, np.cumsum(squares, axis=0)))
+        counts = np.concatenate((zero, np.cumsum(valid, axis=0)))
+        end = np.arange(head + 1, len(squares) + 1)
+        start = np.maximum(end - self.window, 0)
+        total = sums[end] - sums[start]
+        full = (counts[end] - counts[start]) == self.window
+
+        rms = np.full(total.shape, np.nan)
+        np.sqrt(np.maximum(total, 0.0) / self.window, out=rms, where=full)
+
+        keep = self.window - 1
+        self.__tail_squares = squares[-keep:] if keep else squares[:0]
+        self.__tail_valid = valid[-keep:] if keep else valid[:0]
+        return rms
+
+    def reset(self):
+        """
+        Сбрасывает накопленное окно.
+        """
+        self.__tail_squares = None
+        self.__tail_valid = None
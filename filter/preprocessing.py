@@ -0,0 +1,207 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import filtfilt
+
+from buffer.ring_buffer import RingBuffer
+from filter.decimator import Decimator
+from filter.signal_filter import StreamingFilter, design_filter
+
+
+class FilteredStreamSpec(NamedTuple):
+    """
+    Декларативное описание отфильтрованного потока одного канала.
+
+    Одинаковые описания от разных детекторов соответствуют одному потоку,
+    который фильтруется один раз за блок.
+
+    :param channel: Индекс канала в сэмпле
+    :param cutoff: Частота среза в Гц
+    :param order: Порядок фильтра
+    :param mode: 'window' — ``filtfilt`` по окну длиной fs для каждого отсчёта
+                 (исходное поведение детекторов), 'causal' — потоковый фильтр
+    :param decimation: Во сколько раз проредить канал перед фильтрацией;
+                 поток и его временные метки идут с частотой fs / decimation
+    :param btype: Тип фильтра: 'low' — ФНЧ, 'high' — ФВЧ
+    """
+    channel: int
+    cutoff: float = 10
+    order: int = 4
+    mode: str = 'window'
+    decimation: int = 1
+    btype: str = 'low'
+
+
+class PreprocessedChunk:
+    """
+    Результат предобработки одного блока: отфильтрованные потоки и временные метки.
+
+    Массивы доступны только для чтения. Отсчёты, для которых окно фильтра
+    ещё не накоплено, равны NaN. Прореженные потоки короче блока; их метки
+    возвращает ``timestamps_for``.
+    """
+
+    def __init__(self, timestamps: np.ndarray, streams: Dict[FilteredStreamSpec, np.ndarray],
+                 decimated_timestamps: Optional[Dict[int, np.ndarray]] = None):
+        self.timestamps = timestamps
+        self.__streams = streams
+        self.__decimated_timestamps = decimated_timestamps or {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def get(self, spec: FilteredStreamSpec) -> np.ndarray:
+        """
+        Возвращает отфильтрованный поток.
+
+        :param spec: Описание потока, ранее зарегистрированное в Preprocessor
+        :return: Отфильтрованные значения для каждого отсчёта блока
+        """
+        return self.__streams[spec]
+
+    def timestamps_for(self, spec: FilteredStreamSpec) -> np.ndarray:
+        """
+        Возвращает временные метки отсчётов потока.
+
+        :param spec: Описание потока
+        :return: Метки блока или, для прореженного потока, метки его отсчётов
+        """
+        if spec.decimation == 1:
+            return self.timestamps
+        return self.__decimated_timestamps[spec.decimation]
+
+
+class _WindowStream:
+    """
+    Поток, повторяющий ``filtfilt`` по скользящему окну, но для всего блока за один вызов.
+    """
+
+    def __init__(self, spec: FilteredStreamSpec, fs: float):
+        self.__b, self.__a = design_filter(spec.btype, spec.cutoff, fs, spec.order, output='ba')
+        self.__window = int(round(fs))
+        self.__buffer = RingBuffer(4 * self.__window)
+
+    def process(self, column: np.ndarray) -> np.ndarray:
+        out = np.full(len(column), np.nan)
+        step = self.__buffer.capacity - self.__window + 1
+        for start in range(0, len(column), step):
+            piece = column[start:start + step]
+            self.__buffer.extend(piece)
+            x = self.__buffer.latest(min(len(self.__buffer), len(piece) + self.__window - 1))
+            ready = len(x) - self.__window + 1
+            if ready > 0:
+                end = start + len(piece)
+                windows = sliding_window_view(x, self.__window)
+                out[end - ready:end] = filtfilt(self.__b, self.__a, windows, axis=1)[:, -1]
+        return out
+
+    def reset(self):
+        self.__buffer.clear()
+
+
+class _CausalStream:
+    """
+    Поток на потоковом причинном фильтре с прогревом длиной fs отсчётов.
+    """
+
+    def __init__(self, spec: FilteredStreamSpec, fs: float):
+        self.__filter = StreamingFilter(cutoff=spec.cutoff, fs=fs, order=spec.order, btype=spec.btype)
+        self.__warmup = int(round(fs)) - 1
+        self.__seen = 0
+
+    def process(self, column: np.ndarray) -> np.ndarray:
+        if len(column) == 0:
+            return np.empty(0)
+        out = self.__filter.process(column)
+        skip = min(max(self.__warmup - self.__seen, 0), len(out))
+        out[:skip] = np.nan
+        self.__seen += len(column)
+        return out
+
+    def reset(self):
+        self.__filter.reset()
+        self.__seen = 0
+
+
+class Preprocessor:
+    """
+    Общая стадия предобработки: буферизует и фильтрует каждый описанный поток
+    один раз за блок и отдаёт результат всем детекторам.
+
+    Потоки с ``decimation > 1`` фильтруются после прореживания канала
+    (Decimator); прореживание канала с одним коэффициентом тоже общее для
+    всех потоков.
+
+    :param fs: Частота дискретизации входных блоков в Гц (по умолчанию 125)
+    """
+
+    def __init__(self, fs: float = 125):
+        self.__fs = fs
+        self.__streams: Dict[FilteredStreamSpec, object] = {}
+        self.__decimators: Dict[Tuple[int, int], Decimator] = {}
+
+    def require(self, specs: Sequence[FilteredStreamSpec]):
+        """
+        Регистрирует потоки; уже существующие потоки переиспользуются.
+
+        :param specs: Описания потоков
+        """
+        for spec in specs:
+            if spec in self.__streams:
+                continue
+            rate = self.__fs / spec.decimation
+            if spec.mode == 'window':
+                self.__streams[spec] = _WindowStream(spec, rate)
+            elif spec.mode == 'causal':
+                self.__streams[spec] = _CausalStream(spec, rate)
+            else:
+                raise ValueError(f"Неизвестный режим фильтрации: {spec.mode}")
+            if spec.decimation > 1:
+                self.__decimators.setdefault((spec.channel, spec.decimation), Decimator(spec.decimation, fs=self.__fs))
+
+    def reset(self):
+        """
+        Сбрасывает буферы и состояние фильтров всех потоков, например после
+        разрыва в данных. Следующие блоки снова проходят прогрев.
+        """
+        for stream in self.__streams.values():
+            stream.reset()
+        for decimator in self.__decimators.values():
+            decimator.reset()
+
+    @property
+    def specs(self) -> List[FilteredStreamSpec]:
+        """Зарегистрированные потоки."""
+        return list(self.__streams)
+
+    def process(self, samples, timestamps) -> PreprocessedChunk:
+        """
+        Фильтрует блок для всех зарегистрированных потоков.
+
+        :param samples: Сэмплы блока (n_samples × n_channels)
+        :param timestamps: Временные метки блока
+        :return: Отфильтрованные потоки блока
+        """
+        data = np.asarray(samples, dtype=float)
+        ts = np.asarray(timestamps, dtype=float).view()
+        ts.setflags(write=False)
+
+        decimated = {}
+        decimated_timestamps = {}
+        for key, decimator in self.__decimators.items():
+            channel, factor = key
+            decimated[key], stream_ts = decimator.process(data[:, channel], ts)
+            stream_ts.setflags(write=False)
+            decimated_timestamps[factor] = stream_ts
+
+        streams = {}
+        for spec, stream in self.__streams.items():
+            if spec.decimation == 1:
+                column = data[:, spec.channel]
+            else:
+                column = decimated[(spec.channel, spec.decimation)]
+            values = stream.process(column)
+            values.setflags(write=False)
+            streams[spec] = values
+        return PreprocessedChunk(ts, streams, decimated_timestamps)
@@ -0,0 +1,68 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def threshold_window_mask(values: np.ndarray, threshold_min: float, threshold_max: float) -> np.ndarray:
+    """
+    Возвращает маску отсчётов, амплитуда которых строго внутри окна порогов.
+
+    :param values: Амплитуды формы (n_samples,) или (n_samples, n_channels)
+    :param threshold_min: Нижний порог
+    :param threshold_max: Верхний порог
+    :return: Маска формы (n_samples,); для нескольких каналов — хотя бы один канал в окне
+    """
+    mask = (values > threshold_min) & (values < threshold_max)
+    return mask if mask.ndim == 1 else mask.any(axis=1)
+
+
+def apply_refractory(times: np.ndarray, last_time: float, interval: float) -> Tuple[np.ndarray, float]:
+    """
+    Отбирает события из кандидатов с учётом рефрактерного интервала.
+
+    Событие принимается, если с предыдущего принятого прошло строго больше
+    ``interval`` секунд, — так же, как при последовательной проверке отсчётов.
+    Цикл выполняется по принятым событиям, а не по отсчётам.
+
+    :param times: Времена кандидатов в порядке поступления
+    :param last_time: Время последнего принятого события
+    :param interval: Рефрактерный интервал в секундах
+    :return: Времена принятых событий и обновлённое время последнего события
+    """
+    events = []
+    start = 0
+    while start < len(times):
+        accepted = (times[start:] - last_time) > interval
+        offset = int(np.argmax(accepted))
+        if not accepted[offset]:
+            break
+        last_time = times[start + offset]
+        events.append(last_time)
+        start += offset + 1
+    return np.asarray(events, dtype=float), last_time
+
+
+def hysteresis_mask(values: np.ndarray, on_threshold: float, off_threshold: float,
+                    active: bool = False) -> Tuple[np.ndarray, bool]:
+    """
+    Возвращает маску активного состояния с гистерезисом.
+
+    Состояние включается, когда значение строго выше ``on_threshold``, и
+    выключается, когда строго ниже ``off_threshold``; между порогами (и на
+    NaN) сохраняется предыдущее. Вычисляется для всего блока сразу: решения
+    на порогах переносятся вперёд по индексу последнего решения.
+
+    :param values: Значения формы (n_samples,)
+    :param on_threshold: Порог включения
+    :param off_threshold: Порог выключения, не выше порога включения
+    :param active: Состояние перед первым отсчётом блока
+    :return: Маска активных отсчётов и состояние после последнего отсчёта
+    """
+    decisions = np.full(len(values) + 1, -1, dtype=np.int8)
+    decisions[0] = active
+    decisions[1:][values < off_threshold] = 0
+    decisions[1:][values > on_threshold] = 1
+    last = np.where(decisions >= 0, np.arange(len(decisions)), 0)
+    np.maximum.accumulate(last, out=last)
+    mask = decisions[last][1:].astype(bool)
+    return mask, bool(mask[-1]) if len(mask) else active
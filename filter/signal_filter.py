@@ -1,7 +1,84 @@
-from typing import List
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Union
 
 import numpy as np
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter, filtfilt, iirnotch, sosfilt, sosfilt_zi, tf2sos
+
+_DESIGN_CACHE_SIZE = 128
+_design_cache: "OrderedDict[tuple, object]" = OrderedDict()
+_design_lock = threading.Lock()
+
+
+def design_filter(btype: str, cutoff: Union[float, Sequence[float]], fs: float, order: int,
+                  output: str = 'sos'):
+    """
+    Возвращает коэффициенты фильтра из общего кэша процесса, проектируя их при промахе.
+
+    Ключ кэша — (тип, частоты среза, fs, порядок, форма вывода); при переполнении
+    вытесняется давно не использованная запись. Записи кэша неизменяемы и
+    разделяются между всеми потребителями, а вызывающему возвращается их копия,
+    которую можно передавать в ``sosfilt``/``sosfiltfilt`` и изменять.
+
+    :param btype: Тип фильтра: 'low', 'high', 'band' или 'notch'
+    :param cutoff: Частота среза в Гц (для 'band' — пара частот, для 'notch' — частота подавления)
+    :param fs: Частота дискретизации в Гц
+    :param order: Порядок Butterworth-фильтра; для 'notch' — добротность
+    :param output: 'sos' или 'ba'
+    :return: Массив SOS либо пара (b, a)
+    """
+    cutoffs = tuple(float(c) for c in np.atleast_1d(cutoff))
+    key = (btype, cutoffs, float(fs), order, output)
+    with _design_lock:
+        coeffs = _design_cache.get(key)
+        if coeffs is not None:
+            _design_cache.move_to_end(key)
+            return _copy(coeffs)
+
+    coeffs = _design(btype, cutoffs, fs, order, output)
+
+    with _design_lock:
+        _design_cache[key] = coeffs
+        _design_cache.move_to_end(key)
+        while len(_design_cache) > _DESIGN_CACHE_SIZE:
+            _design_cache.popitem(last=False)
+    return _copy(coeffs)
+
+
+def _copy(coeffs):
+    """
+    Копирует коэффициенты из кэша: массив SOS или пару (b, a).
+    """
+    if isinstance(coeffs, tuple):
+        return tuple(array.copy() for array in coeffs)
+    return coeffs.copy()
+
+
+def clear_design_cache():
+    """
+    Очищает общий кэш коэффициентов фильтров.
+    """
+    with _design_lock:
+        _design_cache.clear()
+
+
+def _design(btype: str, cutoffs: tuple, fs: float, order, output: str):
+    """
+    Проектирует фильтр без обращения к кэшу.
+    """
+    if btype == 'notch':
+        b, a = iirnotch(cutoffs[0], order, fs=fs)
+        coeffs = tf2sos(b, a) if output == 'sos' else (b, a)
+    else:
+        nyquist = 0.5 * fs
+        normal_cutoff = np.asarray(cutoffs) / nyquist
+        if len(cutoffs) == 1:
+            normal_cutoff = normal_cutoff[0]
+        coeffs = butter(order, normal_cutoff, btype=btype, analog=False, output=output)
+
+    for array in (coeffs if output == 'ba' else (coeffs,)):
+        array.setflags(write=False)
+    return tuple(coeffs) if output == 'ba' else coeffs
 
 
 class SignalFilter:
@@ -23,10 +100,7 @@ class SignalFilter:
         Создаёт параметры Butterworth-фильтра для заданных настроек.
         :return: коэффициенты (b, a)
         """
-        nyquist = 0.5 * self.__fs
-        normal_cutoff = self.__cutoff / nyquist
-        b, a = butter(self.__order, normal_cutoff, btype='low', analog=False)
-        return b, a
+        return design_filter('low', self.__cutoff, self.__fs, self.__order, output='ba')
 
     def lowpass_filter(self, data: List[float]) -> np.ndarray:
         """
@@ -37,3 +111,196 @@ class SignalFilter:
         """
         b, a = self.__butter_lowpass()
         return filtfilt(b, a, data)
+
+
+class StreamingFilter:
+    """
+    Потоковый причинный Butterworth-фильтр на секциях второго порядка (SOS).
+
+    Состояние фильтра хранится отдельно для каждого канала, поэтому блок
+    отсчётов фильтруется за один вызов, а стоимость обработки одного отсчёта
+    не зависит от длины окна.
+
+    :param cutoff: Частота среза в Гц (для полосового фильтра — пара частот)
+    :param fs: Частота дискретизации в Гц (по умолчанию 125)
+    :param order: Порядок фильтра (по умолчанию 4)
+    :param btype: Тип фильтра: 'low', 'high', 'band' (по умолчанию 'low')
+    :param sos: Готовые коэффициенты SOS; если заданы, остальные параметры не используются
+    """
+
+    def __init__(self, cutoff=10, fs=125, order=4, btype='low', sos: Optional[np.ndarray] = None):
+        self.__sos = design_filter(btype, cutoff, fs, order) if sos is None else np.array(sos)
+        self.__zi: Optional[np.ndarray] = None
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Фильтрует очередной блок сигнала, продолжая с сохранённого состояния.
+
+        При первом вызове состояние инициализируется установившимся режимом
+        для первого отсчёта, чтобы избежать переходного процесса.
+
+        :param chunk: Блок формы (n_samples,) или (n_samples, n_channels)
+        :return: Отфильтрованный блок той же формы
+        """
+        x = np.asarray(chunk, dtype=float)
+        if x.shape[0] == 0:
+            return x.copy()
+
+        if self.__zi is None:
+            zi = sosfilt_zi(self.__sos)
+            self.__zi = zi.reshape(zi.shape + (1,) * (x.ndim - 1)) * x[0]
+
+        y, self.__zi = sosfilt(self.__sos, x, axis=0, zi=self.__zi)
+        return y
+
+    def reset(self):
+        """
+        Сбрасывает состояние фильтра.
+        """
+        self.__zi = None
+
+
+class ZeroPhaseStreamingFilter:
+    """
+    Потоковый фильтр с нулевой фазой и ограниченным упреждением.
+
+    Прямой проход выполняется причинно с сохранением состояния, обратный —
+    по последним ``lookahead`` отсчётам и новому блоку. Выход задержан на
+    ``lookahead`` отсчётов относительно входа; чем больше упреждение, тем
+    ближе результат к ``filtfilt`` по всему сигналу.
+
+    :param cutoff: Частота среза в Гц (для полосового фильтра — пара частот)
+    :param fs: Частота дискретизации в Гц (по умолчанию 125)
+    :param order: Порядок фильтра (по умолчанию 4)
+    :param btype: Тип фильтра: 'low', 'high', 'band' (по умолчанию 'low')
+    :param lookahead: Упреждение в отсчётах (по умолчанию fs // 2)
+    """
+
+    def __init__(self, cutoff=10, fs=125, order=4, btype='low', lookahead: Optional[int] = None):
+        self.__sos = design_filter(btype, cutoff, fs, order)
+        self.__forward = StreamingFilter(sos=self.__sos)
+        self.__lookahead = fs // 2 if lookahead is None else lookahead
+        self.__pending: Optional[np.ndarray] = None
+
+    @property
+    def delay(self) -> int:
+        """Задержка выхода относительно входа в отсчётах."""
+        return self.__lookahead
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Фильтрует очередной блок и возвращает готовые отсчёты.
+
+        :param chunk: Блок формы (n_samples,) или (n_samples, n_channels)
+        :return: Отфильтрованные отсчёты, задержанные на ``delay``;
+                 пока упреждение не накоплено, блок может быть пустым
+        """
+        forward = self.__forward.process(chunk)
+        if self.__pending is None:
+            self.__pending = forward[:0]
+        buffer = np.concatenate((self.__pending, forward), axis=0)
+
+        ready = buffer.shape[0] - self.__lookahead
+        if ready <= 0:
+            self.__pending = buffer
+            return buffer[:0]
+
+        reversed_buffer = buffer[::-1]
+        zi = sosfilt_zi(self.__sos)
+        zi = zi.reshape(zi.shape + (1,) * (buffer.ndim - 1)) * reversed_buffer[0]
+        backward, _ = sosfilt(self.__sos, reversed_buffer, axis=0, zi=zi)
+
+        self.__pending = buffer[ready:]
+        return backward[::-1][:ready]
+
+    def reset(self):
+        """
+        Сбрасывает состояние фильтра и буфер упреждения.
+        """
+        self.__forward.reset()
+        self.__pending = None
+
+
+class FilterBank:
+    """
+    Каскад фильтров, спроектированных один раз и применяемых за один проход.
+
+    Все звенья (ФНЧ, ФВЧ, полосовые и режекторные фильтры) объединяются в одну
+    цепочку SOS, поэтому подавление сетевой наводки и выделение полосы не
+    требуют отдельных проходов по блоку. Методы добавления звеньев возвращают
+    сам банк, что позволяет собирать его цепочкой вызовов.
+
+    :param fs: Частота дискретизации в Гц (по умолчанию 125)
+    """
+
+    def __init__(self, fs=125):
+        self.__fs = fs
+        self.__stages: List[np.ndarray] = []
+        self.__filter: Optional[StreamingFilter] = None
+
+    def lowpass(self, cutoff: float, order: int = 4) -> 'FilterBank':
+        """
+        Добавляет низкочастотный фильтр.
+
+        :param cutoff: Частота среза в Гц
+        :param order: Порядок фильтра
+        """
+        return self.__add(design_filter('low', cutoff, self.__fs, order))
+
+    def highpass(self, cutoff: float, order: int = 4) -> 'FilterBank':
+        """
+        Добавляет высокочастотный фильтр.
+
+        :param cutoff: Частота среза в Гц
+        :param order: Порядок фильтра
+        """
+        return self.__add(design_filter('high', cutoff, self.__fs, order))
+
+    def bandpass(self, low: float, high: float, order: int = 4) -> 'FilterBank':
+        """
+        Добавляет полосовой фильтр.
+
+        :param low: Нижняя граница полосы в Гц
+        :param high: Верхняя граница полосы в Гц
+        :param order: Порядок фильтра
+        """
+        return self.__add(design_filter('band', (low, high), self.__fs, order))
+
+    def notch(self, freq: float = 50, quality: float = 30) -> 'FilterBank':
+        """
+        Добавляет режекторный фильтр сетевой наводки.
+
+        :param freq: Частота подавления в Гц (обычно 50 или 60)
+        :param quality: Добротность фильтра
+        """
+        return self.__add(design_filter('notch', freq, self.__fs, quality))
+
+    @property
+    def sos(self) -> np.ndarray:
+        """Объединённые коэффициенты всех звеньев."""
+        if not self.__stages:
+            return np.array([[1.0, 0.0, 0.0, 1.0, 0.0, 0.0]])
+        return np.concatenate(self.__stages, axis=0)
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Пропускает блок через весь каскад, сохраняя состояние между вызовами.
+
+        :param chunk: Блок формы (n_samples,) или (n_samples, n_channels)
+        :return: Отфильтрованный блок той же формы
+        """
+        if self.__filter is None:
+            self.__filter = StreamingFilter(sos=self.sos)
+        return self.__filter.process(chunk)
+
+    def reset(self):
+        """
+        Сбрасывает состояние каскада.
+        """
+        if self.__filter is not None:
+            self.__filter.reset()
+
+    def __add(self, sos: np.ndarray) -> 'FilterBank':
+        self.__stages.append(sos)
+        self.__filter = None
+        return self
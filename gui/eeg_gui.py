@@ -1,21 +1,47 @@
 import sys
 
+import numpy as np
 import pyqtgraph as pg
 from PyQt6 import QtWidgets, QtCore
 
+from buffer.ring_buffer import RingBuffer
 from processor.eeg_processor import EEGProcessor
+from processor.publisher import SharedStreamReader, shared_prefix_arg
+from rhytm.spectrogram import Spectrogram
+
+HISTORY_SIZE = 3600
+REDRAW_FPS = 30
+SPECTROGRAM_HISTORY = 600
+SPECTROGRAM_MAX_FREQ = 40.0
+SPECTROGRAM_RESOLUTION = 0.5
 
 
 class EEGGui(QtWidgets.QWidget):
     """
     Графический интерфейс для отображения EEG активности, событий моргания и сжатия челюсти, а также альфа/бета ритмов.
+
+    История ритмов хранится в кольцевом буфере на HISTORY_SIZE последних оценок,
+    поэтому память и стоимость перерисовки не растут со временем сессии.
+    Оценки только дописываются в буфер, а графики перерисовываются таймером
+    не чаще REDRAW_FPS раз в секунду и только при появлении новых данных.
+
+    Спектрограмма опорного канала — одно изображение фиксированного размера
+    (Spectrogram): поток обработки сводит каждый спектр к столбцу и передаёт
+    столбцы блока вместе с его ритмами, поток интерфейса дописывает их в
+    кольцевой буфер, а таймер перерисовки
+    обновляет изображение. В режиме ``shared_prefix`` спектры не передаются
+    и спектрограмма не обновляется.
     """
-    blink_signal = QtCore.pyqtSignal()
-    clench_signal = QtCore.pyqtSignal()
-    rhythm_signal = QtCore.pyqtSignal(float, float, float)
+    # Слушатель получает события блока пачками, поэтому граница потоков пересекается раз в блок
+    blink_signal = QtCore.pyqtSignal(object)
+    clench_signal = QtCore.pyqtSignal(object)
+    rhythm_signal = QtCore.pyqtSignal(object)
+    spectrum_signal = QtCore.pyqtSignal(object)
 
-    def __init__(self):
+    def __init__(self, shared_prefix=None, streaming=False):
         super().__init__()
+        self.shared_prefix = shared_prefix
+        self.streaming = streaming
         self.blink_count = 0
         self.clench_count = 0
         self.setWindowTitle("EEG Monitor")
@@ -29,6 +55,12 @@ class EEGGui(QtWidgets.QWidget):
         self.blink_signal.connect(self.update_blink_ui)
         self.clench_signal.connect(self.update_clench_ui)
         self.rhythm_signal.connect(self.update_graphs)
+        self.spectrum_signal.connect(self.update_spectrogram)
+
+        self.redraw_timer = QtCore.QTimer(self)
+        self.redraw_timer.setInterval(1000 // REDRAW_FPS)
+        self.redraw_timer.timeout.connect(self.redraw_graphs)
+        self.redraw_timer.start()
 
     def init_ui(self):
         layout = QtWidgets.QVBoxLayout(self)
@@ -41,15 +73,33 @@ class EEGGui(QtWidgets.QWidget):
         self.beta_curve = self.plot_beta.plot(pen='b')
         self.ratio_curve = self.plot_ratio.plot(pen='r')
 
-        self.alpha_data = []
-        self.beta_data = []
-        self.ratio_data = []
-        self.x = []
+        for plot in (self.plot_alpha, self.plot_beta, self.plot_ratio):
+            # При отдалении рисуются только видимые точки, прореженные с сохранением пиков
+            plot.setClipToView(True)
+            plot.setDownsampling(auto=True, mode='peak')
+
+        # Столбцы: номер оценки, альфа, бета, альфа/бета
+        self.history = RingBuffer(HISTORY_SIZE, channels=4)
+        self.rhythm_count = 0
+        self.history_dirty = False
+
+        self.spectrogram = Spectrogram(SPECTROGRAM_HISTORY, SPECTROGRAM_MAX_FREQ, SPECTROGRAM_RESOLUTION)
+        self.spectrogram_version = self.spectrogram.version
+        self.spectrum_columns = []
+        self.spectrogram_levels = None
+        self.plot_spectrogram = pg.PlotWidget(title="Spectrogram")
+        self.plot_spectrogram.setLabel('left', "Frequency", units='Hz')
+        self.spectrogram_image = pg.ImageItem(axisOrder='col-major')
+        self.spectrogram_image.setColorMap(pg.colormap.get('viridis'))
+        # Ось Y в герцах: строка изображения — SPECTROGRAM_RESOLUTION Гц
+        self.spectrogram_image.setRect(QtCore.QRectF(0, 0, SPECTROGRAM_HISTORY, SPECTROGRAM_MAX_FREQ))
+        self.plot_spectrogram.addItem(self.spectrogram_image)
 
         graph_layout = QtWidgets.QVBoxLayout()
         graph_layout.addWidget(self.plot_alpha)
         graph_layout.addWidget(self.plot_beta)
         graph_layout.addWidget(self.plot_ratio)
+        graph_layout.addWidget(self.plot_spectrogram)
 
         left_layout = QtWidgets.QVBoxLayout()
         self.blink_label = QtWidgets.QLabel("🔴 Blink Count: 0")
@@ -87,44 +137,85 @@ class EEGGui(QtWidgets.QWidget):
         label.setFixedSize(20, 20)
         label.setStyleSheet(f"background-color: {color}; border-radius: 10px;")
 
-    def update_blink_ui(self):
-        self.blink_count += 1
+    def update_blink_ui(self, timestamps: np.ndarray):
+        self.blink_count += len(timestamps)
         self.blink_label.setText(f"🔴 Blink Count: {self.blink_count}")
         self.set_led(self.blink_indicator, "red")
         QtCore.QTimer.singleShot(500, lambda: self.set_led(self.blink_indicator, "gray"))
 
-    def update_clench_ui(self):
-        self.clench_count += 1
+    def update_clench_ui(self, timestamps: np.ndarray):
+        self.clench_count += len(timestamps)
         self.clench_label.setText(f"🔵 Clench Count: {self.clench_count}")
         self.set_led(self.clench_indicator, "blue")
         QtCore.QTimer.singleShot(500, lambda: self.set_led(self.clench_indicator, "gray"))
 
-    def update_graphs(self, alpha: float, beta: float, ratio: float):
-        self.alpha_data.append(alpha)
-        self.beta_data.append(beta)
-        self.ratio_data.append(ratio)
-        self.x.append(len(self.x))
+    def update_graphs(self, rhythms: np.ndarray):
+        index = np.arange(self.rhythm_count, self.rhythm_count + len(rhythms))
+        self.history.extend(np.column_stack((index, rhythms)))
+        self.rhythm_count += len(rhythms)
+        self.history_dirty = True
+
+    def update_spectrogram(self, columns: np.ndarray):
+        self.spectrogram.append(columns)
+        # Уровни цвета расширяются по новым столбцам, без пересчёта по всему изображению
+        low, high = float(columns.min()), float(columns.max())
+        if self.spectrogram_levels is not None:
+            low = min(low, self.spectrogram_levels[0])
+            high = max(high, self.spectrogram_levels[1])
+        self.spectrogram_levels = (low, high)
+
+    def redraw_graphs(self):
+        if self.spectrogram_version != self.spectrogram.version:
+            self.spectrogram_version = self.spectrogram.version
+            # Копия по той же причине, что и для графиков ритмов
+            self.spectrogram_image.setImage(self.spectrogram.image.copy(), autoLevels=False,
+                                            levels=self.spectrogram_levels or (0.0, 1.0))
+
+        if not self.history_dirty:
+            return
+        self.history_dirty = False
 
-        self.alpha_curve.setData(self.x, self.alpha_data)
-        self.beta_curve.setData(self.x, self.beta_data)
-        self.ratio_curve.setData(self.x, self.ratio_data)
+        # Копия: буфер перезаписывается, а pyqtgraph хранит переданные массивы до следующего setData
+        history = self.history.latest().copy()
+        x = history[:, 0]
+        self.alpha_curve.setData(x, history[:, 1])
+        self.beta_curve.setData(x, history[:, 2])
+        self.ratio_curve.setData(x, history[:, 3])
 
-    def on_blink(self, timestamp: float) -> None:
-        self.blink_signal.emit()
+    def on_blinks(self, timestamps: np.ndarray) -> None:
+        self.blink_signal.emit(timestamps)
 
-    def on_clench(self, timestamp: float) -> None:
-        self.clench_signal.emit()
+    def on_clenches(self, timestamps: np.ndarray) -> None:
+        self.clench_signal.emit(timestamps)
 
-    def on_rhythm(self, alpha_power: float, beta_power: float, alpha_beta_ratio: float) -> None:
-        self.rhythm_signal.emit(alpha_power, beta_power, alpha_beta_ratio)
+    def on_rhythms(self, rhythms: np.ndarray) -> None:
+        self.rhythm_signal.emit(rhythms)
+        # Спектры блока приходят до его ритмов, поэтому столбцы уходят одним сигналом на блок
+        if self.spectrum_columns:
+            self.spectrum_signal.emit(np.array(self.spectrum_columns))
+            self.spectrum_columns = []
+
+    def on_spectrum(self, freqs: np.ndarray, spectrum: np.ndarray) -> None:
+        # Спектр сводится к столбцу в потоке обработки; в поток интерфейса уходят только rows значений
+        self.spectrum_columns.append(self.spectrogram.reduce(freqs, spectrum))
 
     def start_eeg(self):
-        self.eeg_processor = EEGProcessor(
-            duration=None,
-            blink_listener=self,
-            clench_listener=self,
-            rhythm_listener=self
-        )
+        if self.shared_prefix is not None:
+            # Результаты читаются у запущенного gui/eeg_publish.py без повторной обработки
+            self.eeg_processor = SharedStreamReader(
+                self.shared_prefix,
+                blink_listener=self,
+                clench_listener=self,
+                rhythm_listener=self
+            )
+        else:
+            self.eeg_processor = EEGProcessor(
+                duration=None,
+                blink_listener=self,
+                clench_listener=self,
+                rhythm_listener=self,
+                streaming=self.streaming
+            )
 
         self.thread = QtCore.QThread()
         self.worker = EEGWorker(self.eeg_processor)
@@ -156,35 +247,29 @@ class EEGWorker(QtCore.QObject):
     def __init__(self, processor: EEGProcessor):
         super().__init__()
         self.processor = processor
-        self.timer = QtCore.QTimer(self)
-        self.timer.setInterval(100)
-        self.timer.timeout.connect(self.process_step)
         self.running = False
 
     def start(self):
-        if self.processor.initialize_stream():
-            self.running = True
-            self.timer.start()
-        else:
-            self.finished.emit()
-
-    def process_step(self):
-        if not self.running:
-            self.timer.stop()
+        if not self.processor.initialize_stream():
             self.finished.emit()
             return
 
-        if not self.processor.step():
-            self.stop()
+        # Чтение LSL идёт в потоке захвата, здесь блоки обрабатываются по мере прихода
+        self.processor.start_acquisition()
+        self.running = True
+        while self.running and self.processor.step(timeout=0.1):
+            pass
 
-    def stop(self):
         self.running = False
-        self.timer.stop()
+        self.processor.close()
         self.finished.emit()
 
+    def stop(self):
+        self.running = False
+
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
-    window = EEGGui()
+    window = EEGGui(shared_prefix_arg(sys.argv), streaming="--streaming" in sys.argv)
     window.show()
     sys.exit(app.exec())
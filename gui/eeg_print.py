@@ -1,6 +1,10 @@
+import sys
+
 from blink.blink_detector import BlinkDetectorListener
 from jaws.jaw_clench_detector import JawClenchDetectorListener
 from processor.eeg_processor import EEGProcessor
+from processor.publisher import SharedStreamReader, shared_prefix_arg
+from recorder.event_store import SessionEventStore
 from rhytm.rhytm_analyzer import RhythmAnalyzerListener
 
 
@@ -23,17 +27,32 @@ def main():
     blink_listener = PrintBlinkListener()
     jaw_clench_listener = PrintJawClenchListener()
     rhythm_listener = PrintRhythmListener()
-    eeg = EEGProcessor(blink_listener=blink_listener, clench_listener=jaw_clench_listener,
-                       rhythm_listener=rhythm_listener)
+    store = None
+    shared_prefix = shared_prefix_arg(sys.argv)
+    if shared_prefix is not None:
+        # Результаты читаются у запущенного gui/eeg_publish.py без повторной обработки
+        eeg = SharedStreamReader(shared_prefix, blink_listener=blink_listener,
+                                 clench_listener=jaw_clench_listener, rhythm_listener=rhythm_listener)
+    else:
+        # События сеанса сохраняются для итоговой сводки
+        store = SessionEventStore()
+        eeg = EEGProcessor(blink_listener=blink_listener, clench_listener=jaw_clench_listener,
+                           rhythm_listener=rhythm_listener, publisher=store, streaming="--streaming" in sys.argv)
 
     if not eeg.initialize_stream():
         raise Exception("Failed to initialize stream")
 
+    eeg.start_acquisition()
     try:
-        while eeg.step():
+        while eeg.step(timeout=0.5):
             pass
     except KeyboardInterrupt:
         print("Остановка пользователем.")
+    finally:
+        eeg.close()
+        if store is not None:
+            print(store.format_summary())
+            print(eeg.timestamp_monitor.format_summary())
 
 
 if __name__ == '__main__':
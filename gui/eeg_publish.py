@@ -0,0 +1,33 @@
+import sys
+
+from processor.eeg_processor import EEGProcessor
+from processor.publisher import SharedStreamPublisher
+
+
+def main():
+    """
+    Запускает единственный процесс обработки, публикующий результаты в
+    разделяемую память. Мониторы и GUI подключаются к нему с ключом
+    ``--shared [префикс]`` и не повторяют обработку. Ключ ``--streaming``
+    включает потоковый фильтр детекторов.
+    """
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    prefix = args[0] if args else "eeg"
+    eeg = EEGProcessor(publisher=SharedStreamPublisher(prefix), streaming="--streaming" in sys.argv)
+
+    if not eeg.initialize_stream():
+        raise Exception("Failed to initialize stream")
+
+    print(f"Публикация в разделяемую память с префиксом '{prefix}'.")
+    eeg.start_acquisition()
+    try:
+        while eeg.step(timeout=0.5):
+            pass
+    except KeyboardInterrupt:
+        print("Остановка пользователем.")
+    finally:
+        eeg.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,22 @@
 import sys
 
+import numpy as np
 from PyQt6 import QtWidgets, QtCore, QtGui
 
 from processor.eeg_processor import EEGProcessor
+from processor.publisher import SharedStreamReader, shared_prefix_arg
 
 
 class EEGGui(QtWidgets.QWidget):
-    blink_signal = QtCore.pyqtSignal()
-    clench_signal = QtCore.pyqtSignal()
-    rhythm_signal = QtCore.pyqtSignal(float)
+    # Слушатель получает события блока пачками, поэтому граница потоков пересекается раз в блок
+    blink_signal = QtCore.pyqtSignal(object)
+    clench_signal = QtCore.pyqtSignal(object)
+    rhythm_signal = QtCore.pyqtSignal(object)
 
-    def __init__(self):
+    def __init__(self, shared_prefix=None, streaming=False):
         super().__init__()
+        self.shared_prefix = shared_prefix
+        self.streaming = streaming
         self.setWindowTitle("EEG GUI — Circle Visualizer")
         self.setGeometry(300, 300, 600, 500)
 
@@ -62,35 +67,46 @@ class EEGGui(QtWidgets.QWidget):
         layout.addStretch()
         layout.addLayout(button_layout)
 
-    def update_blink(self):
-        self.blink_count += 1
+    def update_blink(self, timestamps: np.ndarray):
+        self.blink_count += len(timestamps)
         self.blink_label.setText(f"🔴 Blink Count: {self.blink_count}")
         self.circle.flash("red")
 
-    def update_clench(self):
-        self.clench_count += 1
+    def update_clench(self, timestamps: np.ndarray):
+        self.clench_count += len(timestamps)
         self.clench_label.setText(f"🔵 Clench Count: {self.clench_count}")
         self.circle.flash("blue")
 
-    def update_circle(self, ratio: float):
-        self.circle.set_ratio(ratio)
+    def update_circle(self, rhythms: np.ndarray):
+        # Круг показывает только последнюю оценку блока
+        self.circle.set_ratio(float(rhythms[-1, 2]))
 
-    def on_blink(self, timestamp: float) -> None:
-        self.blink_signal.emit()
+    def on_blinks(self, timestamps: np.ndarray) -> None:
+        self.blink_signal.emit(timestamps)
 
-    def on_clench(self, timestamp: float) -> None:
-        self.clench_signal.emit()
+    def on_clenches(self, timestamps: np.ndarray) -> None:
+        self.clench_signal.emit(timestamps)
 
-    def on_rhythm(self, alpha_power: float, beta_power: float, alpha_beta_ratio: float) -> None:
-        self.rhythm_signal.emit(alpha_beta_ratio)
+    def on_rhythms(self, rhythms: np.ndarray) -> None:
+        self.rhythm_signal.emit(rhythms)
 
     def start_eeg(self):
-        self.eeg_processor = EEGProcessor(
-            duration=None,
-            blink_listener=self,
-            clench_listener=self,
-            rhythm_listener=self
-        )
+        if self.shared_prefix is not None:
+            # Результаты читаются у запущенного gui/eeg_publish.py без повторной обработки
+            self.eeg_processor = SharedStreamReader(
+                self.shared_prefix,
+                blink_listener=self,
+                clench_listener=self,
+                rhythm_listener=self
+            )
+        else:
+            self.eeg_processor = EEGProcessor(
+                duration=None,
+                blink_listener=self,
+                clench_listener=self,
+                rhythm_listener=self,
+                streaming=self.streaming
+            )
         self.thread = QtCore.QThread()
         self.worker = EEGWorker(self.eeg_processor)
         self.worker.moveToThread(self.thread)
@@ -162,35 +178,29 @@ class EEGWorker(QtCore.QObject):
     def __init__(self, processor: EEGProcessor):
         super().__init__()
         self.processor = processor
-        self.timer = QtCore.QTimer(self)
-        self.timer.setInterval(100)
-        self.timer.timeout.connect(self.step)
         self.running = False
 
     def start(self):
-        if self.processor.initialize_stream():
-            self.running = True
-            self.timer.start()
-        else:
-            self.finished.emit()
-
-    def step(self):
-        if not self.running:
-            self.timer.stop()
+        if not self.processor.initialize_stream():
             self.finished.emit()
             return
 
-        if not self.processor.step():
-            self.stop()
+        # Чтение LSL идёт в потоке захвата, здесь блоки обрабатываются по мере прихода
+        self.processor.start_acquisition()
+        self.running = True
+        while self.running and self.processor.step(timeout=0.1):
+            pass
 
-    def stop(self):
         self.running = False
-        self.timer.stop()
+        self.processor.close()
         self.finished.emit()
 
+    def stop(self):
+        self.running = False
+
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
-    gui = EEGGui()
+    gui = EEGGui(shared_prefix_arg(sys.argv), streaming="--streaming" in sys.argv)
     gui.show()
     sys.exit(app.exec())
@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
-from collections import deque
 from typing import List
 
-from filter.signal_filter import SignalFilter
+import numpy as np
+
+from filter.decimator import decimation_factor
+from filter.envelope import RunningRMS
+from filter.preprocessing import FilteredStreamSpec, PreprocessedChunk, Preprocessor
+from filter.refractory import apply_refractory, hysteresis_mask, threshold_window_mask
 
 
 class JawClenchDetectorListener(ABC):
@@ -18,42 +22,162 @@ class JawClenchDetectorListener(ABC):
         pass
 
 
+class JawClenchBatchListener(JawClenchDetectorListener):
+    """
+    Слушатель, получающий все сжатия челюсти блока одним вызовом.
+
+    Подходит везде, где ожидается JawClenchDetectorListener: одиночный ``on_clench``
+    передаётся в ``on_clenches`` массивом из одного элемента.
+    """
+
+    @abstractmethod
+    def on_clenches(self, timestamps: np.ndarray) -> None:
+        """
+        Обрабатывает все сжатия челюсти блока.
+
+        :param timestamps: Времена событий в секундах по возрастанию
+        """
+        pass
+
+    def on_clench(self, timestamp: float) -> None:
+        self.on_clenches(np.array([timestamp]))
+
+
+def emit_clenches(listener: JawClenchDetectorListener, timestamps: np.ndarray):
+    """
+    Передаёт слушателю сжатия челюсти блока: одним вызовом ``on_clenches``, если
+    слушатель его поддерживает, иначе по одному через ``on_clench``.
+
+    :param listener: Слушатель
+    :param timestamps: Времена событий в секундах
+    """
+    if len(timestamps) == 0:
+        return
+    on_clenches = getattr(listener, "on_clenches", None)
+    if on_clenches is not None:
+        on_clenches(timestamps)
+    else:
+        for timestamp in timestamps:
+            listener.on_clench(float(timestamp))
+
+
 class JawClenchDetector:
     """
     Детектор одиночных сжатий челюсти по каналам F3/F4.
+
+    Режим ``streaming=True`` использует причинный потоковый фильтр: блок
+    фильтруется за один вызов, стоимость на отсчёт — O(1).
+
+    Режим ``method='emg'`` ищет сжатие по энергии мышечной активности:
+    каналы проходят причинный ФВЧ с частотой среза ``emg_cutoff``, по ним
+    считается скользящее СКЗ в окне ``rms_window`` секунд (RunningRMS,
+    стоимость на отсчёт не зависит от длины окна), и сжатием считается
+    момент, когда огибающая хотя бы одного канала поднимается выше
+    ``emg_threshold``. Следующее сжатие возможно только после того, как
+    огибающая опустится ниже ``emg_release`` (гистерезис) и пройдёт
+    ``debounce_time``. Медленные волны морганий через ФВЧ не проходят.
+    Параметры ``threshold_min``, ``threshold_max``, ``streaming`` и
+    ``target_rate`` в этом режиме не используются: ЭМГ занимает полосу выше
+    ``emg_cutoff``, поэтому каналы обрабатываются на полной частоте.
+
+    В режиме 'lowpass' каналы, как и у BlinkDetector, прореживаются до
+    ``target_rate``, поэтому при одинаковых настройках оба детектора
+    используют один отфильтрованный поток предобработки.
+
+    :param fs: Частота дискретизации входных блоков в Гц
+    :param target_rate: Частота, до которой прореживаются каналы режима 'lowpass'; None — полная частота
+    :param method: 'lowpass' — пороги амплитуды после ФНЧ, 'emg' — огибающая ЭМГ
+    :param emg_cutoff: Частота среза ФВЧ режима 'emg' в Гц
+    :param rms_window: Длина окна огибающей режима 'emg' в секундах
+    :param emg_threshold: Порог огибающей для начала сжатия в мкВ
+    :param emg_release: Порог окончания сжатия в мкВ; None — равен ``emg_threshold``
     """
 
-    def __init__(self, threshold_min=100, threshold_max=300, debounce_time=0.5, fs=125):
+    def __init__(self, threshold_min=100, threshold_max=300, debounce_time=0.5, fs=125, streaming=False,
+                 target_rate=125, method='lowpass', emg_cutoff=30, rms_window=0.2, emg_threshold=20,
+                 emg_release=10):
+        if method not in ('lowpass', 'emg'):
+            raise ValueError(f"Неизвестный метод детекции сжатий: {method}")
         self.__threshold_min = threshold_min
         self.__threshold_max = threshold_max
         self.__debounce_time = debounce_time
+        self.__last_clench_time = 0
+        self.__method = method
+        self.__emg_threshold = emg_threshold
+        self.__emg_release = emg_threshold if emg_release is None else emg_release
+        self.__active = False
+        if method == 'emg':
+            self.__f3 = FilteredStreamSpec(3, cutoff=emg_cutoff, mode='causal', btype='high')
+            self.__f4 = FilteredStreamSpec(4, cutoff=emg_cutoff, mode='causal', btype='high')
+            self.__envelope = RunningRMS(max(1, int(round(rms_window * fs))))
+        else:
+            mode = 'causal' if streaming else 'window'
+            decimation = decimation_factor(fs, target_rate)
+            self.__f3 = FilteredStreamSpec(3, mode=mode, decimation=decimation)
+            self.__f4 = FilteredStreamSpec(4, mode=mode, decimation=decimation)
+            self.__envelope = None
+        # Собственная предобработка нужна только при вызове detect() напрямую;
+        # в EEGProcessor детектор получает готовые блоки из общей предобработки
         self.__fs = fs
+        self.__preprocessor = None
+
+    def reset(self):
+        """
+        Сбрасывает состояние детектора, например после разрыва в данных.
+        """
+        if self.__preprocessor is not None:
+            self.__preprocessor.reset()
         self.__last_clench_time = 0
-        self.__f3_buffer = deque(maxlen=fs)
-        self.__f4_buffer = deque(maxlen=fs)
-        self.__filter = SignalFilter(fs=fs)
+        self.__active = False
+        if self.__envelope is not None:
+            self.__envelope.reset()
+
+    @property
+    def streams(self) -> List[FilteredStreamSpec]:
+        """Отфильтрованные потоки, необходимые детектору."""
+        return [self.__f3, self.__f4]
 
     def detect(self, samples: List[List[float]], timestamps: List[float], listener: JawClenchDetectorListener):
         """
         Анализирует сигнал и сообщает о сжатии челюсти.
 
-        :param samples: Список сэмплов (массив каналов)
-        :param timestamps: Список временных меток
+        :param samples: Сэмплы блока (n_samples × n_channels), список или массив numpy
+        :param timestamps: Временные метки блока
         :param listener: Объект, реализующий интерфейс JawClenchDetectorListener
         """
-        for i in range(len(samples)):
-            self.__f3_buffer.append(samples[i][3])
-            self.__f4_buffer.append(samples[i][4])
+        if self.__preprocessor is None:
+            self.__preprocessor = Preprocessor(fs=self.__fs)
+            self.__preprocessor.require(self.streams)
+        self.detect_preprocessed(self.__preprocessor.process(samples, timestamps), listener)
+
+    def detect_preprocessed(self, chunk: PreprocessedChunk, listener: JawClenchDetectorListener):
+        """
+        Анализирует блок, уже отфильтрованный общей стадией предобработки.
+
+        Пороги проверяются масками для всего блока сразу, рефрактерный
+        интервал применяется к отобранным кандидатам.
 
-            if len(self.__f3_buffer) < self.__fs:
-                continue
+        :param chunk: Результат Preprocessor.process с потоками из ``streams``
+        :param listener: Объект, реализующий интерфейс JawClenchDetectorListener
+        """
+        filtered = np.column_stack((chunk.get(self.__f3), chunk.get(self.__f4)))
+        timestamps = chunk.timestamps_for(self.__f3)
+        if self.__method == 'emg':
+            candidates = timestamps[self.__onsets(filtered)]
+        else:
+            candidates = timestamps[threshold_window_mask(np.abs(filtered), self.__threshold_min, self.__threshold_max)]
+        events, self.__last_clench_time = apply_refractory(candidates, self.__last_clench_time, self.__debounce_time)
+        emit_clenches(listener, events)
 
-            f3_val = abs(self.__filter.lowpass_filter(list(self.__f3_buffer))[-1])
-            f4_val = abs(self.__filter.lowpass_filter(list(self.__f4_buffer))[-1])
+    def __onsets(self, filtered: np.ndarray) -> np.ndarray:
+        """
+        Находит начала мышечной активности в блоке.
 
-            if self.__threshold_min < f3_val < self.__threshold_max or \
-                    self.__threshold_min < f4_val < self.__threshold_max:
-                current_time = timestamps[i]
-                if current_time - self.__last_clench_time > self.__debounce_time:
-                    listener.on_clench(current_time)
-                    self.__last_clench_time = current_time
+        :param filtered: Каналы после ФВЧ (n_samples × 2)
+        :return: Маска отсчётов, на которых огибающая переходит в активное состояние
+        """
+        envelope = self.__envelope.process(filtered).max(axis=1)
+        active, state = hysteresis_mask(envelope, self.__emg_threshold, self.__emg_release, self.__active)
+        previous = np.concatenate(([self.__active], active[:-1]))
+        self.__active = state
+        return active & ~previous
@@ -0,0 +1,136 @@
+import threading
+from collections import deque
+from typing import Optional, Tuple
+
+import numpy as np
+
+from processor.sources import SampleSource
+
+POLICIES = ('block', 'drop_oldest', 'drop_newest', 'coalesce')
+
+
+class AcquisitionThread:
+    """
+    Поток захвата: блокирующее чтение источника в ограниченную очередь.
+
+    Поток ждёт данные внутри ``pull_chunk(timeout=...)``, поэтому задержка
+    определяется приходом сэмплов, а не таймером, и ядро не занимается
+    холостым опросом. Если обработка отстаёт и очередь заполнена,
+    применяется политика:
+
+    * ``'block'`` — поток захвата ждёт места в очереди (данные копятся в источнике);
+    * ``'drop_oldest'`` — самый старый блок отбрасывается;
+    * ``'drop_newest'`` — новый блок отбрасывается;
+    * ``'coalesce'`` — все ожидающие блоки и новый склеиваются в один, данные не теряются.
+
+    Число отброшенных сэмплов доступно в ``dropped_samples``. Каждый блок
+    помечается номером ``generation`` источника на момент чтения; блоки разных
+    поколений не склеиваются.
+
+    :param source: Открытый источник данных
+    :param queue_size: Максимальное число блоков в очереди
+    :param policy: Политика при переполнении
+    :param pull_timeout: Время ожидания данных в одном вызове pull_chunk в секундах
+    """
+
+    def __init__(self, source: SampleSource, queue_size: int = 64, policy: str = 'coalesce',
+                 pull_timeout: float = 0.1):
+        if policy not in POLICIES:
+            raise ValueError(f"Неизвестная политика очереди: {policy}")
+        self.__source = source
+        self.__queue_size = queue_size
+        self.__policy = policy
+        self.__pull_timeout = pull_timeout
+        self.__queue = deque()
+        self.__condition = threading.Condition()
+        self.__thread: Optional[threading.Thread] = None
+        self.__running = False
+        self.__source_done = False
+        self.dropped_samples = 0
+
+    @property
+    def finished(self) -> bool:
+        """Источник исчерпан и все блоки из очереди отданы."""
+        with self.__condition:
+            return self.__source_done and not self.__queue
+
+    def start(self):
+        """
+        Запускает поток захвата.
+        """
+        if self.__thread is not None:
+            return
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__run, name="EEGAcquisition", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Останавливает поток захвата и ждёт его завершения.
+        """
+        if self.__thread is None:
+            return
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify_all()
+        self.__thread.join()
+        self.__thread = None
+
+    def get(self, timeout: float = 0.0) -> Optional[Tuple[np.ndarray, np.ndarray, int]]:
+        """
+        Забирает очередной блок из очереди.
+
+        :param timeout: Сколько секунд ждать блок; 0 — не ждать
+        :return: Тройка (сэмплы, временные метки, поколение источника) или None, если блока нет
+        """
+        with self.__condition:
+            if not self.__queue and timeout > 0 and not self.__source_done:
+                self.__condition.wait_for(lambda: self.__queue or self.__source_done, timeout)
+            if not self.__queue:
+                return None
+            chunk = self.__queue.popleft()
+            self.__condition.notify_all()
+            return chunk
+
+    def __run(self):
+        """
+        Цикл потока захвата.
+        """
+        source = self.__source
+        while self.__running:
+            samples, timestamps = source.pull_chunk(timeout=self.__pull_timeout)
+            if len(timestamps) == 0:
+                if source.exhausted:
+                    break
+                continue
+
+            # Копия: источник может вернуть представление своего буфера, а блок ждёт в очереди
+            chunk = (np.array(samples, dtype=float), np.array(timestamps, dtype=float), source.generation)
+            with self.__condition:
+                self.__enqueue(chunk)
+                self.__condition.notify_all()
+
+        with self.__condition:
+            self.__source_done = True
+            self.__condition.notify_all()
+
+    def __enqueue(self, chunk: Tuple[np.ndarray, np.ndarray, int]):
+        """
+        Кладёт блок в очередь по выбранной политике. Вызывается под блокировкой.
+
+        :param chunk: Тройка (сэмплы, временные метки, поколение источника)
+        """
+        queue = self.__queue
+        if len(queue) >= self.__queue_size:
+            if self.__policy == 'block':
+                self.__condition.wait_for(lambda: len(queue) < self.__queue_size or not self.__running)
+            elif self.__policy == 'drop_newest':
+                self.dropped_samples += len(chunk[1])
+                return
+            elif self.__policy == 'drop_oldest' or queue[0][2] != chunk[2]:
+                self.dropped_samples += len(queue.popleft()[1])
+            else:
+                pending = list(queue) + [chunk]
+                queue.clear()
+                chunk = (np.concatenate([c[0] for c in pending]), np.concatenate([c[1] for c in pending]), chunk[2])
+        queue.append(chunk)
@@ -1,63 +1,439 @@
 import time
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
 
-from pylsl import resolve_streams, StreamInlet
+import numpy as np
 from blink.blink_detector import BlinkDetector, BlinkDetectorListener
+from filter.preprocessing import Preprocessor
 from jaws.jaw_clench_detector import JawClenchDetector, JawClenchDetectorListener
+from processor.acquisition import AcquisitionThread
+from processor.execution import (EXECUTION_MODES, EXECUTION_PIPELINED, EXECUTION_SEQUENTIAL,
+                                  EXECUTION_THREADED, DeferredListener)
+from processor.instrumentation import (PipelineMetrics, TimedBlinkListener, TimedJawClenchListener,
+                                       TimedRhythmListener)
+from processor.publisher import (PublishingBlinkListener, PublishingJawClenchListener, PublishingRhythmListener,
+                                 ResultPublisher)
+from processor.sources import LSLSource, SampleSource
+from processor.timestamps import TimestampMonitor
+from recorder.session_recorder import (RecordingBlinkListener, RecordingJawClenchListener,
+                                       RecordingRhythmListener, SessionRecorder)
 from rhytm.rhytm_analyzer import RhythmAnalyzer, RhythmAnalyzerListener
 
 
 class EEGProcessor:
     """
-    Главный управляющий класс, получающий данные LSL и выполняющий обработку сигналов.
+    Главный управляющий класс, получающий данные из источника (LSL или записи) и выполняющий обработку сигналов.
 
     :param duration: Время выполнения в секундах. Если None — работает до Ctrl+C
+    :param source: Источник данных; по умолчанию — первый найденный поток LSL
+    :param recorder: Фоновая запись сырых блоков и событий; None — без записи
+    :param metrics: Инструментирование стадий и задержек событий; None — выключено
+    :param execution: Режим выполнения стадий:
+        'sequential' — по очереди в потоке step;
+        'threaded' — детекторы и анализатор ритмов параллельно в пуле потоков, step ждёт их завершения;
+        'pipelined' — у каждой стадии свой поток, и пока одна стадия обрабатывает блок k,
+        предыдущая уже обрабатывает блок k+1; события выдаются с задержкой до ``pipeline_depth`` блоков.
+        В любом режиме слушатели вызываются в потоке step после всех стадий блока в порядке:
+        моргания, сжатия, ритмы; поэтому время слушателей в метриках не входит во время стадий
+    :param pipeline_depth: Максимальное число блоков в обработке в режиме 'pipelined'
+    :param fs: Частота дискретизации в Гц; None — номинальная частота источника, а если
+        она неизвестна — DEFAULT_FS. Все стадии создаются под эту частоту в ``initialize_stream``
+    :param publisher: Публикация результатов для других процессов: разделяемая память
+        (SharedStreamPublisher), LSL или сокет (processor.outputs), несколько сразу
+        (PublisherGroup); None — без публикации
+    :param clench_method: Метод детекции сжатий челюсти: 'lowpass' — пороги амплитуды после ФНЧ,
+        'emg' — огибающая мышечной активности (см. JawClenchDetector)
+    :param streaming: Режим фильтра детекторов: True — причинный потоковый фильтр, O(1) на отсчёт;
+        False — ``filtfilt`` по окну для каждого отсчёта (исходное поведение детекторов)
+    :param max_gap: Наибольшее отклонение метки от сглаженных часов потока в секундах,
+        которое считается джиттером, а не разрывом (см. TimestampMonitor); разрывы и скачки
+        меток назад учитываются в ``timestamp_monitor``
+    :param rhythm_hop: Шаг между оценками ритмов в секундах; None — одна оценка на блок
+    :param rhythm_bands: Полосы RhythmAnalyzer: имя -> (нижняя, верхняя частота) в Гц; None — DEFAULT_BANDS
+    :param rhythm_channels: Каналы, анализируемые RhythmAnalyzer; None — все каналы
+    :param reset_on_gap: На разрыве или скачке меток назад делить блок и сбрасывать
+        состояние стадий, чтобы сигнал до и после потерянных сэмплов не склеивался
     """
 
+    DEFAULT_FS = 125
+
     def __init__(self, duration: Optional[float] = None,
              blink_listener: BlinkDetectorListener = None,
              clench_listener: JawClenchDetectorListener = None,
-             rhythm_listener: RhythmAnalyzerListener = None):
+             rhythm_listener: RhythmAnalyzerListener = None,
+             source: Optional[SampleSource] = None,
+             recorder: Optional[SessionRecorder] = None,
+             metrics: Optional[PipelineMetrics] = None,
+             execution: str = EXECUTION_SEQUENTIAL,
+             pipeline_depth: int = 2,
+             fs: Optional[float] = None,
+             publisher: Optional[ResultPublisher] = None,
+             clench_method: str = 'lowpass',
+             streaming: bool = False,
+             max_gap: float = 0.25,
+             reset_on_gap: bool = False,
+             rhythm_hop: Optional[float] = None,
+             rhythm_bands: Optional[Dict[str, Tuple[float, float]]] = None,
+             rhythm_channels: Optional[Sequence[int]] = None):
+        if execution not in EXECUTION_MODES:
+            raise ValueError(f"Неизвестный режим выполнения: {execution}")
         self.__duration = duration
-        self.__blink_detector = BlinkDetector()
-        self.__jaw_detector = JawClenchDetector()
-        self.__rhythm_analyzer = RhythmAnalyzer()
-        self.__stream = None
+        self.__fs = fs
+        self.__clench_method = clench_method
+        self.__streaming = streaming
+        self.__max_gap = max_gap
+        self.__reset_on_gap = reset_on_gap
+        self.__rhythm_hop = rhythm_hop
+        self.__rhythm_bands = rhythm_bands
+        self.__rhythm_channels = rhythm_channels
+        self.__timestamp_monitor: Optional[TimestampMonitor] = None
+        self.__blink_detector: Optional[BlinkDetector] = None
+        self.__jaw_detector: Optional[JawClenchDetector] = None
+        self.__rhythm_analyzer: Optional[RhythmAnalyzer] = None
+        self.__preprocessor: Optional[Preprocessor] = None
+        self.__source = LSLSource() if source is None else source
+        self.__recorder = recorder
+        self.__publisher = publisher
+
+        if publisher is not None:
+            blink_listener = PublishingBlinkListener(publisher, blink_listener)
+            clench_listener = PublishingJawClenchListener(publisher, clench_listener)
+            rhythm_listener = PublishingRhythmListener(publisher, rhythm_listener)
+
+        if recorder is not None:
+            blink_listener = RecordingBlinkListener(recorder, blink_listener)
+            clench_listener = RecordingJawClenchListener(recorder, clench_listener)
+            rhythm_listener = RecordingRhythmListener(recorder, rhythm_listener)
+
+        self.__metrics = metrics
+        if metrics is not None:
+            blink_listener = TimedBlinkListener(metrics, blink_listener)
+            clench_listener = TimedJawClenchListener(metrics, clench_listener)
+            rhythm_listener = TimedRhythmListener(metrics, rhythm_listener)
 
         self.__blink_listener = blink_listener
         self.__jaw_listener = clench_listener
         self.__rhythm_listener = rhythm_listener
 
+        self.__execution = execution
+        self.__pipeline_depth = pipeline_depth
+        self.__in_flight = deque()
+        self.__executors = {}
+        if execution == EXECUTION_THREADED:
+            self.__executors["pool"] = ThreadPoolExecutor(max_workers=3, thread_name_prefix="EEGStage")
+        elif execution == EXECUTION_PIPELINED:
+            for name in ("preprocess", "blink", "jaw", "rhythm"):
+                self.__executors[name] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"EEG-{name}")
+
+        self.__acquisition: Optional[AcquisitionThread] = None
+        self.__generation = 0
         self.__start_time = None
 
-    def initialize_stream(self):
-        print("Поиск потока LSL...")
-        streams = resolve_streams(wait_time=5)
+    @property
+    def metrics(self) -> Optional[PipelineMetrics]:
+        """Метрики конвейера, если инструментирование включено."""
+        return self.__metrics
+
+    @property
+    def fs(self) -> Optional[float]:
+        """Частота дискретизации, под которую настроены стадии; None до ``initialize_stream``."""
+        return self.__fs if self.__preprocessor is not None else None
 
-        if not streams:
-            print("Потоков не найдено.")
+    @property
+    def timestamp_monitor(self) -> Optional[TimestampMonitor]:
+        """Статистика разрывов и джиттера меток; None до ``initialize_stream``."""
+        return self.__timestamp_monitor
+
+    def initialize_stream(self):
+        if not self.__source.open():
             return False
 
-        self.__stream = StreamInlet(streams[0])
+        if self.__fs is None:
+            self.__fs = self.__source.nominal_srate or self.DEFAULT_FS
+        self.__build_stages(self.__fs)
+
+        if self.__recorder is not None:
+            self.__recorder.start()
+        if self.__publisher is not None:
+            hop = self.__rhythm_analyzer.hop
+            self.__publisher.configure_rhythms(self.__rhythm_analyzer.band_names, None if hop is None else 1 / hop)
+            self.__publisher.start()
+
         self.__start_time = time.time()
         print("Обработка EEG...")
         return True
 
-    def step(self) -> bool:
+    def start_acquisition(self, queue_size: int = 64, policy: str = 'coalesce', pull_timeout: float = 0.1):
+        """
+        Переносит чтение источника в отдельный поток захвата с ограниченной очередью.
+
+        После вызова ``step`` берёт блоки из очереди, а не из источника.
+        Вызывается после ``initialize_stream``.
+
+        :param queue_size: Максимальное число блоков в очереди
+        :param policy: Политика при переполнении: 'block', 'drop_oldest', 'drop_newest' или 'coalesce'
+        :param pull_timeout: Время ожидания данных в одном вызове pull_chunk в секундах
+        """
+        if self.__acquisition is not None:
+            return
+        self.__acquisition = AcquisitionThread(self.__source, queue_size, policy, pull_timeout)
+        self.__acquisition.start()
+
+    @property
+    def dropped_samples(self) -> int:
+        """Число сэмплов, отброшенных потоком захвата при переполнении очереди."""
+        return 0 if self.__acquisition is None else self.__acquisition.dropped_samples
+
+    def step(self, timeout: float = 0.0) -> bool:
         """
         Выполняет один шаг обработки: считывание и обработка блока сигналов.
 
+        :param timeout: Сколько секунд ждать блок, если данных ещё нет; 0 — не ждать
         :return: True, если можно продолжать; False — если нужно завершить
         """
         if self.__duration and (time.time() - self.__start_time >= self.__duration):
+            self.__complete(0)
             print("Обработка завершена.")
             return False
 
-        samples, timestamps = self.__stream.pull_chunk()
-        if not samples:
-            return True
+        acquisition = self.__acquisition
+        finished = acquisition.finished if acquisition is not None else self.__source.exhausted
+        if finished:
+            self.__complete(0)
+            print("Источник данных исчерпан.")
+            return False
+
+        metrics = self.__metrics
+        started = time.perf_counter() if metrics is not None else 0.0
+
+        if acquisition is not None:
+            chunk = acquisition.get(timeout)
+            if chunk is None:
+                return True
+            samples, timestamps, generation = chunk
+        else:
+            samples, timestamps = self.__source.pull_chunk(timeout=timeout)
+            if len(timestamps) == 0:
+                return True
+            generation = self.__source.generation
+
+        monitor = self.__timestamp_monitor
+        if generation != self.__generation:
+            self.__generation = generation
+            self.reset()
+            monitor.restart()
+
+        if metrics is not None:
+            started = metrics.stage("pull", started)
+
+        samples = np.asarray(samples)
+        timestamps = np.asarray(timestamps, dtype=float)
+        start = 0
+        breaks = monitor.check(timestamps)
+        if self.__reset_on_gap:
+            for stop in breaks:
+                if stop > start:
+                    started = self.__process(samples[start:stop], timestamps[start:stop], started)
+                self.reset()
+                start = stop
+        self.__process(samples[start:], timestamps[start:], started)
+        return True
+
+    def __process(self, samples: np.ndarray, timestamps: np.ndarray, started: float) -> float:
+        """
+        Обрабатывает непрерывный отрезок блока в выбранном режиме выполнения.
+
+        :param started: Момент начала текущей стадии для метрик
+        :return: Момент окончания обработки для метрик
+        """
+        metrics = self.__metrics
+        if self.__execution == EXECUTION_PIPELINED:
+            self.__process_pipelined(samples, timestamps)
+            return started
+
+        self.__register(samples, timestamps)
+        if self.__execution == EXECUTION_THREADED:
+            self.__process_threaded(samples, timestamps)
+            return started
+
+        # События копятся до конца стадий, чтобы время слушателей учитывалось только в "dispatch"
+        deferred = DeferredListener(), DeferredListener(), DeferredListener()
+        chunk = self.__preprocessor.process(samples, timestamps)
+        if metrics is not None:
+            started = metrics.stage("preprocess", started)
+
+        self.__blink_detector.detect_preprocessed(chunk, deferred[0])
+        if metrics is not None:
+            started = metrics.stage("blink", started)
+
+        self.__jaw_detector.detect_preprocessed(chunk, deferred[1])
+        if metrics is not None:
+            started = metrics.stage("jaw", started)
+
+        self.__rhythm_analyzer.analyze(samples, deferred[2], timestamps)
+        if metrics is not None:
+            metrics.stage("rhythm", started)
+
+        self.__publish(chunk)
+        self.__replay(deferred)
+        self.__flush()
+        return time.perf_counter() if metrics is not None else started
+
+    def __build_stages(self, fs: float):
+        """
+        Создаёт детекторы, анализатор ритмов и общую предобработку под частоту ``fs``.
+
+        Каждая стадия сама прореживает нужные ей каналы до своей рабочей частоты.
+        """
+        self.__blink_detector = BlinkDetector(fs=fs, streaming=self.__streaming)
+        self.__jaw_detector = JawClenchDetector(fs=fs, streaming=self.__streaming, method=self.__clench_method)
+        self.__rhythm_analyzer = RhythmAnalyzer(fs=fs, hop=self.__rhythm_hop, bands=self.__rhythm_bands,
+                                                channels=self.__rhythm_channels)
+        self.__preprocessor = Preprocessor(fs=fs)
+        self.__timestamp_monitor = TimestampMonitor(fs, self.__max_gap)
+        self.__preprocessor.require(self.__blink_detector.streams)
+        self.__preprocessor.require(self.__jaw_detector.streams)
+        if self.__publisher is not None:
+            self.__publisher.configure_streams(self.__blink_detector.streams)
+            self.__preprocessor.require(self.__publisher.streams)
+
+    def reset(self):
+        """
+        Сбрасывает накопленное состояние всех стадий, например после
+        переподключения источника: данные до и после разрыва не смешиваются.
+        События блоков, ещё находящихся в обработке, сначала выдаются слушателям.
+        """
+        self.__complete(0)
+        self.__preprocessor.reset()
+        self.__blink_detector.reset()
+        self.__jaw_detector.reset()
+        self.__rhythm_analyzer.reset()
+
+    def close(self):
+        """
+        Останавливает поток захвата и запись и освобождает источник данных.
+
+        Блоки, ещё находящиеся в обработке, дообрабатываются, и их события
+        передаются слушателям.
+        """
+        if self.__acquisition is not None:
+            self.__acquisition.stop()
+            self.__acquisition = None
+        self.__complete(0)
+        for executor in self.__executors.values():
+            executor.shutdown()
+        self.__executors = {}
+        if self.__recorder is not None:
+            self.__recorder.stop()
+        if self.__publisher is not None:
+            self.__publisher.stop()
+        self.__source.close()
 
-        self.__blink_detector.detect(samples, timestamps, self.__blink_listener)
-        self.__jaw_detector.detect(samples, timestamps, self.__jaw_listener)
-        self.__rhythm_analyzer.analyze(samples, self.__rhythm_listener)
-        return True
\ No newline at end of file
+    def __process_threaded(self, samples, timestamps):
+        """
+        Выполняет детекторы и анализатор ритмов над блоком параллельно и
+        передаёт их события слушателям после завершения всех стадий.
+        """
+        chunk = self.__timed("preprocess", self.__preprocessor.process, samples, timestamps)
+        pool = self.__executors["pool"]
+        deferred = DeferredListener(), DeferredListener(), DeferredListener()
+        futures = (
+            pool.submit(self.__timed, "blink", self.__blink_detector.detect_preprocessed, chunk, deferred[0]),
+            pool.submit(self.__timed, "jaw", self.__jaw_detector.detect_preprocessed, chunk, deferred[1]),
+            pool.submit(self.__timed, "rhythm", self.__rhythm_analyzer.analyze, samples, deferred[2], timestamps),
+        )
+        for future in futures:
+            future.result()
+        self.__publish(chunk)
+        self.__replay(deferred)
+        self.__flush()
+
+    def __process_pipelined(self, samples, timestamps):
+        """
+        Ставит блок в конвейер стадий и передаёт слушателям события уже
+        обработанных блоков.
+
+        Каждая стадия выполняется в своём единственном потоке, поэтому блоки
+        проходят её строго по порядку, а состояние стадии не требует блокировок.
+        Блок учитывается в записи и метриках непосредственно перед выдачей его
+        событий, чтобы оценки ритмов получали метку своего, а не более нового блока.
+        """
+        # Блок живёт дольше следующего чтения, а источник может вернуть представление своего буфера
+        samples = np.array(samples, dtype=float)
+        timestamps = np.array(timestamps, dtype=float)
+        executors = self.__executors
+        deferred = DeferredListener(), DeferredListener(), DeferredListener()
+        preprocessed = executors["preprocess"].submit(
+            self.__timed, "preprocess", self.__preprocessor.process, samples, timestamps)
+        futures = (
+            preprocessed,
+            executors["blink"].submit(lambda: self.__timed(
+                "blink", self.__blink_detector.detect_preprocessed, preprocessed.result(), deferred[0])),
+            executors["jaw"].submit(lambda: self.__timed(
+                "jaw", self.__jaw_detector.detect_preprocessed, preprocessed.result(), deferred[1])),
+            executors["rhythm"].submit(
+                self.__timed, "rhythm", self.__rhythm_analyzer.analyze, samples, deferred[2], timestamps),
+        )
+        self.__in_flight.append((samples, timestamps, futures, deferred))
+        self.__complete(self.__pipeline_depth)
+
+    def __complete(self, limit: int):
+        """
+        Передаёт слушателям события завершённых блоков в порядке поступления блоков.
+
+        :param limit: Сколько блоков может остаться в обработке; старшие блоки сверх него ожидаются
+        """
+        in_flight = self.__in_flight
+        while in_flight:
+            samples, timestamps, futures, deferred = in_flight[0]
+            if len(in_flight) <= limit and not all(future.done() for future in futures):
+                break
+            for future in futures:
+                future.result()
+            in_flight.popleft()
+            self.__register(samples, timestamps)
+            self.__publish(futures[0].result())
+            self.__replay(deferred)
+            self.__flush()
+
+    def __register(self, samples, timestamps):
+        """
+        Учитывает блок в метриках и передаёт его в запись сеанса.
+        """
+        if self.__metrics is not None:
+            self.__metrics.chunk(len(timestamps), timestamps[-1])
+        if self.__recorder is not None:
+            self.__recorder.record_chunk(samples, timestamps)
+
+    def __publish(self, chunk):
+        """
+        Публикует отфильтрованные каналы блока перед выдачей его событий.
+        """
+        if self.__publisher is not None:
+            self.__publisher.publish_chunk(chunk)
+
+    def __flush(self):
+        """
+        Сообщает публикатору, что все события блока выданы.
+        """
+        if self.__publisher is not None:
+            self.__publisher.flush()
+
+    def __replay(self, deferred):
+        """
+        Передаёт слушателям события одного блока: моргания, сжатия, ритмы.
+        """
+        deferred[0].replay(self.__blink_listener)
+        deferred[1].replay(self.__jaw_listener)
+        deferred[2].replay(self.__rhythm_listener)
+
+    def __timed(self, name: str, stage, *args):
+        """
+        Выполняет стадию и учитывает её длительность в метриках.
+        """
+        started = time.perf_counter()
+        result = stage(*args)
+        if self.__metrics is not None:
+            self.__metrics.stage(name, started)
+        return result
@@ -0,0 +1,68 @@
+from typing import List, Tuple
+
+from blink.blink_detector import BlinkDetectorListener, emit_blinks
+from jaws.jaw_clench_detector import JawClenchDetectorListener, emit_clenches
+from rhytm.rhytm_analyzer import RhythmListenerWrapper, emit_rhythms
+
+EXECUTION_SEQUENTIAL = "sequential"
+EXECUTION_THREADED = "threaded"
+EXECUTION_PIPELINED = "pipelined"
+EXECUTION_MODES = (EXECUTION_SEQUENTIAL, EXECUTION_THREADED, EXECUTION_PIPELINED)
+
+# Пакетные вызовы передаются слушателям без пакетных методов по одному событию
+_BATCH_EMITTERS = {"on_blinks": emit_blinks, "on_clenches": emit_clenches, "on_rhythms": emit_rhythms}
+
+
+class DeferredListener(BlinkDetectorListener, JawClenchDetectorListener, RhythmListenerWrapper):
+    """
+    Слушатель, запоминающий вызовы стадии до конца обработки блока.
+
+    Вызовы передаются настоящему слушателю методом ``replay`` в потоке
+    EEGProcessor, поэтому порядок событий не зависит от того, какая стадия
+    закончила работу раньше, а время слушателей не входит во время стадий.
+    Необязательные методы слушателя ритмов запоминаются через ``forward``
+    RhythmListenerWrapper.
+    """
+
+    def __init__(self):
+        super().__init__(None)
+        self.calls: List[Tuple[str, tuple]] = []
+
+    def on_blink(self, timestamp: float) -> None:
+        self.calls.append(("on_blink", (timestamp,)))
+
+    def on_clench(self, timestamp: float) -> None:
+        self.calls.append(("on_clench", (timestamp,)))
+
+    def on_blinks(self, timestamps) -> None:
+        self.calls.append(("on_blinks", (timestamps,)))
+
+    def on_clenches(self, timestamps) -> None:
+        self.calls.append(("on_clenches", (timestamps,)))
+
+    def on_rhythms(self, rhythms) -> None:
+        self.calls.append(("on_rhythms", (rhythms,)))
+
+    def forward(self, method: str, *args):
+        self.calls.append((method, args))
+
+    def replay(self, listener):
+        """
+        Передаёт запомненные вызовы слушателю в исходном порядке.
+
+        Необязательные методы, которых у слушателя нет, пропускаются; без
+        слушателя вызовы просто отбрасываются.
+
+        :param listener: Настоящий слушатель или ``None``
+        """
+        if listener is None:
+            self.calls = []
+            return
+        for name, args in self.calls:
+            if name in _BATCH_EMITTERS:
+                _BATCH_EMITTERS[name](listener, *args)
+                continue
+            method = getattr(listener, name, None)
+            if method is not None:
+                method(*args)
+        self.calls = []
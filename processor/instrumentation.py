@@ -0,0 +1,285 @@
+import bisect
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from pylsl import local_clock
+
+from blink.blink_detector import BlinkDetectorListener, emit_blinks
+from jaws.jaw_clench_detector import JawClenchDetectorListener, emit_clenches
+from rhytm.rhytm_analyzer import RhythmAnalyzerListener, RhythmListenerWrapper
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированным набором логарифмических корзин.
+
+    Память не зависит от числа наблюдений; перцентили оцениваются по
+    верхней границе корзины.
+
+    :param low: Верхняя граница первой корзины
+    :param high: Верхняя граница последней конечной корзины
+    :param buckets_per_decade: Число корзин на порядок величины
+    """
+
+    def __init__(self, low: float = 1e-6, high: float = 10.0, buckets_per_decade: int = 10):
+        decades = math.log10(high / low)
+        n = int(round(decades * buckets_per_decade))
+        self.bounds: List[float] = [low * 10 ** (i / buckets_per_decade) for i in range(n + 1)]
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        """
+        Учитывает одно наблюдение.
+
+        :param value: Значение наблюдения
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """
+        Оценивает перцентиль по корзинам.
+
+        :param q: Перцентиль от 0 до 100
+        :return: Верхняя граница корзины, содержащей перцентиль (не больше максимума); 0 без наблюдений
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает сводку гистограммы.
+        """
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class PipelineMetrics:
+    """
+    Инструментирование EEGProcessor: длительности стадий, размеры блоков и
+    задержка событий от временной метки сэмпла до вызова слушателя.
+
+    Все данные хранятся в гистограммах фиксированного размера. Задержка
+    событий считается по часам ``clock``, которые должны совпадать с часами
+    временных меток (для LSL — ``pylsl.local_clock``).
+
+    :param clock: Часы для расчёта задержки событий
+    """
+
+    STAGES = ("pull", "preprocess", "blink", "jaw", "rhythm", "dispatch")
+    EVENTS = ("blink", "clench", "rhythm")
+
+    def __init__(self, clock: Callable[[], float] = local_clock):
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.stages: Dict[str, Histogram] = {name: Histogram() for name in self.STAGES}
+        self.event_lag: Dict[str, Histogram] = {name: Histogram(1e-4, 100.0) for name in self.EVENTS}
+        self.chunk_sizes = Histogram(1, 1e5, 5)
+        self.last_timestamp: Optional[float] = None
+
+    def stage(self, name: str, started: float) -> float:
+        """
+        Учитывает длительность стадии, начавшейся в момент ``started``.
+
+        :param name: Имя стадии из STAGES
+        :param started: Момент начала по ``time.perf_counter``
+        :return: Текущий момент, удобный как начало следующей стадии
+        """
+        now = time.perf_counter()
+        with self.__lock:
+            self.stages[name].record(now - started)
+        return now
+
+    def chunk(self, size: int, last_timestamp: float):
+        """
+        Учитывает полученный блок.
+
+        :param size: Число сэмплов в блоке
+        :param last_timestamp: Временная метка последнего сэмпла
+        """
+        with self.__lock:
+            self.chunk_sizes.record(size)
+        self.last_timestamp = last_timestamp
+
+    def event(self, kind: str, timestamp: Optional[float] = None):
+        """
+        Учитывает задержку события в момент вызова слушателя.
+
+        :param kind: Тип события из EVENTS
+        :param timestamp: Временная метка события; None — метка последнего сэмпла блока
+        """
+        timestamp = self.last_timestamp if timestamp is None else timestamp
+        if timestamp is None:
+            return
+        lag = self.__clock() - timestamp
+        with self.__lock:
+            self.event_lag[kind].record(max(lag, 0.0))
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает сводку всех метрик.
+        """
+        with self.__lock:
+            return {
+                "stages": {name: h.snapshot() for name, h in self.stages.items()},
+                "event_lag": {name: h.snapshot() for name, h in self.event_lag.items()},
+                "chunk_sizes": self.chunk_sizes.snapshot(),
+            }
+
+    def to_prometheus(self, prefix: str = "eeg") -> str:
+        """
+        Формирует текстовое представление метрик в формате Prometheus.
+
+        :param prefix: Префикс имён метрик
+        :return: Текст для textfile-коллектора или HTTP-ответа
+        """
+        lines: List[str] = []
+        with self.__lock:
+            self.__histogram_lines(lines, f"{prefix}_stage_seconds", "stage", self.stages)
+            self.__histogram_lines(lines, f"{prefix}_event_lag_seconds", "event", self.event_lag)
+            self.__histogram_lines(lines, f"{prefix}_chunk_samples", None, {"": self.chunk_sizes})
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """
+        Записывает метрики в формате Prometheus в файл, заменяя его атомарно.
+
+        :param path: Путь к файлу
+        """
+        temporary = path + ".tmp"
+        with open(temporary, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(temporary, path)
+
+    def format_summary(self) -> str:
+        """
+        Формирует краткую человекочитаемую сводку.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for group in ("stages", "event_lag"):
+            for name, s in snapshot[group].items():
+                if s["count"]:
+                    lines.append(f"{group}.{name}: n={s['count']} p50={s['p50'] * 1e3:.3f} мс "
+                                 f"p99={s['p99'] * 1e3:.3f} мс max={s['max'] * 1e3:.3f} мс")
+        sizes = snapshot["chunk_sizes"]
+        lines.append(f"chunk_sizes: n={sizes['count']} mean={sizes['mean']:.1f} max={sizes['max']:.0f}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def __histogram_lines(lines: List[str], metric: str, label: Optional[str], histograms: Dict[str, Histogram]):
+        """
+        Добавляет строки одной гистограммной метрики Prometheus.
+        """
+        lines.append(f"# TYPE {metric} histogram")
+        for name, histogram in histograms.items():
+            labels = f'{label}="{name}",' if label else ""
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels}le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels}le="+Inf"}} {histogram.count}')
+            suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+            lines.append(f"{metric}_sum{suffix} {histogram.sum:.9g}")
+            lines.append(f"{metric}_count{suffix} {histogram.count}")
+
+
+class TimedBlinkListener(BlinkDetectorListener):
+    """
+    Измеряет задержку морганий и время их обработки слушателем.
+
+    :param metrics: Метрики конвейера
+    :param listener: Исходный слушатель; None — только метрики
+    """
+
+    def __init__(self, metrics: PipelineMetrics, listener: Optional[BlinkDetectorListener]):
+        self.__metrics = metrics
+        self.__listener = listener
+
+    def on_blink(self, timestamp: float) -> None:
+        self.__metrics.event("blink", timestamp)
+        started = time.perf_counter()
+        if self.__listener is not None:
+            self.__listener.on_blink(timestamp)
+        self.__metrics.stage("dispatch", started)
+
+    def on_blinks(self, timestamps) -> None:
+        for timestamp in timestamps:
+            self.__metrics.event("blink", float(timestamp))
+        started = time.perf_counter()
+        if self.__listener is not None:
+            emit_blinks(self.__listener, timestamps)
+        self.__metrics.stage("dispatch", started)
+
+
+class TimedJawClenchListener(JawClenchDetectorListener):
+    """
+    Измеряет задержку сжатий челюсти и время их обработки слушателем.
+
+    :param metrics: Метрики конвейера
+    :param listener: Исходный слушатель; None — только метрики
+    """
+
+    def __init__(self, metrics: PipelineMetrics, listener: Optional[JawClenchDetectorListener]):
+        self.__metrics = metrics
+        self.__listener = listener
+
+    def on_clench(self, timestamp: float) -> None:
+        self.__metrics.event("clench", timestamp)
+        started = time.perf_counter()
+        if self.__listener is not None:
+            self.__listener.on_clench(timestamp)
+        self.__metrics.stage("dispatch", started)
+
+    def on_clenches(self, timestamps) -> None:
+        for timestamp in timestamps:
+            self.__metrics.event("clench", float(timestamp))
+        started = time.perf_counter()
+        if self.__listener is not None:
+            emit_clenches(self.__listener, timestamps)
+        self.__metrics.stage("dispatch", started)
+
+
+class TimedRhythmListener(RhythmListenerWrapper):
+    """
+    Измеряет задержку оценок ритмов и время их обработки слушателем.
+
+    Временем оценки считается метка последнего сэмпла текущего блока.
+
+    :param metrics: Метрики конвейера
+    :param listener: Исходный слушатель; None — только метрики
+    """
+
+    def __init__(self, metrics: PipelineMetrics, listener: Optional[RhythmAnalyzerListener]):
+        super().__init__(listener)
+        self.__metrics = metrics
+
+    def on_rhythms(self, rhythms) -> None:
+        for _ in range(len(rhythms)):
+            self.__metrics.event("rhythm")
+        started = time.perf_counter()
+        self.forward_rhythms(rhythms)
+        self.__metrics.stage("dispatch", started)
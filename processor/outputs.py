@@ -0,0 +1,290 @@
+import os
+import socket
+import struct
+from typing import NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pylsl import IRREGULAR_RATE, StreamInfo, StreamOutlet
+
+from processor.publisher import ResultPublisher
+from recorder.session_recorder import EVENT_BLINK, EVENT_CLENCH
+from rhytm.rhytm_analyzer import band_rhythms
+from rhytm.spectral_plan import DEFAULT_BANDS
+
+EVENT_MARKERS = {EVENT_BLINK: "blink", EVENT_CLENCH: "clench"}
+RATIO_CHANNEL = "alpha_beta_ratio"
+
+# Заголовок сообщения: сигнатура, версия, номер сообщения, метка блока, число морганий, сжатий и оценок ритмов
+_MAGIC = b"EEGR"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHIdHHH")
+# Наибольшая полезная нагрузка датаграммы UDP
+MAX_DATAGRAM = 65507
+
+
+class ResultMessage(NamedTuple):
+    """
+    Результаты одного блока, полученные из сокета.
+
+    :param sequence: Номер сообщения; пропуск номера означает потерянную датаграмму
+    :param timestamp: Метка последнего сэмпла блока
+    :param blinks: Времена морганий
+    :param clenches: Времена сжатий челюсти
+    :param rhythms: Оценки ритмов (n × 3): альфа, бета, альфа/бета
+    :param rhythm_timestamps: Метка каждой оценки ритма
+    """
+    sequence: int
+    timestamp: float
+    blinks: np.ndarray
+    clenches: np.ndarray
+    rhythms: np.ndarray
+    rhythm_timestamps: np.ndarray
+
+
+def encode_results(sequence: int, timestamp: float, blinks: np.ndarray, clenches: np.ndarray,
+                   rhythms: np.ndarray, rhythm_timestamps: np.ndarray) -> bytes:
+    """
+    Упаковывает результаты блока в одно двоичное сообщение.
+
+    Формат (little-endian): заголовок ``<4sHIdHHH`` — сигнатура ``EEGR``,
+    версия, номер сообщения, метка блока и длины трёх массивов, — за которым
+    идут времена морганий, времена сжатий, оценки ритмов построчно и метки
+    оценок ритмов, все float64.
+
+    :return: Сообщение
+    """
+    blinks = np.ascontiguousarray(blinks, dtype="<f8")
+    clenches = np.ascontiguousarray(clenches, dtype="<f8")
+    rhythms = np.ascontiguousarray(rhythms, dtype="<f8").reshape(-1, 3)
+    rhythm_timestamps = np.ascontiguousarray(rhythm_timestamps, dtype="<f8")
+    if len(rhythm_timestamps) != len(rhythms):
+        raise ValueError("Число меток не совпадает с числом оценок ритмов")
+    header = _HEADER.pack(_MAGIC, _VERSION, sequence & 0xFFFFFFFF, timestamp,
+                          len(blinks), len(clenches), len(rhythms))
+    return b"".join((header, blinks.tobytes(), clenches.tobytes(), rhythms.tobytes(), rhythm_timestamps.tobytes()))
+
+
+def decode_results(data: bytes) -> ResultMessage:
+    """
+    Распаковывает сообщение encode_results.
+
+    :param data: Сообщение
+    :return: Результаты блока; массивы — представления сообщения без копирования
+    """
+    magic, version, sequence, timestamp, n_blinks, n_clenches, n_rhythms = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Неизвестный формат сообщения")
+    values = np.frombuffer(data, dtype="<f8", offset=_HEADER.size)
+    if len(values) != n_blinks + n_clenches + 4 * n_rhythms:
+        raise ValueError("Длина сообщения не совпадает с заголовком")
+    clenches_end = n_blinks + n_clenches
+    rhythms_end = clenches_end + 3 * n_rhythms
+    return ResultMessage(sequence, timestamp, values[:n_blinks], values[n_blinks:clenches_end],
+                         values[clenches_end:rhythms_end].reshape(n_rhythms, 3), values[rhythms_end:])
+
+
+def _datagram_socket(address) -> socket.socket:
+    """
+    Создаёт датаграммный сокет: UDP для пары (хост, порт), Unix для пути.
+    """
+    family = socket.AF_UNIX if isinstance(address, (str, bytes, os.PathLike)) else socket.AF_INET
+    return socket.socket(family, socket.SOCK_DGRAM)
+
+
+class SocketPublisher(ResultPublisher):
+    """
+    Отправляет результаты каждого блока одной датаграммой UDP или Unix-сокета.
+
+    События и оценки ритмов блока копятся до ``flush`` и упаковываются в
+    одно двоичное сообщение (encode_results), поэтому на блок приходится
+    один системный вызов, сколько бы событий в нём ни было. Блоки без
+    результатов не отправляются. Сокет неблокирующий: если получателя нет
+    или его буфер переполнен, сообщение отбрасывается и учитывается в
+    ``dropped_messages``, а обработка не ждёт. Каждая оценка ритма
+    передаётся с меткой последнего вошедшего в неё сэмпла.
+
+    :param address: Пара (хост, порт) для UDP или путь Unix-сокета получателя
+    """
+
+    def __init__(self, address: Union[Tuple[str, int], str]):
+        self.address = address
+        self.__socket: Optional[socket.socket] = None
+        self.__sequence = 0
+        self.__timestamp = np.nan
+        self.__blinks = []
+        self.__clenches = []
+        self.__rhythms = []
+        self.__rhythm_timestamps = []
+        self.sent_messages = 0
+        self.dropped_messages = 0
+
+    def start(self):
+        if self.__socket is None:
+            self.__socket = _datagram_socket(self.address)
+            self.__socket.setblocking(False)
+
+    def stop(self):
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
+
+    def publish_chunk(self, chunk):
+        if len(chunk.timestamps):
+            self.__timestamp = chunk.timestamps[-1]
+
+    def publish_events(self, kind: int, timestamps: np.ndarray):
+        (self.__blinks if kind == EVENT_BLINK else self.__clenches).append(timestamps)
+
+    def publish_rhythms(self, rhythms: np.ndarray):
+        # Оценки передаются из publish_band_estimates вместе с их метками
+        pass
+
+    def publish_band_estimates(self, timestamps: np.ndarray, band_powers: np.ndarray,
+                               band_names: Tuple[str, ...]):
+        if len(timestamps) == 0:
+            return
+        self.__rhythms.append(band_rhythms(band_powers, band_names))
+        self.__rhythm_timestamps.append(np.where(np.isnan(timestamps), self.__timestamp, timestamps))
+
+    def flush(self):
+        if not (self.__blinks or self.__clenches or self.__rhythms):
+            return
+        message = encode_results(
+            self.__sequence, self.__timestamp,
+            np.concatenate(self.__blinks) if self.__blinks else np.empty(0),
+            np.concatenate(self.__clenches) if self.__clenches else np.empty(0),
+            np.concatenate(self.__rhythms) if self.__rhythms else np.empty((0, 3)),
+            np.concatenate(self.__rhythm_timestamps) if self.__rhythm_timestamps else np.empty(0))
+        self.__blinks = []
+        self.__clenches = []
+        self.__rhythms = []
+        self.__rhythm_timestamps = []
+        self.__sequence += 1
+        if self.__socket is None:
+            return
+        try:
+            self.__socket.sendto(message, self.address)
+            self.sent_messages += 1
+        except OSError:
+            # Нет получателя, переполнен буфер или слишком длинное сообщение
+            self.dropped_messages += 1
+
+
+class SocketReceiver:
+    """
+    Получатель сообщений SocketPublisher, например для приложения-потребителя или проверки.
+
+    :param address: Пара (хост, порт) для UDP или путь Unix-сокета, на котором слушать
+    """
+
+    def __init__(self, address: Union[Tuple[str, int], str]):
+        self.__socket = _datagram_socket(address)
+        if self.__socket.family == socket.AF_UNIX and os.path.exists(address):
+            os.unlink(address)
+        self.__socket.bind(address)
+        self.address = self.__socket.getsockname()
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[ResultMessage]:
+        """
+        Ждёт и распаковывает одно сообщение.
+
+        :param timeout: Время ожидания в секундах; 0 — не ждать; None — ждать без ограничения
+        :return: Результаты блока или None, если за время ожидания сообщений не было
+        """
+        self.__socket.settimeout(timeout)
+        try:
+            data = self.__socket.recv(MAX_DATAGRAM)
+        except (socket.timeout, BlockingIOError):
+            # При нулевом времени ожидания сокет неблокирующий и сообщает об отсутствии данных BlockingIOError
+            return None
+        return decode_results(data)
+
+    def close(self):
+        """
+        Закрывает сокет; файл Unix-сокета удаляется.
+        """
+        unix_path = self.address if self.__socket.family == socket.AF_UNIX else None
+        self.__socket.close()
+        if unix_path and os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+
+class LSLOutletPublisher(ResultPublisher):
+    """
+    Публикует результаты как потоки LSL для внешних приложений.
+
+    Оценки ритмов идут в поток ``<name>-BandPowers`` типа "BandPowers"
+    (float32): по каналу на каждую настроенную полосу RhythmAnalyzer и канал
+    alpha_beta_ratio. Поток регулярный с частотой ``1 / hop``, если у
+    анализатора задан шаг, и нерегулярный, если оценка выполняется на
+    каждый блок. События идут в нерегулярный поток маркеров
+    ``<name>-Markers`` типа "Markers" со строками "blink" и "clench". Всё,
+    что пришло за блок, передаётся одним вызовом push_chunk на поток.
+
+    Каждая оценка ритма получает свою метку — метку последнего вошедшего в
+    неё сэмпла; события — метки самих событий.
+
+    :param name: Префикс имён потоков
+    :param source_id: Идентификатор источника для потоков; по умолчанию — по имени
+    """
+
+    def __init__(self, name: str = "EEGResults", source_id: Optional[str] = None):
+        self.name = name
+        self.__source_id = name if source_id is None else source_id
+        self.__band_names: Tuple[str, ...] = tuple(DEFAULT_BANDS)
+        self.__band_rate: Optional[float] = None
+        self.__bands: Optional[StreamOutlet] = None
+        self.__markers: Optional[StreamOutlet] = None
+        self.__timestamp = 0.0
+
+    @property
+    def channels(self) -> Tuple[str, ...]:
+        """Метки каналов потока ``<name>-BandPowers``."""
+        return self.__band_names + (RATIO_CHANNEL,)
+
+    def configure_rhythms(self, band_names: Sequence[str], rate: Optional[float]):
+        self.__band_names = tuple(band_names)
+        self.__band_rate = rate
+
+    def start(self):
+        if self.__bands is not None:
+            return
+        rate = IRREGULAR_RATE if self.__band_rate is None else self.__band_rate
+        info = StreamInfo(f"{self.name}-BandPowers", "BandPowers", len(self.channels), rate,
+                          "float32", f"{self.__source_id}-bands")
+        channels = info.desc().append_child("channels")
+        for label in self.channels:
+            channels.append_child("channel").append_child_value("label", label)
+        self.__bands = StreamOutlet(info)
+        self.__markers = StreamOutlet(StreamInfo(f"{self.name}-Markers", "Markers", 1, IRREGULAR_RATE,
+                                                 "string", f"{self.__source_id}-markers"))
+
+    def stop(self):
+        self.__bands = None
+        self.__markers = None
+
+    def publish_chunk(self, chunk):
+        if len(chunk.timestamps):
+            self.__timestamp = float(chunk.timestamps[-1])
+
+    def publish_events(self, kind: int, timestamps: np.ndarray):
+        if self.__markers is None or len(timestamps) == 0:
+            return
+        marker = EVENT_MARKERS[kind]
+        self.__markers.push_chunk([[marker]] * len(timestamps), timestamps.tolist())
+
+    def publish_rhythms(self, rhythms: np.ndarray):
+        # Оценки публикуются в publish_band_estimates вместе со всеми полосами и метками
+        pass
+
+    def publish_band_estimates(self, timestamps: np.ndarray, band_powers: np.ndarray,
+                               band_names: Tuple[str, ...]):
+        if self.__bands is None or len(timestamps) == 0:
+            return
+        if tuple(band_names) != self.__band_names:
+            raise ValueError(f"Полосы {band_names} не совпадают с каналами потока {self.__band_names}")
+        ratio = band_rhythms(band_powers, band_names)[:, 2]
+        values = np.column_stack((band_powers, ratio)).astype(np.float32)
+        # Оценки без меток получают метку последнего сэмпла блока
+        stamps = np.where(np.isnan(timestamps), self.__timestamp, timestamps)
+        self.__bands.push_chunk(values, stamps.tolist())
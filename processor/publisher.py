@@ -0,0 +1,475 @@
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from blink.blink_detector import BlinkDetectorListener, emit_blinks
+from buffer.shared_ring import SharedRingBuffer, SharedRingReader
+from filter.preprocessing import FilteredStreamSpec, PreprocessedChunk
+from jaws.jaw_clench_detector import JawClenchDetectorListener, emit_clenches
+from recorder.session_recorder import EVENT_BLINK, EVENT_CLENCH
+from rhytm.rhytm_analyzer import RhythmAnalyzerListener, RhythmListenerWrapper, band_rhythms, emit_rhythms
+
+STREAM_FILTERED = "filtered"
+STREAM_RHYTHMS = "rhythms"
+STREAM_EVENTS = "events"
+
+RHYTHM_COLUMNS = ("timestamp", "alpha", "beta", "alpha_beta_ratio")
+EVENT_COLUMNS = ("timestamp", "kind")
+
+
+def segment_name(prefix: str, stream: str) -> str:
+    """
+    Возвращает имя сегмента разделяемой памяти для потока публикатора.
+
+    :param prefix: Общий префикс публикатора
+    :param stream: STREAM_FILTERED, STREAM_RHYTHMS или STREAM_EVENTS
+    """
+    return f"{prefix}_{stream}"
+
+
+def shared_prefix_arg(argv: Sequence[str]) -> Optional[str]:
+    """
+    Разбирает ключ командной строки ``--shared [префикс]`` мониторов и GUI.
+
+    :param argv: Аргументы командной строки
+    :return: Префикс публикатора, "eeg" без явного префикса; None, если ключа нет
+    """
+    if "--shared" not in argv:
+        return None
+    args = list(argv[list(argv).index("--shared") + 1:])
+    return args[0] if args and not args[0].startswith("-") else "eeg"
+
+
+class ResultPublisher(ABC):
+    """
+    Выход результатов EEGProcessor за пределы процесса.
+
+    EEGProcessor вызывает методы в потоке step для каждого блока в порядке:
+    ``publish_chunk``, затем ``publish_events``, ``publish_rhythms`` и
+    ``publish_band_estimates`` для его событий, затем ``flush``. Поэтому всё,
+    что относится к одному блоку, можно отправить одним сообщением.
+    """
+
+    @property
+    def streams(self) -> List[FilteredStreamSpec]:
+        """Отфильтрованные потоки, которые нужно зарегистрировать в Preprocessor."""
+        return []
+
+    def configure_streams(self, defaults: Sequence[FilteredStreamSpec]):
+        """
+        Сообщает потоки детектора морганий, которые уже фильтруются общей
+        предобработкой; вызывается из ``initialize_stream`` перед чтением
+        ``streams``. Необязательный метод.
+
+        :param defaults: Потоки детектора морганий под частоту источника
+        """
+        pass
+
+    def configure_rhythms(self, band_names: Sequence[str], rate: Optional[float]):
+        """
+        Сообщает формат оценок ритмов; вызывается из ``initialize_stream`` перед ``start``.
+        Необязательный метод.
+
+        :param band_names: Имена полос в порядке столбцов ``publish_band_estimates``
+        :param rate: Частота оценок в Гц; None — оценки нерегулярны (одна на блок)
+        """
+        pass
+
+    def start(self):
+        """
+        Открывает выход; вызывается из ``initialize_stream``.
+        """
+        pass
+
+    def stop(self):
+        """
+        Закрывает выход; вызывается из ``close``.
+        """
+        pass
+
+    def publish_chunk(self, chunk: PreprocessedChunk):
+        """
+        Начинает блок. Необязательный метод.
+
+        :param chunk: Результат Preprocessor.process с потоками из ``streams``
+        """
+        pass
+
+    @abstractmethod
+    def publish_events(self, kind: int, timestamps: np.ndarray):
+        """
+        Публикует события одного вида.
+
+        :param kind: EVENT_BLINK или EVENT_CLENCH
+        :param timestamps: Времена событий
+        """
+        pass
+
+    @abstractmethod
+    def publish_rhythms(self, rhythms: np.ndarray):
+        """
+        Публикует оценки ритмов.
+
+        :param rhythms: Массив (n × 3): альфа, бета, альфа/бета
+        """
+        pass
+
+    def publish_band_estimates(self, timestamps: np.ndarray, band_powers: np.ndarray,
+                               band_names: Tuple[str, ...]):
+        """
+        Публикует мощности всех полос опорного канала с меткой каждой оценки.
+        Необязательный метод.
+
+        :param timestamps: Метки оценок
+        :param band_powers: Матрица (n × число полос)
+        :param band_names: Имена полос в порядке столбцов
+        """
+        pass
+
+    def flush(self):
+        """
+        Завершает блок: все его события уже опубликованы. Необязательный метод.
+        """
+        pass
+
+
+class PublisherGroup(ResultPublisher):
+    """
+    Передаёт результаты сразу нескольким выходам.
+
+    :param publishers: Выходы
+    """
+
+    def __init__(self, publishers: Sequence[ResultPublisher]):
+        self.__publishers = list(publishers)
+
+    @property
+    def streams(self) -> List[FilteredStreamSpec]:
+        return [spec for publisher in self.__publishers for spec in publisher.streams]
+
+    def configure_streams(self, defaults: Sequence[FilteredStreamSpec]):
+        for publisher in self.__publishers:
+            publisher.configure_streams(defaults)
+
+    def configure_rhythms(self, band_names: Sequence[str], rate: Optional[float]):
+        for publisher in self.__publishers:
+            publisher.configure_rhythms(band_names, rate)
+
+    def start(self):
+        for publisher in self.__publishers:
+            publisher.start()
+
+    def stop(self):
+        for publisher in self.__publishers:
+            publisher.stop()
+
+    def publish_chunk(self, chunk: PreprocessedChunk):
+        for publisher in self.__publishers:
+            publisher.publish_chunk(chunk)
+
+    def publish_events(self, kind: int, timestamps: np.ndarray):
+        for publisher in self.__publishers:
+            publisher.publish_events(kind, timestamps)
+
+    def publish_rhythms(self, rhythms: np.ndarray):
+        for publisher in self.__publishers:
+            publisher.publish_rhythms(rhythms)
+
+    def publish_band_estimates(self, timestamps: np.ndarray, band_powers: np.ndarray,
+                               band_names: Tuple[str, ...]):
+        for publisher in self.__publishers:
+            publisher.publish_band_estimates(timestamps, band_powers, band_names)
+
+    def flush(self):
+        for publisher in self.__publishers:
+            publisher.flush()
+
+
+class SharedStreamPublisher(ResultPublisher):
+    """
+    Публикует результаты EEGProcessor в кольцевые буферы разделяемой памяти.
+
+    Один процесс обработки пишет три потока: отфильтрованные каналы
+    (метка времени и по столбцу на поток Preprocessor), оценки ритмов
+    (метка, альфа, бета, альфа/бета) и события (метка и код EVENT_BLINK или
+    EVENT_CLENCH). Любое число локальных процессов читает их через
+    SharedStreamReader без повторной обработки. Запись не ждёт читателей.
+
+    Каждая оценка ритма получает свою метку — метку последнего вошедшего в
+    неё сэмпла (``publish_band_estimates``).
+
+    :param prefix: Префикс имён сегментов разделяемой памяти
+    :param streams: Публикуемые отфильтрованные потоки с одинаковым прореживанием;
+        по умолчанию F3/F4 после ФНЧ 10 Гц — те же потоки, что у детектора
+        морганий EEGProcessor (с его прореживанием и режимом фильтра), поэтому
+        они не фильтруются повторно
+    :param filtered_capacity: Ёмкость буфера отфильтрованных каналов в отсчётах
+    :param rhythm_capacity: Ёмкость буфера оценок ритмов
+    :param event_capacity: Ёмкость буфера событий
+    """
+
+    def __init__(self, prefix: str = "eeg", streams: Optional[Sequence[FilteredStreamSpec]] = None,
+                 filtered_capacity: int = 1 << 15, rhythm_capacity: int = 4096, event_capacity: int = 4096):
+        self.prefix = prefix
+        self.__default_streams = streams is None
+        self.__streams = self.__checked([FilteredStreamSpec(3), FilteredStreamSpec(4)] if streams is None
+                                        else streams)
+        self.__capacities = {STREAM_FILTERED: filtered_capacity, STREAM_RHYTHMS: rhythm_capacity,
+                             STREAM_EVENTS: event_capacity}
+        self.__rings = {}
+        self.__last_timestamp = np.nan
+
+    @property
+    def streams(self) -> List[FilteredStreamSpec]:
+        """Отфильтрованные потоки, которые нужно зарегистрировать в Preprocessor."""
+        return list(self.__streams)
+
+    def configure_streams(self, defaults: Sequence[FilteredStreamSpec]):
+        """
+        Публикует потоки детектора морганий, если потоки не заданы явно.
+
+        :param defaults: Потоки детектора морганий под частоту источника
+        """
+        if self.__default_streams and not self.__rings:
+            self.__streams = self.__checked(defaults)
+
+    @staticmethod
+    def __checked(streams: Sequence[FilteredStreamSpec]) -> List[FilteredStreamSpec]:
+        """
+        Проверяет, что потоки можно публиковать в один буфер.
+        """
+        streams = list(streams)
+        if not streams:
+            raise ValueError("Нужен хотя бы один публикуемый поток")
+        if len({spec.decimation for spec in streams}) > 1:
+            raise ValueError("Публикуемые потоки должны иметь одинаковое прореживание")
+        return streams
+
+    def start(self):
+        """
+        Создаёт сегменты разделяемой памяти.
+        """
+        if self.__rings:
+            return
+        columns = {
+            STREAM_FILTERED: ["timestamp"] + [f"ch{spec.channel}" for spec in self.__streams],
+            STREAM_RHYTHMS: RHYTHM_COLUMNS,
+            STREAM_EVENTS: EVENT_COLUMNS,
+        }
+        for stream, capacity in self.__capacities.items():
+            self.__rings[stream] = SharedRingBuffer(segment_name(self.prefix, stream), columns[stream], capacity)
+
+    def stop(self):
+        """
+        Сообщает читателям о завершении и удаляет сегменты.
+        """
+        for ring in self.__rings.values():
+            ring.close()
+        self.__rings = {}
+
+    def publish_chunk(self, chunk: PreprocessedChunk):
+        """
+        Публикует отфильтрованные каналы блока.
+
+        :param chunk: Результат Preprocessor.process с потоками из ``streams``
+        """
+        timestamps = chunk.timestamps_for(self.__streams[0])
+        if len(chunk.timestamps):
+            self.__last_timestamp = chunk.timestamps[-1]
+        if self.__rings and len(timestamps):
+            rows = np.column_stack([timestamps] + [chunk.get(spec) for spec in self.__streams])
+            self.__rings[STREAM_FILTERED].write(rows)
+
+    def publish_events(self, kind: int, timestamps: np.ndarray):
+        """
+        Публикует события одного вида.
+
+        :param kind: EVENT_BLINK или EVENT_CLENCH
+        :param timestamps: Времена событий
+        """
+        if self.__rings and len(timestamps):
+            rows = np.column_stack((timestamps, np.full(len(timestamps), kind, dtype=float)))
+            self.__rings[STREAM_EVENTS].write(rows)
+
+    def publish_rhythms(self, rhythms: np.ndarray):
+        """
+        Ничего не делает: оценки публикуются с их метками в ``publish_band_estimates``.
+        """
+        pass
+
+    def publish_band_estimates(self, timestamps: np.ndarray, band_powers: np.ndarray,
+                               band_names: Tuple[str, ...]):
+        """
+        Публикует оценки ритмов с меткой каждой оценки.
+
+        :param timestamps: Метки оценок; NaN — метка последнего сэмпла блока
+        :param band_powers: Матрица (n × число полос)
+        :param band_names: Имена полос в порядке столбцов
+        """
+        if self.__rings and len(timestamps):
+            stamps = np.where(np.isnan(timestamps), self.__last_timestamp, timestamps)
+            rows = np.column_stack((stamps, band_rhythms(band_powers, band_names)))
+            self.__rings[STREAM_RHYTHMS].write(rows)
+
+
+class PublishingBlinkListener(BlinkDetectorListener):
+    """
+    Публикует моргания и передаёт их исходному слушателю.
+
+    :param publisher: Публикатор
+    :param listener: Исходный слушатель; None — только публикация
+    """
+
+    def __init__(self, publisher: ResultPublisher, listener: Optional[BlinkDetectorListener]):
+        self.__publisher = publisher
+        self.__listener = listener
+
+    def on_blink(self, timestamp: float) -> None:
+        self.on_blinks(np.array([timestamp]))
+
+    def on_blinks(self, timestamps) -> None:
+        self.__publisher.publish_events(EVENT_BLINK, timestamps)
+        if self.__listener is not None:
+            emit_blinks(self.__listener, timestamps)
+
+
+class PublishingJawClenchListener(JawClenchDetectorListener):
+    """
+    Публикует сжатия челюсти и передаёт их исходному слушателю.
+
+    :param publisher: Публикатор
+    :param listener: Исходный слушатель; None — только публикация
+    """
+
+    def __init__(self, publisher: ResultPublisher, listener: Optional[JawClenchDetectorListener]):
+        self.__publisher = publisher
+        self.__listener = listener
+
+    def on_clench(self, timestamp: float) -> None:
+        self.on_clenches(np.array([timestamp]))
+
+    def on_clenches(self, timestamps) -> None:
+        self.__publisher.publish_events(EVENT_CLENCH, timestamps)
+        if self.__listener is not None:
+            emit_clenches(self.__listener, timestamps)
+
+
+class PublishingRhythmListener(RhythmListenerWrapper):
+    """
+    Публикует оценки ритмов и передаёт их исходному слушателю.
+
+    :param publisher: Публикатор
+    :param listener: Исходный слушатель; None — только публикация
+    """
+
+    def __init__(self, publisher: ResultPublisher, listener: Optional[RhythmAnalyzerListener]):
+        super().__init__(listener)
+        self.__publisher = publisher
+
+    def on_rhythms(self, rhythms) -> None:
+        self.__publisher.publish_rhythms(rhythms)
+        self.forward_rhythms(rhythms)
+
+    def on_band_estimates(self, timestamps, band_powers, band_names) -> None:
+        self.__publisher.publish_band_estimates(timestamps, band_powers, band_names)
+        self.forward("on_band_estimates", timestamps, band_powers, band_names)
+
+
+class SharedStreamReader:
+    """
+    Читатель результатов SharedStreamPublisher из другого процесса.
+
+    Повторяет интерфейс EEGProcessor (``initialize_stream``, ``step``,
+    ``close``), поэтому GUI и консольный вывод работают с ним так же, как с
+    собственной обработкой: события и оценки ритмов передаются тем же
+    слушателям пакетами. Отфильтрованные каналы доступны без копирования
+    через ``filtered``. Читаются только данные, опубликованные после подключения.
+
+    :param prefix: Префикс имён сегментов публикатора
+    :param blink_listener: Слушатель морганий
+    :param clench_listener: Слушатель сжатий челюсти
+    :param rhythm_listener: Слушатель ритмов
+    :param wait_time: Сколько секунд ждать запуска публикатора
+    :param poll_interval: Период опроса буферов при ожидании данных в секундах
+    """
+
+    def __init__(self, prefix: str = "eeg",
+                 blink_listener: Optional[BlinkDetectorListener] = None,
+                 clench_listener: Optional[JawClenchDetectorListener] = None,
+                 rhythm_listener: Optional[RhythmAnalyzerListener] = None,
+                 wait_time: float = 5.0, poll_interval: float = 0.01):
+        self.prefix = prefix
+        self.__blink_listener = blink_listener
+        self.__jaw_listener = clench_listener
+        self.__rhythm_listener = rhythm_listener
+        self.__wait_time = wait_time
+        self.__poll_interval = poll_interval
+        self.__rings = {}
+
+    @property
+    def filtered(self) -> Optional[SharedRingReader]:
+        """Буфер отфильтрованных каналов; None до ``initialize_stream``."""
+        return self.__rings.get(STREAM_FILTERED)
+
+    def initialize_stream(self) -> bool:
+        """
+        Подключается к сегментам публикатора.
+
+        :return: True, если публикатор найден
+        """
+        print("Подключение к публикатору...")
+        try:
+            for stream in (STREAM_FILTERED, STREAM_RHYTHMS, STREAM_EVENTS):
+                ring = SharedRingReader(segment_name(self.prefix, stream), self.__wait_time)
+                ring.seek_latest()
+                self.__rings[stream] = ring
+        except FileNotFoundError:
+            print("Публикатор не найден.")
+            self.close()
+            return False
+        return True
+
+    def start_acquisition(self, *args, **kwargs):
+        """
+        Ничего не делает: данные уже получены процессом-публикатором.
+        Оставлен для совместимости с EEGProcessor.
+        """
+        pass
+
+    def step(self, timeout: float = 0.0) -> bool:
+        """
+        Передаёт слушателям события и оценки ритмов, опубликованные с прошлого шага.
+
+        :param timeout: Сколько секунд ждать новые данные; 0 — не ждать
+        :return: True, если можно продолжать; False — если публикатор завершил работу
+        """
+        events = self.__rings[STREAM_EVENTS]
+        rhythms = self.__rings[STREAM_RHYTHMS]
+        deadline = time.monotonic() + timeout
+        while events.sequence == events.cursor and rhythms.sequence == rhythms.cursor:
+            if events.closed:
+                print("Публикатор завершил работу.")
+                return False
+            if time.monotonic() >= deadline:
+                return True
+            time.sleep(self.__poll_interval)
+
+        rows, _ = events.read()
+        if self.__blink_listener is not None:
+            emit_blinks(self.__blink_listener, rows[rows[:, 1] == EVENT_BLINK, 0])
+        if self.__jaw_listener is not None:
+            emit_clenches(self.__jaw_listener, rows[rows[:, 1] == EVENT_CLENCH, 0])
+        rows, _ = rhythms.read()
+        if self.__rhythm_listener is not None:
+            emit_rhythms(self.__rhythm_listener, rows[:, 1:])
+        return True
+
+    def close(self):
+        """
+        Отключается от сегментов публикатора.
+        """
+        for ring in self.__rings.values():
+            ring.close()
+        self.__rings = {}
@@ -0,0 +1,384 @@
+import inspect
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from pylsl import resolve_bypred, resolve_streams, StreamInfo, StreamInlet
+
+try:
+    from pylsl import LostError
+except ImportError:
+    from pylsl.util import LostError
+
+# Старые версии pylsl не умеют возвращать метки массивом numpy, тогда они приходят списком
+_NUMPY_PULL = {"as_numpy": True} if "as_numpy" in inspect.signature(StreamInlet.pull_chunk).parameters else {}
+
+
+class SampleSource(ABC):
+    """
+    Интерфейс источника блоков EEG-сэмплов для EEGProcessor.
+    """
+
+    @abstractmethod
+    def open(self) -> bool:
+        """
+        Подключается к источнику.
+
+        :return: True, если источник готов отдавать данные
+        """
+        pass
+
+    @abstractmethod
+    def pull_chunk(self, timeout: float = 0.0) -> Tuple[Sequence, Sequence]:
+        """
+        Возвращает очередной блок данных.
+
+        Возвращаемые массивы могут быть представлениями внутренних буферов
+        источника, действительными только до следующего вызова: сохраняющий
+        блок дольше должен его скопировать.
+
+        :param timeout: Сколько секунд ждать первых данных; 0 — не ждать
+        :return: Сэмплы (n_samples × n_channels) и их временные метки; пустой блок, если данных пока нет
+        """
+        pass
+
+    @property
+    def exhausted(self) -> bool:
+        """Источник закончился и новых данных не будет."""
+        return False
+
+    @property
+    def nominal_srate(self) -> Optional[float]:
+        """Номинальная частота дискретизации в Гц после open(); None, если неизвестна."""
+        return None
+
+    @property
+    def generation(self) -> int:
+        """
+        Номер непрерывного отрезка данных. Увеличивается, когда источник
+        переподключился и данные идут после разрыва, — накопленное
+        состояние обработки к ним не относится.
+        """
+        return 0
+
+    def close(self):
+        """
+        Освобождает ресурсы источника.
+        """
+        pass
+
+
+class LSLSource(SampleSource):
+    """
+    Живой поток LSL.
+
+    Поток выбирается по имени, типу и ``source_id`` (заданные условия
+    объединяются через «и»), и поиск завершается, как только подходящий
+    поток найден. Без условий берётся первый найденный поток.
+
+    Если задан ``cache_path``, описание подключённого потока сохраняется в
+    JSON-файл, и при следующем запуске сначала коротко ищется именно этот
+    поток, так что перезапуск почти не тратит времени на поиск.
+
+    Обрыв соединения или отсутствие данных дольше ``stall_timeout`` считается
+    потерей потока. Тот же поток ищется заново в фоновом потоке, а
+    ``pull_chunk`` тем временем возвращает пустые блоки, не задерживая
+    обработку дольше своего ``timeout``. После переподключения увеличивается
+    ``generation``, и конвейер сбрасывает накопленное состояние.
+
+    Сэмплы читаются напрямую в предвыделенный массив numpy на ``max_samples``
+    сэмплов в формате потока, без создания объектов Python на каждый сэмпл;
+    ``pull_chunk`` возвращает представление этого массива, которое
+    перезаписывается следующим вызовом.
+
+    :param wait_time: Время поиска потоков в секундах
+    :param name: Имя потока
+    :param stream_type: Тип потока, например 'EEG'
+    :param source_id: Идентификатор источника
+    :param cache_path: JSON-файл для описания последнего подключённого потока; None — не запоминать
+    :param stall_timeout: Время без данных, после которого поток считается потерянным; None — не проверять
+    :param reconnect: Переподключаться при потере потока; иначе источник считается исчерпанным
+    :param max_samples: Наибольшее число сэмплов в одном блоке
+    """
+
+    CACHE_WAIT = 0.5
+
+    def __init__(self, wait_time: float = 5, name: Optional[str] = None, stream_type: Optional[str] = None,
+                 source_id: Optional[str] = None, cache_path: Optional[str] = None,
+                 stall_timeout: Optional[float] = 5.0, reconnect: bool = True, max_samples: int = 1024):
+        self.__wait_time = wait_time
+        self.__query = _predicate(name=name, type=stream_type, source_id=source_id)
+        self.__cache_path = cache_path
+        self.__stall_timeout = stall_timeout
+        self.__reconnect = reconnect
+        self.__max_samples = max_samples
+        self.__inlet: Optional[StreamInlet] = None
+        self.__buffer: Optional[np.ndarray] = None
+        self.__nominal_srate: Optional[float] = None
+        self.__identity: Optional[str] = None
+        self.__last_data = 0.0
+        self.__generation = 0
+        self.__lost = False
+        self.__closed = False
+        self.__connected = threading.Event()
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @property
+    def exhausted(self) -> bool:
+        return self.__lost and not self.__reconnect
+
+    @property
+    def nominal_srate(self) -> Optional[float]:
+        return self.__nominal_srate
+
+    def open(self) -> bool:
+        print("Поиск потока LSL...")
+        self.__closed = False
+        info = self.__resolve_cached()
+        if info is None:
+            if self.__query is None:
+                streams = resolve_streams(wait_time=self.__wait_time)
+            else:
+                streams = resolve_bypred(self.__query, minimum=1, timeout=self.__wait_time)
+            info = streams[0] if streams else None
+
+        if info is None:
+            print("Потоков не найдено.")
+            return False
+
+        self.__connect(info)
+        return True
+
+    def pull_chunk(self, timeout: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        inlet = self.__inlet
+        if inlet is None:
+            self.__connected.wait(timeout)
+            inlet = self.__inlet
+            if inlet is None:
+                return np.empty((0, 0)), np.empty(0)
+
+        buffer = self.__buffer
+        try:
+            _, timestamps = inlet.pull_chunk(timeout=timeout, max_samples=len(buffer), dest_obj=buffer,
+                                             **_NUMPY_PULL)
+        except LostError:
+            self.__lose(inlet)
+            return np.empty((0, buffer.shape[1])), np.empty(0)
+
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        now = time.monotonic()
+        if len(timestamps):
+            self.__last_data = now
+        elif self.__stall_timeout is not None and now - self.__last_data > self.__stall_timeout:
+            self.__lose(inlet)
+        return buffer[:len(timestamps)], timestamps
+
+    def close(self):
+        self.__closed = True
+        self.__connected.set()
+        inlet, self.__inlet = self.__inlet, None
+        if inlet is not None:
+            inlet.close_stream()
+
+    def __connect(self, info: StreamInfo):
+        """
+        Открывает inlet к найденному потоку и запоминает поток.
+
+        Inlet создаётся без встроенного восстановления, чтобы обрыв
+        проявился исключением LostError, а не бесконечным ожиданием.
+        """
+        inlet = StreamInlet(info, recover=False)
+        self.__buffer = np.empty((self.__max_samples, inlet.channel_count), dtype=np.dtype(inlet.value_type))
+        self.__nominal_srate = info.nominal_srate() or None
+        self.__identity = _identity(info)
+        self.__last_data = time.monotonic()
+        self.__inlet = inlet
+        self.__connected.set()
+        self.__save_cache(info)
+
+    def __lose(self, inlet: StreamInlet):
+        """
+        Закрывает потерянный inlet и запускает переподключение.
+        """
+        print("Поток LSL потерян.")
+        self.__connected.clear()
+        self.__inlet = None
+        inlet.close_stream()
+        self.__lost = True
+        if self.__reconnect:
+            threading.Thread(target=self.__reconnect_loop, name="LSLReconnect", daemon=True).start()
+
+    def __reconnect_loop(self):
+        """
+        Ищет тот же поток, пока он не появится или источник не будет закрыт.
+        """
+        predicate = _join(self.__query, self.__identity)
+        while not self.__closed:
+            streams = resolve_bypred(predicate, minimum=1, timeout=1.0)
+            if streams and not self.__closed:
+                self.__generation += 1
+                self.__lost = False
+                self.__connect(streams[0])
+                print("Поток LSL восстановлен.")
+                return
+
+    def __resolve_cached(self) -> Optional[StreamInfo]:
+        """
+        Коротко ищет поток, к которому источник подключался в прошлый раз.
+        """
+        if self.__cache_path is None or not os.path.exists(self.__cache_path):
+            return None
+        try:
+            with open(self.__cache_path) as f:
+                identity = _identity_from(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+        streams = resolve_bypred(_join(self.__query, identity), minimum=1, timeout=self.CACHE_WAIT)
+        return streams[0] if streams else None
+
+    def __save_cache(self, info: StreamInfo):
+        """
+        Сохраняет описание подключённого потока.
+        """
+        if self.__cache_path is None:
+            return
+        cached = {"name": info.name(), "type": info.type(), "source_id": info.source_id(),
+                  "hostname": info.hostname()}
+        temporary = self.__cache_path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(cached, f)
+        os.replace(temporary, self.__cache_path)
+
+
+def _predicate(**properties: Optional[str]) -> Optional[str]:
+    """
+    Строит XPath-условие поиска LSL по заданным свойствам потока.
+    """
+    terms = [f"{key}='{value}'" for key, value in properties.items() if value]
+    return " and ".join(terms) if terms else None
+
+
+def _join(*predicates: Optional[str]) -> Optional[str]:
+    """
+    Объединяет XPath-условия через «и», пропуская пустые.
+    """
+    return " and ".join(p for p in predicates if p) or None
+
+
+def _identity_from(description: dict) -> str:
+    """
+    Условие поиска конкретного потока: по ``source_id``, а если он пуст — по имени и хосту.
+    """
+    if description["source_id"]:
+        return _predicate(source_id=description["source_id"])
+    return _predicate(name=description["name"], hostname=description["hostname"])
+
+
+def _identity(info: StreamInfo) -> str:
+    """
+    Условие поиска потока ``info`` при переподключении.
+    """
+    return _identity_from({"name": info.name(), "source_id": info.source_id(), "hostname": info.hostname()})
+
+
+class FileSource(SampleSource):
+    """
+    Воспроизведение записи с диска через отображение файла в память.
+
+    Запись — матрица, в каждой строке которой сначала временная метка, затем
+    значения каналов. Поддерживаются файлы ``.npy`` и «сырые» двоичные файлы
+    из подряд идущих строк (для них нужно указать число каналов). Файл не
+    загружается в память целиком: читаются только отдаваемые блоки.
+
+    :param path: Путь к файлу записи
+    :param channels: Число каналов для сырого двоичного файла
+    :param dtype: Тип значений сырого двоичного файла (по умолчанию float64)
+    :param chunk_size: Число сэмплов в одном блоке
+    :param realtime: Отдавать блоки с темпом исходной записи по её временным меткам
+    :param fs: Частота дискретизации записи в Гц; None — оценивается по временным меткам
+        и округляется до целых Гц, если отличается от них не больше чем на 0.1%
+    """
+
+    def __init__(self, path: str, channels: Optional[int] = None, dtype=np.float64,
+                 chunk_size: int = 32, realtime: bool = False, fs: Optional[float] = None):
+        self.__path = path
+        self.__channels = channels
+        self.__dtype = dtype
+        self.__chunk_size = chunk_size
+        self.__realtime = realtime
+        self.__fs = fs
+        self.__data: Optional[np.ndarray] = None
+        self.__position = 0
+        self.__wall_start = None
+        self.__first_timestamp = None
+
+    def open(self) -> bool:
+        if not os.path.exists(self.__path):
+            print(f"Файл записи не найден: {self.__path}")
+            return False
+
+        if self.__path.endswith(".npy"):
+            data = np.load(self.__path, mmap_mode='r')
+        else:
+            if self.__channels is None:
+                raise ValueError("Для сырого двоичного файла нужно указать число каналов")
+            data = np.memmap(self.__path, dtype=self.__dtype, mode='r')
+            data = data.reshape(-1, self.__channels + 1)
+
+        if data.ndim != 2 or data.shape[1] < 2:
+            print(f"Неверный формат записи: {data.shape}")
+            return False
+
+        self.__data = data
+        self.__position = 0
+        self.__wall_start = None
+        return True
+
+    @property
+    def exhausted(self) -> bool:
+        return self.__data is not None and self.__position >= len(self.__data)
+
+    @property
+    def nominal_srate(self) -> Optional[float]:
+        if self.__fs is not None or self.__data is None or len(self.__data) < 2:
+            return self.__fs
+        step = np.median(np.diff(self.__data[:1000, 0]))
+        if step <= 0:
+            return None
+        # Номинальные частоты гарнитур — целые герцы; оценка по меткам отличается от них на джиттер
+        rate = 1 / step
+        return float(round(rate)) if abs(rate - round(rate)) <= 1e-3 * rate else float(rate)
+
+    def pull_chunk(self, timeout: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        rows = self.__data[self.__position:self.__position + self.__chunk_size]
+        self.__position += len(rows)
+
+        timestamps = rows[:, 0]
+        if self.__realtime and len(rows):
+            self.__pace(timestamps[-1])
+        return rows[:, 1:], timestamps
+
+    def close(self):
+        self.__data = None
+
+    def __pace(self, timestamp: float):
+        """
+        Ждёт, пока с начала воспроизведения пройдёт столько же времени, сколько в записи.
+
+        :param timestamp: Временная метка последнего сэмпла отдаваемого блока
+        """
+        if self.__wall_start is None:
+            self.__wall_start = time.perf_counter()
+            self.__first_timestamp = timestamp
+            return
+
+        delay = (timestamp - self.__first_timestamp) - (time.perf_counter() - self.__wall_start)
+        if delay > 0:
+            time.sleep(delay)
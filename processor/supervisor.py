@@ -0,0 +1,409 @@
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from pylsl import resolve_streams
+
+from blink.blink_detector import BlinkDetectorListener
+from jaws.jaw_clench_detector import JawClenchDetectorListener
+from rhytm.rhytm_analyzer import RhythmAnalyzerListener
+
+STATE_RUNNING = "running"
+STATE_STALLED = "stalled"
+STATE_CRASHED = "crashed"
+STATE_FINISHED = "finished"
+STATE_FAILED = "failed"
+
+# Код завершения конвейера, не нашедшего свой поток: перезапуск не поможет
+_EXIT_NO_STREAM = 2
+
+
+class MultiStreamListener(ABC):
+    """
+    Слушатель событий всех конвейеров супервизора. Каждое событие помечено
+    идентификатором потока, из которого оно получено.
+    """
+
+    @abstractmethod
+    def on_blink(self, stream_id: str, timestamp: float) -> None:
+        """
+        Вызывается при обнаружении моргания в одном из потоков.
+
+        :param stream_id: Идентификатор потока
+        :param timestamp: Время события
+        """
+        pass
+
+    @abstractmethod
+    def on_clench(self, stream_id: str, timestamp: float) -> None:
+        """
+        Вызывается при обнаружении сжатия челюсти в одном из потоков.
+
+        :param stream_id: Идентификатор потока
+        :param timestamp: Время события
+        """
+        pass
+
+    @abstractmethod
+    def on_rhythm(self, stream_id: str, alpha_power: float, beta_power: float, alpha_beta_ratio: float) -> None:
+        """
+        Вызывается при обновлении оценки альфа/бета ритмов одного из потоков.
+
+        :param stream_id: Идентификатор потока
+        :param alpha_power: Мощность альфа-ритма
+        :param beta_power: Мощность бета-ритма
+        :param alpha_beta_ratio: Отношение альфа/бета
+        """
+        pass
+
+    def on_band_powers(self, stream_id: str, band_powers: Dict[str, float]) -> None:
+        """
+        Вызывается с мощностями всех ритмов опорного канала. Необязательный метод.
+        """
+        pass
+
+    def on_pipeline_state(self, stream_id: str, state: str) -> None:
+        """
+        Вызывается при смене состояния конвейера: запуск, зависание, падение,
+        завершение. Необязательный метод.
+        """
+        pass
+
+
+class _BatchingListener(BlinkDetectorListener, JawClenchDetectorListener, RhythmAnalyzerListener):
+    """
+    Слушатель дочернего процесса: копит события шага для отправки одним сообщением.
+    """
+
+    def __init__(self):
+        self.events: List[Tuple[str, tuple]] = []
+
+    def on_blink(self, timestamp: float) -> None:
+        self.events.append(("blink", (timestamp,)))
+
+    def on_clench(self, timestamp: float) -> None:
+        self.events.append(("clench", (timestamp,)))
+
+    def on_rhythm(self, alpha_power: float, beta_power: float, alpha_beta_ratio: float) -> None:
+        self.events.append(("rhythm", (alpha_power, beta_power, alpha_beta_ratio)))
+
+    def on_blinks(self, timestamps) -> None:
+        self.events.extend(("blink", (timestamp,)) for timestamp in timestamps.tolist())
+
+    def on_clenches(self, timestamps) -> None:
+        self.events.extend(("clench", (timestamp,)) for timestamp in timestamps.tolist())
+
+    def on_rhythms(self, rhythms) -> None:
+        self.events.extend(("rhythm", tuple(row)) for row in rhythms.tolist())
+
+    def on_band_powers(self, band_powers) -> None:
+        self.events.append(("band_powers", (dict(band_powers),)))
+
+
+def _run_pipeline(stream_id: str, prop: str, value: str, wait_time: float, core: Optional[int], events, stop,
+                  heartbeat_interval: float):
+    """
+    Точка входа дочернего процесса: один независимый конвейер на один поток LSL.
+
+    События шага отправляются родителю одним сообщением ``(stream_id, events)``
+    через собственный канал конвейера ``events``; если событий нет, не реже
+    чем раз в ``heartbeat_interval`` отправляется пустое сообщение — признак
+    того, что конвейер жив. Если поток не найден, процесс завершается с
+    кодом _EXIT_NO_STREAM.
+    """
+    from processor.eeg_processor import EEGProcessor
+    from processor.sources import LSLSource
+
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+
+    listener = _BatchingListener()
+    processor = EEGProcessor(blink_listener=listener, clench_listener=listener, rhythm_listener=listener,
+                             source=LSLSource(wait_time=wait_time, **{prop: value}))
+    if not processor.initialize_stream():
+        raise SystemExit(_EXIT_NO_STREAM)
+
+    processor.start_acquisition()
+    last_sent = 0.0
+    try:
+        while not stop.is_set() and processor.step(timeout=0.1):
+            now = time.monotonic()
+            if listener.events or now - last_sent >= heartbeat_interval:
+                events.send((stream_id, listener.events))
+                listener.events = []
+                last_sent = now
+    finally:
+        processor.close()
+
+
+class _Worker:
+    """
+    Состояние одного дочернего конвейера в супервизоре.
+    """
+
+    def __init__(self, stream_id: str, prop: str, value: str, core: Optional[int]):
+        self.stream_id = stream_id
+        self.prop = prop
+        self.value = value
+        self.core = core
+        self.process: Optional[multiprocessing.Process] = None
+        self.connection = None
+        self.stop = None
+        self.last_seen = 0.0
+        self.restarts = 0
+        self.state = None
+
+
+class PipelineSupervisor:
+    """
+    Запускает отдельный конвейер EEGProcessor на каждый найденный поток EEG.
+
+    Каждый конвейер работает в своём процессе (при возможности — на своём
+    ядре), поэтому падение или зависание одного не влияет на остальные.
+    События возвращаются родителю через собственный канал каждого конвейера
+    пачками по шагу обработки и передаются слушателю с идентификатором
+    потока. Конвейер, от которого дольше ``stall_timeout`` нет сообщений,
+    считается зависшим: его просят остановиться, при необходимости
+    завершают принудительно и перезапускают, как и упавший, но не больше
+    ``max_restarts`` раз. Конвейер, не нашедший свой поток, сразу
+    получает состояние STATE_FAILED.
+
+    :param listener: Слушатель событий всех потоков
+    :param stream_type: Тип потоков LSL для поиска
+    :param wait_time: Время поиска потоков в секундах
+    :param stall_timeout: Время без сообщений, после которого конвейер считается зависшим
+    :param heartbeat_interval: Период сообщений-признаков жизни от конвейера
+    :param max_restarts: Максимальное число перезапусков одного конвейера
+    :param pin_cores: Закреплять каждый конвейер за отдельным ядром
+    :param stall_grace: Время ожидания мягкой остановки зависшего конвейера перед SIGTERM и kill
+    """
+
+    def __init__(self, listener: MultiStreamListener, stream_type: str = "EEG", wait_time: float = 5,
+                 stall_timeout: float = 5.0, heartbeat_interval: float = 0.5, max_restarts: int = 3,
+                 pin_cores: bool = True, stall_grace: float = 1.0):
+        self.__listener = listener
+        self.__stream_type = stream_type
+        self.__wait_time = wait_time
+        self.__stall_timeout = stall_timeout
+        self.__heartbeat_interval = heartbeat_interval
+        self.__max_restarts = max_restarts
+        self.__pin_cores = pin_cores
+        self.__stall_grace = stall_grace
+        self.__context = multiprocessing.get_context("spawn")
+        self.__stopping = False
+        self.__workers: Dict[str, _Worker] = {}
+
+    @property
+    def stream_ids(self) -> List[str]:
+        """Идентификаторы потоков, для которых запущены конвейеры."""
+        return list(self.__workers)
+
+    def discover(self) -> List[Tuple[str, str, str]]:
+        """
+        Ищет все потоки заданного типа.
+
+        Поиск длится всё время ``wait_time``, чтобы найти все гарнитуры, а не
+        первую ответившую. Поток идентифицируется по ``source_id``, а если он
+        не задан — по имени.
+
+        :return: Список троек (идентификатор, параметр LSLSource для поиска, значение)
+        """
+        print("Поиск потоков LSL...")
+        found = []
+        for info in resolve_streams(wait_time=self.__wait_time):
+            if info.type() != self.__stream_type:
+                continue
+            if info.source_id():
+                found.append((info.source_id(), "source_id", info.source_id()))
+            else:
+                found.append((info.name(), "name", info.name()))
+        if not found:
+            print("Потоков не найдено.")
+        return found
+
+    def start(self) -> bool:
+        """
+        Находит потоки и запускает по конвейеру на каждый.
+
+        :return: True, если запущен хотя бы один конвейер
+        """
+        cores = os.cpu_count() or 1
+        for i, (stream_id, prop, value) in enumerate(self.discover()):
+            if stream_id in self.__workers:
+                continue
+            core = i % cores if self.__pin_cores else None
+            worker = _Worker(stream_id, prop, value, core)
+            self.__workers[stream_id] = worker
+            self.__spawn(worker)
+        return bool(self.__workers)
+
+    def poll(self, timeout: float = 0.1) -> bool:
+        """
+        Передаёт слушателю накопившиеся события и проверяет состояние конвейеров.
+
+        :param timeout: Сколько секунд ждать первое сообщение
+        :return: True, пока работает хотя бы один конвейер
+        """
+        connections = [worker.connection for worker in self.__workers.values() if worker.process is not None]
+        for connection in wait(connections, timeout) if connections else ():
+            self.__receive(connection)
+
+        now = time.monotonic()
+        for worker in self.__workers.values():
+            if worker.process is None:
+                continue
+            if not worker.process.is_alive():
+                worker.process.join()
+                # Сообщения, отправленные перед завершением процесса
+                self.__receive(worker.connection)
+                exitcode = worker.process.exitcode
+                if exitcode == 0:
+                    self.__release(worker)
+                    self.__set_state(worker, STATE_FINISHED)
+                elif exitcode == _EXIT_NO_STREAM:
+                    self.__release(worker)
+                    self.__set_state(worker, STATE_FAILED)
+                else:
+                    self.__set_state(worker, STATE_CRASHED)
+                    self.__restart(worker)
+            elif now - worker.last_seen > self.__stall_timeout:
+                self.__set_state(worker, STATE_STALLED)
+                self.__terminate(worker, self.__stall_grace)
+                self.__restart(worker)
+
+        return any(worker.process is not None for worker in self.__workers.values())
+
+    def run(self, duration: Optional[float] = None):
+        """
+        Обрабатывает события до завершения всех конвейеров, истечения времени или Ctrl+C.
+
+        :param duration: Время работы в секундах; None — без ограничения
+        """
+        started = time.monotonic()
+        try:
+            while self.poll() and (duration is None or time.monotonic() - started < duration):
+                pass
+        except KeyboardInterrupt:
+            print("Остановка пользователем.")
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Останавливает все конвейеры; не успевшие завершиться принудительно.
+
+        :param timeout: Время ожидания мягкой остановки каждого конвейера
+        """
+        self.__stopping = True
+        for worker in self.__workers.values():
+            if worker.process is not None:
+                worker.stop.set()
+        for worker in self.__workers.values():
+            if worker.process is None:
+                continue
+            self.__terminate(worker, timeout)
+            self.__release(worker)
+            self.__set_state(worker, STATE_FINISHED)
+
+    def __spawn(self, worker: _Worker):
+        """
+        Запускает процесс конвейера.
+        """
+        # У каждого конвейера свой канал: принудительное завершение процесса не портит каналы остальных
+        receiver, sender = self.__context.Pipe(duplex=False)
+        worker.connection = receiver
+        worker.stop = self.__context.Event()
+        worker.process = self.__context.Process(
+            target=_run_pipeline, name=f"EEGPipeline-{worker.stream_id}", daemon=True,
+            args=(worker.stream_id, worker.prop, worker.value, self.__wait_time, worker.core,
+                  sender, worker.stop, self.__heartbeat_interval))
+        worker.process.start()
+        sender.close()
+        # Первое сообщение приходит только после запуска интерпретатора и поиска потока
+        worker.last_seen = time.monotonic() + self.__wait_time
+        self.__set_state(worker, STATE_RUNNING)
+
+    def __restart(self, worker: _Worker):
+        """
+        Перезапускает конвейер, если не исчерпан лимит перезапусков.
+        """
+        self.__release(worker)
+        if worker.restarts >= self.__max_restarts or self.__stopping:
+            self.__set_state(worker, STATE_FAILED)
+            return
+        worker.restarts += 1
+        self.__spawn(worker)
+
+    @staticmethod
+    def __terminate(worker: _Worker, timeout: float):
+        """
+        Останавливает процесс конвейера: сначала просит завершиться, затем
+        посылает SIGTERM и лишь в крайнем случае убивает.
+
+        :param timeout: Время ожидания каждого шага остановки
+        """
+        process = worker.process
+        worker.stop.set()
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    @staticmethod
+    def __release(worker: _Worker):
+        """
+        Забывает завершённый процесс конвейера и закрывает его канал.
+        """
+        worker.process = None
+        if worker.connection is not None:
+            worker.connection.close()
+            worker.connection = None
+
+    def __receive(self, connection):
+        """
+        Передаёт слушателю все сообщения, уже пришедшие по каналу конвейера.
+        """
+        try:
+            while connection.poll():
+                self.__dispatch(*connection.recv())
+        except (EOFError, OSError):
+            # Процесс завершился; канал будет закрыт при обработке его состояния
+            pass
+
+    def __dispatch(self, stream_id: str, events: List[Tuple[str, tuple]]):
+        """
+        Передаёт слушателю пачку событий одного конвейера.
+        """
+        worker = self.__workers.get(stream_id)
+        if worker is not None:
+            worker.last_seen = time.monotonic()
+
+        listener = self.__listener
+        for kind, args in events:
+            if kind == "blink":
+                listener.on_blink(stream_id, *args)
+            elif kind == "clench":
+                listener.on_clench(stream_id, *args)
+            elif kind == "rhythm":
+                listener.on_rhythm(stream_id, *args)
+            elif kind == "band_powers":
+                on_band_powers = getattr(listener, "on_band_powers", None)
+                if on_band_powers is not None:
+                    on_band_powers(stream_id, *args)
+
+    def __set_state(self, worker: _Worker, state: str):
+        """
+        Запоминает состояние конвейера и сообщает о его смене слушателю.
+        """
+        if worker.state == state:
+            return
+        worker.state = state
+        on_pipeline_state = getattr(self.__listener, "on_pipeline_state", None)
+        if on_pipeline_state is not None:
+            on_pipeline_state(worker.stream_id, state)
@@ -0,0 +1,118 @@
+from typing import Optional
+
+import numpy as np
+
+
+class TimestampMonitor:
+    """
+    Контроль непрерывности временных меток входных блоков.
+
+    Метки сравниваются со сглаженными часами потока: метка сэмпла номер
+    ``k`` после опорной точки ожидается в ``anchor + k / fs``. Отклонение от
+    ожидаемой метки в пределах ``max_gap`` секунд — джиттер доставки (метки
+    блока сдвинуты целиком, соседние блоки могут даже перекрываться); по
+    нему медленно подстраивается опорная точка, чтобы следовать уходу часов
+    источника. Метка позже ожидаемой больше чем на ``max_gap`` — разрыв:
+    сэмплы потеряны; раньше больше чем на ``max_gap`` — скачок времени
+    назад. В обоих случаях часы заново привязываются к этой метке.
+
+    Джиттер — среднеквадратичное и наибольшее отклонение меток от сглаженных часов.
+
+    :param fs: Номинальная частота дискретизации в Гц
+    :param max_gap: Наибольшее отклонение метки от ожидаемой в секундах, которое ещё считается джиттером
+    :param smoothing: Доля среднего отклонения блока, на которую сдвигается опорная точка
+    """
+
+    def __init__(self, fs: float, max_gap: float = 0.25, smoothing: float = 0.05):
+        if fs <= 0 or max_gap <= 0:
+            raise ValueError("Частота и порог разрыва должны быть положительными")
+        self.fs = fs
+        self.period = 1.0 / fs
+        self.max_gap = max_gap
+        self.smoothing = smoothing
+        self.__anchor: Optional[float] = None
+        self.__since_anchor = 0
+        self.gaps = 0
+        self.lost_samples = 0
+        self.backward_jumps = 0
+        self.samples = 0
+        self.__deviation_sum_sq = 0.0
+        self.max_jitter = 0.0
+
+    @property
+    def breaks(self) -> int:
+        """Число нарушений непрерывности: разрывов и скачков назад."""
+        return self.gaps + self.backward_jumps
+
+    @property
+    def jitter(self) -> float:
+        """Среднеквадратичное отклонение меток от сглаженных часов в секундах."""
+        return float(np.sqrt(self.__deviation_sum_sq / self.samples)) if self.samples else 0.0
+
+    def check(self, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Проверяет метки блока и обновляет статистику.
+
+        :param timestamps: Временные метки блока
+        :return: Индексы сэмплов, перед которыми непрерывность нарушена (по
+                 возрастанию); 0 — разрыв между предыдущим и этим блоком
+        """
+        ts = np.asarray(timestamps, dtype=np.float64)
+        breaks = []
+        start = 0
+        if self.__anchor is None and len(ts):
+            self.__restart_at(ts[0])
+        while start < len(ts):
+            part = ts[start:]
+            deviations = part - (self.__anchor + (self.__since_anchor + np.arange(len(part))) * self.period)
+            broken = np.flatnonzero(np.abs(deviations) > self.max_gap)
+            good = deviations if len(broken) == 0 else deviations[:broken[0]]
+            self.__account(good)
+            if len(broken) == 0:
+                break
+
+            index = int(broken[0])
+            deviation = float(deviations[index])
+            if deviation > 0:
+                self.gaps += 1
+                self.lost_samples += int(round(deviation * self.fs))
+            else:
+                self.backward_jumps += 1
+            start += index
+            breaks.append(start)
+            self.__restart_at(ts[start])
+        return np.array(breaks, dtype=np.intp)
+
+    def restart(self):
+        """
+        Забывает часы потока: следующий блок не сравнивается с предыдущим,
+        например после переподключения источника. Статистика сохраняется.
+        """
+        self.__anchor = None
+
+    def format_summary(self) -> str:
+        """
+        Сводка для вывода в консоль.
+        """
+        return (f"Временные метки: разрывов {self.gaps} (потеряно сэмплов {self.lost_samples}), "
+                f"скачков назад {self.backward_jumps}, джиттер {self.jitter * 1e3:.2f} мс "
+                f"(макс. {self.max_jitter * 1e3:.2f} мс)")
+
+    def __restart_at(self, timestamp: float):
+        """
+        Привязывает часы потока к метке ``timestamp``.
+        """
+        self.__anchor = float(timestamp)
+        self.__since_anchor = 0
+
+    def __account(self, deviations: np.ndarray):
+        """
+        Учитывает отклонения непрерывных сэмплов и подстраивает опорную точку.
+        """
+        if len(deviations) == 0:
+            return
+        self.samples += len(deviations)
+        self.__deviation_sum_sq += float(np.dot(deviations, deviations))
+        self.max_jitter = max(self.max_jitter, float(np.abs(deviations).max()))
+        self.__since_anchor += len(deviations)
+        self.__anchor += self.smoothing * float(deviations.mean())
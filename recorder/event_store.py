@@ -0,0 +1,377 @@
+import bisect
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from processor.publisher import ResultPublisher
+from recorder.session_recorder import EVENT_BLINK, EVENT_CLENCH, EVENT_RHYTHM, load_events
+from rhytm.rhytm_analyzer import band_rhythms
+
+EVENT_ROW_DTYPE = np.dtype([("timestamp", "<f8")])
+RHYTHM_ROW_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("alpha", "<f4"),
+    ("beta", "<f4"),
+    ("ratio", "<f4"),
+])
+
+
+class _Segment(NamedTuple):
+    """
+    Выгруженный на диск сегмент таблицы и его сводка для агрегатов.
+    """
+    path: str
+    first: float
+    last: float
+    count: int
+    sums: Dict[str, float]
+
+
+class _TimeTable:
+    """
+    Растущая таблица строк, упорядоченных по времени, с выгрузкой старых сегментов на диск.
+
+    Строки хранятся в структурированном массиве, ёмкость которого
+    удваивается при заполнении. Когда в памяти набирается два сегмента по
+    ``segment_size`` строк, старший сегмент записывается в .npy-файл и
+    дальше читается через отображение в память; в сегменте запоминаются
+    границы по времени и суммы столбцов, так что агрегаты по целым сегментам
+    не читают файл.
+
+    :param dtype: Тип строки; первый столбец — ``timestamp``
+    :param segment_size: Число строк в выгружаемом сегменте
+    :param directory: Каталог сегментов; None — таблица целиком в памяти
+    :param name: Префикс имён файлов сегментов
+    """
+
+    def __init__(self, dtype: np.dtype, segment_size: int, directory: Optional[str], name: str):
+        self.__dtype = dtype
+        self.__columns = [column for column in dtype.names if column != "timestamp"]
+        self.__segment_size = segment_size
+        self.__directory = directory
+        self.__name = name
+        self.__data = np.empty(min(segment_size, 1024), dtype=dtype)
+        self.__size = 0
+        self.__segments: List[_Segment] = []
+        self.__segment_lasts: List[float] = []
+
+    def __len__(self) -> int:
+        return self.__size + sum(segment.count for segment in self.__segments)
+
+    @property
+    def memory_rows(self) -> int:
+        """Число строк, хранимых в памяти."""
+        return self.__size
+
+    def append(self, rows: np.ndarray):
+        """
+        Добавляет строки. Строки, более ранние чем уже добавленные, вставляются
+        на своё место среди строк в памяти.
+
+        :param rows: Структурированный массив типа таблицы
+        """
+        n = len(rows)
+        if n == 0:
+            return
+        size = self.__size
+        if size + n > len(self.__data):
+            grown = np.empty(max(2 * len(self.__data), size + n), dtype=self.__dtype)
+            grown[:size] = self.__data[:size]
+            self.__data = grown
+
+        data = self.__data
+        data[size:size + n] = rows
+        self.__size = size + n
+        timestamps = data["timestamp"]
+        if (size and timestamps[size] < timestamps[size - 1]) or np.any(np.diff(timestamps[size:size + n]) < 0):
+            order = np.argsort(timestamps[:size + n], kind="stable")
+            data[:size + n] = data[:size + n][order]
+
+        if self.__directory is not None:
+            while self.__size >= 2 * self.__segment_size:
+                self.__spill()
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """
+        Возвращает копию строк с меткой в полуинтервале [start, end).
+
+        :param start: Начало интервала; None — с начала сеанса
+        :param end: Конец интервала; None — до конца сеанса
+        """
+        parts = [self.__slice(rows, start, end) for rows in self.__parts(start, end)]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=self.__dtype)
+
+    def aggregate(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, Dict[str, float]]:
+        """
+        Считает число строк и суммы столбцов в полуинтервале [start, end).
+
+        Сегменты, целиком попадающие в интервал, учитываются по сводке без чтения файла.
+
+        :return: Число строк и суммы числовых столбцов (кроме timestamp)
+        """
+        count = 0
+        sums = dict.fromkeys(self.__columns, 0.0)
+        for index in self.__overlapping(start, end):
+            segment = self.__segments[index]
+            if (start is None or segment.first >= start) and (end is None or segment.last < end):
+                count += segment.count
+                for column in self.__columns:
+                    sums[column] += segment.sums[column]
+            else:
+                count += self.__add_sums(self.__load(segment), start, end, sums)
+        count += self.__add_sums(self.__data[:self.__size], start, end, sums)
+        return count, sums
+
+    def bounds(self) -> Tuple[float, float]:
+        """
+        Возвращает метки первой и последней строки; (nan, nan) для пустой таблицы.
+        """
+        first = self.__segments[0].first if self.__segments else (
+            self.__data["timestamp"][0] if self.__size else np.nan)
+        last = self.__data["timestamp"][self.__size - 1] if self.__size else (
+            self.__segments[-1].last if self.__segments else np.nan)
+        return float(first), float(last)
+
+    def __add_sums(self, rows: np.ndarray, start: Optional[float], end: Optional[float],
+                   sums: Dict[str, float]) -> int:
+        """
+        Добавляет к суммам строки массива, попадающие в интервал.
+
+        :return: Число таких строк
+        """
+        selected = self.__slice(rows, start, end)
+        for column in self.__columns:
+            sums[column] += float(selected[column].sum(dtype=np.float64))
+        return len(selected)
+
+    def __parts(self, start: Optional[float], end: Optional[float]) -> List[np.ndarray]:
+        """
+        Возвращает сегменты, пересекающиеся с интервалом, и строки в памяти.
+        """
+        parts = [self.__load(self.__segments[index]) for index in self.__overlapping(start, end)]
+        parts.append(self.__data[:self.__size])
+        return parts
+
+    def __overlapping(self, start: Optional[float], end: Optional[float]) -> range:
+        """
+        Находит индексы выгруженных сегментов, пересекающихся с интервалом, двоичным поиском.
+        """
+        first = 0 if start is None else bisect.bisect_left(self.__segment_lasts, start)
+        last = first
+        while last < len(self.__segments) and (end is None or self.__segments[last].first < end):
+            last += 1
+        return range(first, last)
+
+    @staticmethod
+    def __slice(rows: np.ndarray, start: Optional[float], end: Optional[float]) -> np.ndarray:
+        """
+        Выбирает строки полуинтервала [start, end) двоичным поиском по меткам.
+        """
+        timestamps = rows["timestamp"]
+        lo = 0 if start is None else np.searchsorted(timestamps, start, side="left")
+        hi = len(rows) if end is None else np.searchsorted(timestamps, end, side="left")
+        return rows[lo:hi]
+
+    def __load(self, segment: _Segment) -> np.ndarray:
+        """
+        Открывает выгруженный сегмент через отображение в память.
+        """
+        return np.load(segment.path, mmap_mode="r")
+
+    def __spill(self):
+        """
+        Выгружает старший сегмент строк из памяти на диск.
+        """
+        count = self.__segment_size
+        rows = self.__data[:count]
+        path = os.path.join(self.__directory, f"{self.__name}_{len(self.__segments):06d}.npy")
+        np.save(path, rows)
+        sums = {column: float(rows[column].sum(dtype=np.float64)) for column in self.__columns}
+        segment = _Segment(path, float(rows["timestamp"][0]), float(rows["timestamp"][-1]), count, sums)
+        self.__segments.append(segment)
+        self.__segment_lasts.append(segment.last)
+
+        rest = self.__size - count
+        self.__data[:rest] = self.__data[count:self.__size]
+        self.__size = rest
+
+
+class SessionEventStore(ResultPublisher):
+    """
+    Хранилище событий и оценок ритмов сеанса с запросами по времени.
+
+    Моргания, сжатия челюсти и оценки ритмов хранятся в отдельных
+    столбцовых таблицах (структурированные массивы NumPy), а не объектами на
+    событие. Таблицы упорядочены по времени, поэтому выборка интервала — это
+    двоичный поиск, O(log n). При заданном ``directory`` старые сегменты
+    выгружаются на диск, и память не растёт с длительностью сеанса.
+
+    Подключается к EEGProcessor как публикатор (``publisher=``); время оценки
+    ритма — метка последнего вошедшего в неё сэмпла. Данные можно добавлять
+    и напрямую через ``add_events`` и ``add_rhythms``.
+
+    :param directory: Каталог для выгрузки старых сегментов; None — всё в памяти
+    :param segment_size: Число строк в выгружаемом сегменте
+    """
+
+    def __init__(self, directory: Optional[str] = None, segment_size: int = 1 << 16):
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.__tables = {
+            EVENT_BLINK: _TimeTable(EVENT_ROW_DTYPE, segment_size, directory, "blinks"),
+            EVENT_CLENCH: _TimeTable(EVENT_ROW_DTYPE, segment_size, directory, "clenches"),
+            EVENT_RHYTHM: _TimeTable(RHYTHM_ROW_DTYPE, segment_size, directory, "rhythms"),
+        }
+        self.__last_timestamp = np.nan
+
+    @classmethod
+    def from_recording(cls, path: str, directory: Optional[str] = None,
+                       segment_size: int = 1 << 16) -> 'SessionEventStore':
+        """
+        Загружает события из файла events.bin, записанного SessionRecorder.
+
+        :param path: Путь к файлу событий
+        :param directory: Каталог для выгрузки старых сегментов; None — всё в памяти
+        :param segment_size: Число строк в выгружаемом сегменте
+        """
+        store = cls(directory, segment_size)
+        records = load_events(path)
+        for kind in (EVENT_BLINK, EVENT_CLENCH):
+            store.add_events(kind, records["timestamp"][records["kind"] == kind])
+        rhythms = records[records["kind"] == EVENT_RHYTHM]
+        store.add_rhythms(rhythms["timestamp"], rhythms["values"])
+        return store
+
+    def add_events(self, kind: int, timestamps: np.ndarray):
+        """
+        Добавляет события одного вида.
+
+        :param kind: EVENT_BLINK или EVENT_CLENCH
+        :param timestamps: Времена событий
+        """
+        rows = np.empty(len(timestamps), dtype=EVENT_ROW_DTYPE)
+        rows["timestamp"] = timestamps
+        self.__tables[kind].append(rows)
+
+    def add_rhythms(self, timestamps: np.ndarray, rhythms: np.ndarray):
+        """
+        Добавляет оценки ритмов.
+
+        :param timestamps: Время каждой оценки
+        :param rhythms: Массив (n × 3): альфа, бета, альфа/бета
+        """
+        rows = np.empty(len(rhythms), dtype=RHYTHM_ROW_DTYPE)
+        rows["timestamp"] = timestamps
+        rows["alpha"] = rhythms[:, 0]
+        rows["beta"] = rhythms[:, 1]
+        rows["ratio"] = rhythms[:, 2]
+        self.__tables[EVENT_RHYTHM].append(rows)
+
+    def publish_chunk(self, chunk):
+        if len(chunk.timestamps):
+            self.__last_timestamp = float(chunk.timestamps[-1])
+
+    def publish_events(self, kind: int, timestamps: np.ndarray):
+        self.add_events(kind, timestamps)
+
+    def publish_rhythms(self, rhythms: np.ndarray):
+        # Оценки сохраняются в publish_band_estimates вместе с их метками
+        pass
+
+    def publish_band_estimates(self, timestamps: np.ndarray, band_powers: np.ndarray,
+                               band_names: Tuple[str, ...]):
+        stamps = np.where(np.isnan(timestamps), self.__last_timestamp, timestamps)
+        self.add_rhythms(stamps, band_rhythms(band_powers, band_names))
+
+    def events(self, kind: int, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """
+        Возвращает времена событий в полуинтервале [start, end).
+
+        :param kind: EVENT_BLINK или EVENT_CLENCH
+        :param start: Начало интервала; None — с начала сеанса
+        :param end: Конец интервала; None — до конца сеанса
+        """
+        return self.__tables[kind].range(start, end)["timestamp"]
+
+    def rhythms(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """
+        Возвращает оценки ритмов в полуинтервале [start, end).
+
+        :return: Структурированный массив RHYTHM_ROW_DTYPE
+        """
+        return self.__tables[EVENT_RHYTHM].range(start, end)
+
+    def count(self, kind: int, start: Optional[float] = None, end: Optional[float] = None) -> int:
+        """
+        Считает события или оценки ритмов в полуинтервале [start, end).
+
+        :param kind: EVENT_BLINK, EVENT_CLENCH или EVENT_RHYTHM
+        """
+        return self.__tables[kind].aggregate(start, end)[0]
+
+    def events_per_minute(self, kind: int, start: Optional[float] = None, end: Optional[float] = None) -> float:
+        """
+        Частота событий в минуту в полуинтервале [start, end).
+
+        Незаданные границы заменяются началом и концом всех данных сеанса.
+
+        :param kind: EVENT_BLINK или EVENT_CLENCH
+        :return: Событий в минуту; nan для интервала нулевой длины
+        """
+        first, last = self.time_range()
+        start = first if start is None else start
+        end = last if end is None else end
+        duration = end - start
+        if not duration > 0:
+            return np.nan
+        return self.count(kind, start, end) * 60.0 / duration
+
+    def mean_rhythms(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, float]:
+        """
+        Средние мощности альфа и бета и среднее отношение альфа/бета в полуинтервале [start, end).
+
+        :return: Словарь alpha, beta, ratio; nan, если оценок нет
+        """
+        count, sums = self.__tables[EVENT_RHYTHM].aggregate(start, end)
+        if count == 0:
+            return dict.fromkeys(sums, np.nan)
+        return {column: total / count for column, total in sums.items()}
+
+    def mean_ratio(self, start: Optional[float] = None, end: Optional[float] = None) -> float:
+        """
+        Среднее отношение альфа/бета в полуинтервале [start, end); nan, если оценок нет.
+        """
+        return self.mean_rhythms(start, end)["ratio"]
+
+    def time_range(self) -> Tuple[float, float]:
+        """
+        Возвращает метки первой и последней записи сеанса; (nan, nan) без данных.
+        """
+        bounds = np.array([table.bounds() for table in self.__tables.values()])
+        if np.all(np.isnan(bounds)):
+            return np.nan, np.nan
+        return float(np.nanmin(bounds[:, 0])), float(np.nanmax(bounds[:, 1]))
+
+    def summary(self, start: Optional[float] = None, end: Optional[float] = None) -> dict:
+        """
+        Возвращает сводку интервала: число и частоту событий, средние ритмы.
+        """
+        return {
+            "blinks": self.count(EVENT_BLINK, start, end),
+            "clenches": self.count(EVENT_CLENCH, start, end),
+            "blinks_per_minute": self.events_per_minute(EVENT_BLINK, start, end),
+            "clenches_per_minute": self.events_per_minute(EVENT_CLENCH, start, end),
+            "rhythms": self.count(EVENT_RHYTHM, start, end),
+            **{f"mean_{name}": value for name, value in self.mean_rhythms(start, end).items()},
+        }
+
+    def format_summary(self, start: Optional[float] = None, end: Optional[float] = None) -> str:
+        """
+        Формирует краткую человекочитаемую сводку интервала.
+        """
+        s = self.summary(start, end)
+        return (f"моргания: {s['blinks']} ({s['blinks_per_minute']:.1f}/мин), "
+                f"сжатия: {s['clenches']} ({s['clenches_per_minute']:.1f}/мин), "
+                f"ритмы: {s['rhythms']} оценок, α={s['mean_alpha']:.2f} β={s['mean_beta']:.2f} "
+                f"α/β={s['mean_ratio']:.2f}")
@@ -0,0 +1,305 @@
+import os
+import queue
+import threading
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+from blink.blink_detector import BlinkDetectorListener, emit_blinks
+from jaws.jaw_clench_detector import JawClenchDetectorListener, emit_clenches
+from rhytm.rhytm_analyzer import RhythmAnalyzerListener, RhythmListenerWrapper, band_rhythms
+
+EVENT_BLINK = 1
+EVENT_CLENCH = 2
+EVENT_RHYTHM = 3
+
+EVENT_DTYPE = np.dtype([
+    ("kind", "u1"),
+    ("timestamp", "<f8"),
+    ("values", "<f8", (3,)),
+])
+
+SAMPLES_FILE = "samples.bin"
+EVENTS_FILE = "events.bin"
+
+_STOP = object()
+
+
+def load_events(path: str) -> np.ndarray:
+    """
+    Открывает файл событий записи без загрузки в память.
+
+    :param path: Путь к файлу events.bin
+    :return: Структурированный массив с типом EVENT_DTYPE
+    """
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    return np.memmap(path, dtype=EVENT_DTYPE, mode='r')
+
+
+class _BlockFile:
+    """
+    Двоичный файл с предвыделением места крупными блоками.
+
+    Данные копятся в памяти и дописываются в файл целыми блоками; при
+    закрытии файл обрезается до фактически записанного размера.
+
+    :param path: Путь к файлу
+    :param block_size: Размер блока записи и шага предвыделения в байтах
+    """
+
+    def __init__(self, path: str, block_size: int):
+        self.__file = open(path, "wb")
+        self.__block_size = block_size
+        self.__pending = bytearray()
+        self.__written = 0
+        self.__allocated = 0
+
+    @property
+    def pending(self) -> int:
+        """Объём данных, ещё не записанных в файл, в байтах."""
+        return len(self.__pending)
+
+    def append(self, data: bytes):
+        """
+        Добавляет данные в буфер блока.
+        """
+        self.__pending += data
+
+    def flush(self):
+        """
+        Дописывает накопленные данные в файл, при необходимости расширяя его на целое число блоков.
+        """
+        if not self.__pending:
+            return
+        end = self.__written + len(self.__pending)
+        if end > self.__allocated:
+            blocks = -(-end // self.__block_size)
+            self.__allocated = blocks * self.__block_size
+            self.__file.truncate(self.__allocated)
+        self.__file.seek(self.__written)
+        self.__file.write(self.__pending)
+        self.__file.flush()
+        self.__written = end
+        self.__pending.clear()
+
+    def close(self):
+        """
+        Сбрасывает остаток и обрезает файл до записанного размера.
+        """
+        self.flush()
+        self.__file.truncate(self.__written)
+        self.__file.close()
+
+
+class SessionRecorder:
+    """
+    Фоновая запись сырых блоков и событий сеанса на диск.
+
+    Поток обработки только кладёт данные в ограниченную очередь и никогда не
+    ждёт: при переполнении блок отбрасывается и учитывается в ``dropped``.
+    Запись в файлы выполняет отдельный поток крупными блоками, сбрасывая
+    их по достижении ``block_size`` или раз в ``flush_interval`` секунд.
+
+    В каталоге создаются ``samples.bin`` — строки float64 [временная метка,
+    каналы...], которые читает FileSource, — и ``events.bin`` — записи
+    EVENT_DTYPE (для ритма values = альфа, бета, отношение).
+
+    :param directory: Каталог записи
+    :param queue_size: Максимальное число элементов в очереди
+    :param block_size: Размер блока записи в байтах
+    :param flush_interval: Максимальный интервал между сбросами в секундах
+    """
+
+    def __init__(self, directory: str, queue_size: int = 1024, block_size: int = 1 << 20,
+                 flush_interval: float = 1.0):
+        self.__directory = directory
+        self.__queue = queue.Queue(maxsize=queue_size)
+        self.__block_size = block_size
+        self.__flush_interval = flush_interval
+        self.__thread: Optional[threading.Thread] = None
+        self.__channels: Optional[int] = None
+        self.__last_timestamp = 0.0
+        self.dropped = 0
+
+    def start(self):
+        """
+        Создаёт файлы записи и запускает поток записи.
+        """
+        if self.__thread is not None:
+            return
+        os.makedirs(self.__directory, exist_ok=True)
+        self.__thread = threading.Thread(target=self.__run, name="SessionRecorder", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Дописывает всё из очереди, закрывает файлы и останавливает поток.
+        """
+        if self.__thread is None:
+            return
+        self.__queue.put(_STOP)
+        self.__thread.join()
+        self.__thread = None
+
+    def record_chunk(self, samples: Sequence, timestamps: Sequence):
+        """
+        Ставит блок сырых данных в очередь записи.
+
+        :param samples: Сэмплы блока (n_samples × n_channels)
+        :param timestamps: Временные метки блока
+        """
+        ts = np.asarray(timestamps, dtype=np.float64)
+        if len(ts) == 0:
+            return
+        rows = np.column_stack((ts, np.asarray(samples, dtype=np.float64)))
+        if self.__channels is None:
+            self.__channels = rows.shape[1] - 1
+        elif rows.shape[1] - 1 != self.__channels:
+            raise ValueError(f"Ожидалось {self.__channels} каналов, получено {rows.shape[1] - 1}")
+        self.__last_timestamp = float(ts[-1])
+        self.__put((SAMPLES_FILE, rows))
+
+    def record_event(self, kind: int, timestamp: Optional[float] = None, values: Sequence[float] = ()):
+        """
+        Ставит событие в очередь записи.
+
+        :param kind: Тип события: EVENT_BLINK, EVENT_CLENCH или EVENT_RHYTHM
+        :param timestamp: Время события; None — метка последнего записанного сэмпла
+        :param values: До трёх значений, сопровождающих событие
+        """
+        record = np.zeros(1, dtype=EVENT_DTYPE)
+        record["kind"] = kind
+        record["timestamp"] = self.__last_timestamp if timestamp is None else timestamp
+        record["values"][0, :len(values)] = values
+        self.__put((EVENTS_FILE, record))
+
+    def record_events(self, kind: int, timestamps: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None):
+        """
+        Ставит в очередь записи все события блока одним элементом.
+
+        :param kind: Тип событий: EVENT_BLINK, EVENT_CLENCH или EVENT_RHYTHM
+        :param timestamps: Времена событий; None — метка последнего записанного сэмпла для всех,
+                           NaN — для отдельных событий
+        :param values: Матрица сопровождающих значений (n_events, до трёх столбцов)
+        """
+        count = len(timestamps) if timestamps is not None else len(values)
+        if count == 0:
+            return
+        records = np.zeros(count, dtype=EVENT_DTYPE)
+        records["kind"] = kind
+        records["timestamp"] = self.__last_timestamp if timestamps is None else timestamps
+        np.copyto(records["timestamp"], self.__last_timestamp, where=np.isnan(records["timestamp"]))
+        if values is not None:
+            records["values"][:, :values.shape[1]] = values
+        self.__put((EVENTS_FILE, records))
+
+    def __put(self, item):
+        """
+        Кладёт элемент в очередь без ожидания; при переполнении элемент отбрасывается.
+        """
+        try:
+            self.__queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def __run(self):
+        """
+        Цикл потока записи.
+        """
+        files = {name: _BlockFile(os.path.join(self.__directory, name), self.__block_size)
+                 for name in (SAMPLES_FILE, EVENTS_FILE)}
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = self.__queue.get(timeout=self.__flush_interval)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    break
+
+                if item is not None:
+                    name, data = item
+                    files[name].append(data.tobytes())
+
+                now = time.monotonic()
+                overdue = now - last_flush >= self.__flush_interval
+                for block_file in files.values():
+                    if overdue or block_file.pending >= self.__block_size:
+                        block_file.flush()
+                if overdue:
+                    last_flush = now
+        finally:
+            for block_file in files.values():
+                block_file.close()
+
+
+class RecordingBlinkListener(BlinkDetectorListener):
+    """
+    Записывает моргания и передаёт их исходному слушателю.
+
+    :param recorder: Объект записи сеанса
+    :param listener: Исходный слушатель; None — только запись
+    """
+
+    def __init__(self, recorder: SessionRecorder, listener: Optional[BlinkDetectorListener]):
+        self.__recorder = recorder
+        self.__listener = listener
+
+    def on_blink(self, timestamp: float) -> None:
+        self.__recorder.record_event(EVENT_BLINK, timestamp)
+        if self.__listener is not None:
+            self.__listener.on_blink(timestamp)
+
+    def on_blinks(self, timestamps) -> None:
+        self.__recorder.record_events(EVENT_BLINK, timestamps)
+        if self.__listener is not None:
+            emit_blinks(self.__listener, timestamps)
+
+
+class RecordingJawClenchListener(JawClenchDetectorListener):
+    """
+    Записывает сжатия челюсти и передаёт их исходному слушателю.
+
+    :param recorder: Объект записи сеанса
+    :param listener: Исходный слушатель; None — только запись
+    """
+
+    def __init__(self, recorder: SessionRecorder, listener: Optional[JawClenchDetectorListener]):
+        self.__recorder = recorder
+        self.__listener = listener
+
+    def on_clench(self, timestamp: float) -> None:
+        self.__recorder.record_event(EVENT_CLENCH, timestamp)
+        if self.__listener is not None:
+            self.__listener.on_clench(timestamp)
+
+    def on_clenches(self, timestamps) -> None:
+        self.__recorder.record_events(EVENT_CLENCH, timestamps)
+        if self.__listener is not None:
+            emit_clenches(self.__listener, timestamps)
+
+
+class RecordingRhythmListener(RhythmListenerWrapper):
+    """
+    Записывает оценки ритмов и передаёт их исходному слушателю.
+
+    Оценки записываются из ``on_band_estimates``, поэтому каждая получает
+    свою метку — метку последнего вошедшего в неё сэмпла.
+
+    :param recorder: Объект записи сеанса
+    :param listener: Исходный слушатель; None — только запись
+    """
+
+    def __init__(self, recorder: SessionRecorder, listener: Optional[RhythmAnalyzerListener]):
+        super().__init__(listener)
+        self.__recorder = recorder
+
+    def on_rhythms(self, rhythms) -> None:
+        self.forward_rhythms(rhythms)
+
+    def on_band_estimates(self, timestamps, band_powers, band_names) -> None:
+        self.__recorder.record_events(EVENT_RHYTHM, timestamps, band_rhythms(band_powers, band_names))
+        self.forward("on_band_estimates", timestamps, band_powers, band_names)
@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-from collections import deque
+from typing import Dict, Optional, Sequence, Tuple
 
 import numpy as np
-from scipy.fft import rfft, rfftfreq
-from scipy.signal import windows
+from numpy.lib.stride_tricks import sliding_window_view
+
+from buffer.ring_buffer import RingBuffer
+from filter.decimator import Decimator, decimation_factor
+from rhytm.spectral_plan import DEFAULT_BANDS, SlidingDFT, SpectralPlan
 
 
 class RhythmAnalyzerListener(ABC):
@@ -20,57 +23,402 @@ class RhythmAnalyzerListener(ABC):
         """
         pass
 
+    def on_band_powers(self, band_powers: Dict[str, float]) -> None:
+        """
+        Вызывается при каждом анализе спектра с мощностями всех настроенных полос.
+
+        Необязателен: слушатели без этого метода получают только ``on_rhythm``.
+
+        :param band_powers: Мощность по имени полосы
+        """
+        pass
+
+    def on_band_matrix(self, band_powers: np.ndarray, band_names: Tuple[str, ...],
+                       channels: Tuple[int, ...]) -> None:
+        """
+        Вызывается при каждом анализе спектра с мощностями полос по всем каналам.
+
+        Необязателен: слушатели без этого метода получают только ``on_rhythm``.
+
+        :param band_powers: Матрица мощностей формы (n_channels, n_bands)
+        :param band_names: Имена полос в порядке столбцов
+        :param channels: Индексы каналов в порядке строк
+        """
+        pass
+
+    def on_band_estimates(self, timestamps: np.ndarray, band_powers: np.ndarray,
+                          band_names: Tuple[str, ...]) -> None:
+        """
+        Вызывается после анализа блока со всеми оценками мощностей полос опорного канала.
+
+        Необязателен: слушатели без этого метода получают только ``on_rhythm``.
+
+        :param timestamps: Метка каждой оценки — метка последнего вошедшего в неё сэмпла;
+                           NaN, если метки не переданы в ``analyze``
+        :param band_powers: Матрица формы (n_estimates, n_bands)
+        :param band_names: Имена полос в порядке столбцов
+        """
+        pass
+
+    def on_spectrum(self, freqs: np.ndarray, spectrum: np.ndarray) -> None:
+        """
+        Вызывается при каждом анализе спектра с амплитудным спектром опорного канала.
+
+        Необязателен: слушатели без этого метода получают только ``on_rhythm``.
+        В режиме 'sdft' полный спектр не вычисляется и метод не вызывается.
+
+        :param freqs: Частоты бинов в Гц
+        :param spectrum: Амплитуды спектра для частот ``freqs``
+        """
+        pass
+
+
+class RhythmBatchListener(RhythmAnalyzerListener):
+    """
+    Слушатель, получающий все оценки ритмов блока одним вызовом.
+
+    Подходит везде, где ожидается RhythmAnalyzerListener: одиночный ``on_rhythm``
+    передаётся в ``on_rhythms`` матрицей из одной строки.
+    """
+
+    @abstractmethod
+    def on_rhythms(self, rhythms: np.ndarray) -> None:
+        """
+        Обрабатывает все оценки ритмов блока.
+
+        :param rhythms: Матрица формы (n_estimates, 3): альфа, бета, альфа/бета — по строке на оценку
+        """
+        pass
+
+    def on_rhythm(self, alpha_power: float, beta_power: float, alpha_beta_ratio: float) -> None:
+        self.on_rhythms(np.array([[alpha_power, beta_power, alpha_beta_ratio]]))
+
+
+def emit_rhythms(listener: RhythmAnalyzerListener, rhythms: np.ndarray):
+    """
+    Передаёт слушателю оценки ритмов блока: одним вызовом ``on_rhythms``, если
+    слушатель его поддерживает, иначе по одной через ``on_rhythm``.
+
+    :param listener: Слушатель
+    :param rhythms: Матрица формы (n_estimates, 3): альфа, бета, альфа/бета
+    """
+    if len(rhythms) == 0:
+        return
+    on_rhythms = getattr(listener, "on_rhythms", None)
+    if on_rhythms is not None:
+        on_rhythms(rhythms)
+    else:
+        for alpha_power, beta_power, ratio in rhythms.tolist():
+            listener.on_rhythm(alpha_power, beta_power, ratio)
 
-class _Rhythm:
-    def __init__(self, name: str, start_freq: float, end_freq: float):
-        self.name = name
-        self.start = start_freq
-        self.end = end_freq
+
+def band_rhythms(band_powers: np.ndarray, band_names: Sequence[str]) -> np.ndarray:
+    """
+    Строит оценки ритмов из мощностей полос ``on_band_estimates``.
+
+    :param band_powers: Матрица формы (n_estimates, n_bands)
+    :param band_names: Имена полос в порядке столбцов; должны включать альфа и бета
+    :return: Матрица формы (n_estimates, 3): альфа, бета, альфа/бета — как в ``on_rhythms``
+    """
+    names = list(band_names)
+    alpha = band_powers[:, names.index("alpha")]
+    beta = band_powers[:, names.index("beta")]
+    return np.column_stack((alpha, beta, alpha / (beta + 1e-8)))
+
+
+class RhythmListenerWrapper(RhythmBatchListener):
+    """
+    Основа обёрток слушателя ритмов: записи, публикации, метрик.
+
+    Необязательные методы RhythmAnalyzerListener передаются обёрнутому
+    слушателю через ``forward``, только если он их поддерживает, поэтому
+    новый необязательный метод достаточно добавить сюда. Обёртка
+    реализует ``on_rhythms`` и переопределяет необязательные методы,
+    которые обрабатывает сама.
+
+    :param listener: Обёрнутый слушатель; None — вызовы никуда не передаются
+    """
+
+    def __init__(self, listener: Optional[RhythmAnalyzerListener]):
+        self.__listener = listener
+
+    @property
+    def listener(self) -> Optional[RhythmAnalyzerListener]:
+        """Обёрнутый слушатель."""
+        return self.__listener
+
+    def forward(self, method: str, *args):
+        """
+        Вызывает необязательный метод обёрнутого слушателя, если он есть.
+
+        :param method: Имя метода
+        :param args: Аргументы вызова
+        """
+        handler = getattr(self.__listener, method, None)
+        if handler is not None:
+            handler(*args)
+
+    def forward_rhythms(self, rhythms: np.ndarray):
+        """
+        Передаёт оценки ритмов блока обёрнутому слушателю (см. ``emit_rhythms``).
+
+        :param rhythms: Матрица формы (n_estimates, 3): альфа, бета, альфа/бета
+        """
+        if self.__listener is not None:
+            emit_rhythms(self.__listener, rhythms)
+
+    def on_band_powers(self, band_powers: Dict[str, float]) -> None:
+        self.forward("on_band_powers", band_powers)
+
+    def on_band_matrix(self, band_powers: np.ndarray, band_names: Tuple[str, ...],
+                       channels: Tuple[int, ...]) -> None:
+        self.forward("on_band_matrix", band_powers, band_names, channels)
+
+    def on_band_estimates(self, timestamps: np.ndarray, band_powers: np.ndarray,
+                          band_names: Tuple[str, ...]) -> None:
+        self.forward("on_band_estimates", timestamps, band_powers, band_names)
+
+    def on_spectrum(self, freqs: np.ndarray, spectrum: np.ndarray) -> None:
+        self.forward("on_spectrum", freqs, spectrum)
 
 
 class RhythmAnalyzer:
     """
-    Класс для анализа спектра сигнала и извлечения мощности альфа и бета ритмов.
+    Класс для анализа спектра сигнала и извлечения мощности ритмов.
+
+    Все полосы вычисляются за один БПФ по предвычисленному плану; альфа- и
+    бета-диапазоны добавляются в набор всегда, так как из них строится ``on_rhythm``.
+
+    Режимы оценки:
+
+    * ``'fft'`` — БПФ по всему накопленному окну;
+    * ``'welch'`` — среднее амплитудных спектров перекрывающихся сегментов;
+    * ``'sdft'`` — скользящее ДПФ только по бинам полос, результат выдаётся
+      после заполнения окна целиком.
+
+    Без ``hop`` оценка выполняется на каждый полученный блок; с ``hop`` —
+    ровно через каждые ``hop`` секунд сигнала независимо от размера блоков.
+
+    Мощности считаются для всех анализируемых каналов одним БПФ вдоль оси
+    времени и выдаются матрицей каналы × полосы через ``on_band_matrix``;
+    ``on_rhythm`` и ``on_band_powers`` — строка опорного канала этой матрицы,
+    ``on_spectrum`` — спектр опорного канала (например, для спектрограммы).
+    Все оценки блока с их метками времени выдаются одним вызовом
+    ``on_band_estimates`` после ``on_rhythms``.
+
+    :param fs: Частота дискретизации в Гц
+    :param fft_len: Размер БПФ; None — ближайший быстрый размер к длине окна
+    :param bands: Полосы: имя -> (нижняя, верхняя частота) в Гц (по умолчанию DEFAULT_BANDS)
+    :param window: Длина окна анализа в секундах
+    :param hop: Шаг между оценками в секундах; None — одна оценка на блок
+    :param mode: Режим оценки: 'fft', 'welch' или 'sdft'
+    :param welch_segment: Длина сегмента Уэлча в секундах
+    :param welch_overlap: Доля перекрытия сегментов Уэлча
+    :param channels: Индексы анализируемых каналов; None — все каналы блока
+    :param reference_channel: Канал, из которого строятся ``on_rhythm`` и ``on_band_powers``
+    :param target_rate: Частота, до которой прореживаются каналы перед анализом; None — без прореживания.
+        Коэффициент уменьшается, если верхняя граница какой-либо полосы не помещается в полосу пропускания
     """
 
-    def __init__(self, fs: int = 125, fft_len: int = 4096):
+    def __init__(self, fs: float = 125, fft_len: Optional[int] = 4096,
+                 bands: Optional[Dict[str, Tuple[float, float]]] = None,
+                 window: float = 2.0, hop: Optional[float] = None, mode: str = 'fft',
+                 welch_segment: float = 1.0, welch_overlap: float = 0.5,
+                 channels: Optional[Sequence[int]] = None, reference_channel: int = 3,
+                 target_rate: Optional[float] = 125):
+        if mode not in ('fft', 'welch', 'sdft'):
+            raise ValueError(f"Неизвестный режим анализа: {mode}")
+        if channels is not None and reference_channel not in channels:
+            raise ValueError(f"Опорный канал {reference_channel} не входит в анализируемые каналы")
+
+        self.__bands = dict(DEFAULT_BANDS if bands is None else bands)
+        self.__bands.setdefault("alpha", DEFAULT_BANDS["alpha"])
+        self.__bands.setdefault("beta", DEFAULT_BANDS["beta"])
+
+        factor = decimation_factor(fs, target_rate)
+        top = max(high for _, high in self.__bands.values())
+        while factor > 1 and top > 0.4 * fs / factor:
+            factor -= 1
+        self.__decimator = Decimator(factor, fs=fs) if factor > 1 else None
+        fs = fs / factor
+
         self.__fs = fs
         self.__fft_len = fft_len
-        self.__buffer = deque(maxlen=fs * 2)
-        self.__alpha = _Rhythm("alpha", 8, 13)
-        self.__beta = _Rhythm("beta", 14, 30)
+        self.__mode = mode
+        self.__window = int(round(window * fs))
+        self.__buffer: Optional[RingBuffer] = None
+        self.__channels = None if channels is None else tuple(channels)
+        self.__reference_channel = reference_channel
+        self.__reference_row = None if channels is None else self.__channels.index(reference_channel)
+        self.__hop = None if hop is None else max(1, int(round(hop * fs)))
+        self.__hop_seconds = None if hop is None else self.__hop / fs
+        self.__last_timestamp = np.nan
+        self.__until_hop = self.__hop
+        self.__plans: Dict[int, SpectralPlan] = {}
+        self.__min_fill = min(int(round(fs)), self.__window)
+
+        self.__welch_plan = None
+        self.__sdft = None
+        if mode == 'welch':
+            segment = min(int(round(welch_segment * fs)), self.__window)
+            self.__welch_plan = SpectralPlan(segment, fs, self.__bands, fft_len)
+            self.__welch_step = max(1, int(round(segment * (1 - welch_overlap))))
+            self.__min_fill = max(self.__min_fill, segment)
+        elif mode == 'sdft':
+            self.__sdft = SlidingDFT(self.__window, fs, self.__bands)
+            self.__min_fill = self.__window
+
+    @property
+    def band_names(self) -> Tuple[str, ...]:
+        """Имена анализируемых полос в порядке столбцов ``on_band_estimates``."""
+        return tuple(self.__bands)
+
+    @property
+    def hop(self) -> Optional[float]:
+        """Шаг между оценками в секундах; None — одна оценка на блок."""
+        return self.__hop_seconds
 
-    def analyze(self, samples: list[list[float]], listener: RhythmAnalyzerListener):
+    def analyze(self, samples: list[list[float]], listener: RhythmAnalyzerListener,
+                timestamps: Optional[Sequence[float]] = None):
         """
         Выполняет спектральный анализ и вызывает слушатель с результатами.
 
-        :param samples: Список сэмплов (массив каналов)
+        Оценки ``on_rhythm`` всего блока передаются после анализа одним
+        вызовом ``on_rhythms``, если слушатель его поддерживает.
+
+        :param samples: Сэмплы блока (n_samples × n_channels), список или массив numpy
         :param listener: Объект, реализующий интерфейс RhythmAnalyzerListener
+        :param timestamps: Временные метки блока для ``on_band_estimates``; None — без меток
+        """
+        data = np.asarray(samples, dtype=float)
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype=float)
+        if self.__channels is None:
+            self.__channels = tuple(range(data.shape[1]))
+            self.__reference_row = self.__reference_channel
+        else:
+            data = data[:, self.__channels]
+        if self.__decimator is not None:
+            data, timestamps = self.__decimator.process(data, timestamps)
+        if self.__buffer is None:
+            self.__buffer = RingBuffer(self.__window, channels=len(self.__channels))
+
+        rhythms = []
+        estimates = []
+        if self.__hop is None:
+            self.__push(data, timestamps)
+            self.__estimate(listener, rhythms, estimates)
+        else:
+            start = 0
+            while start < len(data):
+                take = min(self.__until_hop, len(data) - start)
+                self.__push(data[start:start + take], None if timestamps is None else timestamps[start:start + take])
+                start += take
+                self.__until_hop -= take
+                if self.__until_hop == 0:
+                    self.__until_hop = self.__hop
+                    self.__estimate(listener, rhythms, estimates)
+        emit_rhythms(listener, np.array(rhythms))
+
+        on_band_estimates = getattr(listener, "on_band_estimates", None)
+        if on_band_estimates is not None and estimates:
+            estimate_timestamps = np.array([timestamp for timestamp, _ in estimates])
+            on_band_estimates(estimate_timestamps, np.array([powers for _, powers in estimates]), self.band_names)
+
+    def reset(self):
+        """
+        Очищает окно анализа, например после разрыва в данных. Оценки
+        возобновляются, когда окно снова наполнится.
         """
-        for s in samples:
-            self.__buffer.append(s[3])
+        if self.__buffer is not None:
+            self.__buffer.clear()
+        if self.__sdft is not None:
+            self.__sdft.reset()
+        if self.__decimator is not None:
+            self.__decimator.reset()
+        self.__until_hop = self.__hop
+        self.__last_timestamp = np.nan
 
-        if len(self.__buffer) < self.__fs:
+    def __push(self, piece: np.ndarray, timestamps: Optional[np.ndarray]):
+        """
+        Добавляет отсчёты в окно и, в режиме 'sdft', сдвигает скользящее ДПФ.
+
+        :param piece: Новые отсчёты
+        :param timestamps: Их временные метки или None
+        """
+        if timestamps is not None and len(timestamps):
+            self.__last_timestamp = float(timestamps[-1])
+        sdft = self.__sdft
+        if sdft is None or not sdft.ready or len(piece) > self.__window:
+            self.__buffer.extend(piece)
+            if sdft is not None and len(self.__buffer) == self.__window:
+                sdft.sync(self.__buffer.latest())
+            return
+
+        delta = piece - self.__buffer.latest()[:len(piece)]
+        self.__buffer.extend(piece)
+        sdft.update(delta)
+        if sdft.stale:
+            sdft.sync(self.__buffer.latest())
+
+    def __estimate(self, listener: RhythmAnalyzerListener, rhythms: list, estimates: list):
+        """
+        Оценивает мощности полос по текущему окну и сообщает слушателю.
+
+        Строка альфа, бета, альфа/бета добавляется в ``rhythms``, а пара (метка,
+        мощности полос) — в ``estimates``; они передаются слушателю после
+        анализа всего блока, мощности полос и спектр — сразу.
+
+        :param listener: Объект, реализующий интерфейс RhythmAnalyzerListener
+        :param rhythms: Оценки ритмов текущего блока
+        :param estimates: Оценки мощностей полос текущего блока с метками
+        """
+        if len(self.__buffer) < self.__min_fill:
             return
 
-        y = np.array(self.__buffer)
-        y = y * windows.hamming(len(y))
-        yf = np.abs(rfft(y, n=self.__fft_len))
-        xf = rfftfreq(self.__fft_len, d=1 / self.__fs)
+        plan = None
+        if self.__sdft is not None:
+            names = self.__sdft.band_names
+            powers = self.__sdft.band_powers()
+        else:
+            y = self.__buffer.latest()
+            if self.__welch_plan is not None:
+                plan = self.__welch_plan
+                segments = sliding_window_view(y, plan.n, axis=0)[::self.__welch_step].transpose(2, 0, 1)
+                spectrum = plan.spectrum(segments).mean(axis=1)
+            else:
+                plan = self.__plan(len(y))
+                spectrum = plan.spectrum(y)
+            names = plan.band_names
+            powers = plan.band_powers(spectrum)
 
-        alpha_power = self.__sum_power(xf, yf, self.__alpha)
-        beta_power = self.__sum_power(xf, yf, self.__beta)
+        matrix = powers.T
+        band_powers = dict(zip(names, matrix[self.__reference_row].tolist()))
+        alpha_power = band_powers["alpha"]
+        beta_power = band_powers["beta"]
         ratio = alpha_power / (beta_power + 1e-8)
 
-        listener.on_rhythm(alpha_power, beta_power, ratio)
+        rhythms.append((alpha_power, beta_power, ratio))
+        estimates.append((self.__last_timestamp, matrix[self.__reference_row]))
+        on_band_powers = getattr(listener, "on_band_powers", None)
+        if on_band_powers is not None:
+            on_band_powers(band_powers)
+        on_band_matrix = getattr(listener, "on_band_matrix", None)
+        if on_band_matrix is not None:
+            on_band_matrix(matrix, names, self.__channels)
+        on_spectrum = getattr(listener, "on_spectrum", None)
+        if on_spectrum is not None and plan is not None:
+            on_spectrum(plan.freqs, spectrum[:, self.__reference_row])
 
-    def __sum_power(self, x: np.ndarray, y: np.ndarray, rhythm: _Rhythm) -> float:
+    def __plan(self, n: int) -> SpectralPlan:
         """
-        Суммирует мощность в заданном диапазоне частот.
+        Возвращает план для окна длины ``n``, создавая его при первом обращении.
 
-        :param x: Частотный вектор
-        :param y: Спектр сигнала
-        :param rhythm: Объект ритма с диапазоном частот
-        :return: Суммарная мощность в этом диапазоне
+        :param n: Длина окна в отсчётах
+        :return: Спектральный план
         """
-        return float(np.sum([v for f, v in zip(x, y) if rhythm.start <= f <= rhythm.end]))
+        plan = self.__plans.get(n)
+        if plan is None:
+            plan = SpectralPlan(n, self.__fs, self.__bands, self.__fft_len)
+            self.__plans[n] = plan
+        return plan
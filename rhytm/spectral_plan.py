@@ -0,0 +1,153 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.fft import next_fast_len, rfft, rfftfreq
+from scipy.signal import windows
+
+DEFAULT_BANDS: Dict[str, Tuple[float, float]] = {
+    "delta": (1, 4),
+    "theta": (4, 8),
+    "alpha": (8, 13),
+    "beta": (14, 30),
+    "gamma": (30, 45),
+}
+
+
+class SpectralPlan:
+    """
+    Предвычисленный план спектрального анализа окна фиксированной длины.
+
+    Хранит окно Хэмминга, размер БПФ и диапазоны индексов бинов для каждой
+    полосы, поэтому мощности всех полос получаются за один БПФ и разности
+    накопленной суммы спектра.
+
+    :param n: Длина окна анализа в отсчётах
+    :param fs: Частота дискретизации в Гц
+    :param bands: Полосы: имя -> (нижняя, верхняя частота) в Гц, границы включаются
+    :param fft_len: Размер БПФ; None — ближайший быстрый размер не меньше ``n``
+    """
+
+    def __init__(self, n: int, fs: float, bands: Dict[str, Tuple[float, float]],
+                 fft_len: Optional[int] = None):
+        self.n = n
+        self.fs = fs
+        self.fft_len = next_fast_len(n, real=True) if fft_len is None else fft_len
+        self.band_names = tuple(bands)
+        self.freqs = rfftfreq(self.fft_len, d=1 / fs)
+        self.window = windows.hamming(n)
+
+        edges = np.array([bands[name] for name in self.band_names], dtype=float).reshape(-1, 2)
+        self.band_start = np.searchsorted(self.freqs, edges[:, 0], side='left')
+        self.band_stop = np.searchsorted(self.freqs, edges[:, 1], side='right')
+        self.__work = np.empty(n)
+        self.__cumulative = np.empty(len(self.freqs) + 1)
+        self.__cumulative[0] = 0.0
+
+    def spectrum(self, y: np.ndarray) -> np.ndarray:
+        """
+        Вычисляет амплитудный спектр окна.
+
+        :param y: Отсчёты окна длиной ``n``; ось времени — первая, остальные оси
+                  (например, сегменты или каналы) обрабатываются одним БПФ
+        :return: Модуль БПФ для частот ``freqs`` вдоль первой оси
+        """
+        if y.ndim == 1:
+            np.multiply(y, self.window, out=self.__work)
+            return np.abs(rfft(self.__work, n=self.fft_len))
+        window = self.window.reshape((-1,) + (1,) * (y.ndim - 1))
+        return np.abs(rfft(y * window, n=self.fft_len, axis=0))
+
+    def band_powers(self, spectrum: np.ndarray) -> np.ndarray:
+        """
+        Суммирует спектр по всем полосам плана.
+
+        :param spectrum: Амплитудный спектр, полученный из ``spectrum``; ось частот — первая
+        :return: Мощности полос в порядке ``band_names`` вдоль первой оси
+        """
+        if spectrum.ndim == 1:
+            np.cumsum(spectrum, out=self.__cumulative[1:])
+            cumulative = self.__cumulative
+        else:
+            cumulative = np.zeros((spectrum.shape[0] + 1,) + spectrum.shape[1:])
+            np.cumsum(spectrum, axis=0, out=cumulative[1:])
+        return cumulative[self.band_stop] - cumulative[self.band_start]
+
+
+class SlidingDFT:
+    """
+    Скользящее ДПФ, обновляющее только бины заданных полос.
+
+    Каждый новый отсчёт обновляет отслеживаемые бины за O(число бинов),
+    без полного БПФ. Окно Хэмминга (периодическое) применяется в частотной
+    области как свёртка из трёх соседних бинов. Для подавления накопления
+    ошибки округления состояние точно пересчитывается раз в ``n`` отсчётов.
+
+    :param n: Длина окна в отсчётах
+    :param fs: Частота дискретизации в Гц
+    :param bands: Полосы: имя -> (нижняя, верхняя частота) в Гц
+    """
+
+    def __init__(self, n: int, fs: float, bands: Dict[str, Tuple[float, float]]):
+        plan = SpectralPlan(n, fs, bands, fft_len=n)
+        self.n = n
+        self.band_names = plan.band_names
+        first = int(plan.band_start.min())
+        self.__bins = np.arange(first - 1, int(plan.band_stop.max()) + 1)
+        self.__band_start = plan.band_start - first
+        self.__band_stop = plan.band_stop - first
+        self.__dft = np.exp(-2j * np.pi * np.outer(self.__bins, np.arange(n)) / n)
+        self.__state: Optional[np.ndarray] = None
+        self.__since_sync = 0
+
+    @property
+    def ready(self) -> bool:
+        """Состояние инициализировано полным окном."""
+        return self.__state is not None
+
+    @property
+    def stale(self) -> bool:
+        """Пора точно пересчитать состояние по окну."""
+        return self.__since_sync >= self.n
+
+    def sync(self, y: np.ndarray):
+        """
+        Точно вычисляет отслеживаемые бины по полному окну.
+
+        :param y: Последние ``n`` отсчётов в хронологическом порядке, форма (n,) или (n, n_channels)
+        """
+        self.__state = self.__dft @ y
+        self.__since_sync = 0
+
+    def update(self, delta: np.ndarray):
+        """
+        Сдвигает окно на ``len(delta)`` отсчётов.
+
+        :param delta: Разности новых и вытесняемых отсчётов (x[i] - x[i - n]),
+                      форма (m,) или (m, n_channels)
+        """
+        m = len(delta)
+        exponent = (m - np.arange(m)) % self.n
+        twiddle = np.exp(2j * np.pi * np.outer(self.__bins, exponent) / self.n)
+        rotation = np.exp(2j * np.pi * self.__bins * (m % self.n) / self.n)
+        rotation = rotation.reshape((-1,) + (1,) * (delta.ndim - 1))
+        self.__state = rotation * self.__state + twiddle @ delta
+        self.__since_sync += m
+
+    def band_powers(self) -> np.ndarray:
+        """
+        Суммирует взвешенный окном спектр по полосам.
+
+        :return: Мощности полос в порядке ``band_names`` вдоль первой оси
+        """
+        x = self.__state
+        windowed = np.abs(0.54 * x[1:-1] - 0.23 * (x[:-2] + x[2:]))
+        cumulative = np.zeros((windowed.shape[0] + 1,) + windowed.shape[1:])
+        np.cumsum(windowed, axis=0, out=cumulative[1:])
+        return cumulative[self.__band_stop] - cumulative[self.__band_start]
+
+    def reset(self):
+        """
+        Сбрасывает состояние до следующей синхронизации.
+        """
+        self.__state = None
+        self.__since_sync = 0
@@ -0,0 +1,97 @@
+import numpy as np
+
+from buffer.ring_buffer import RingBuffer
+
+
+class Spectrogram:
+    """
+    Скользящая спектрограмма фиксированного размера для отображения.
+
+    Каждый спектр RhythmAnalyzer сводится к столбцу фиксированной длины —
+    средней амплитуде в полосах шириной ``resolution`` Гц до ``max_freq`` Гц
+    в децибелах — и дописывается в кольцевой буфер на ``history`` столбцов.
+    Обновление записывает только новый столбец, а изображение — непрерывное
+    представление буфера без копирования, поэтому память и стоимость
+    обновления не зависят от длительности сессии.
+
+    Подключается как слушатель ритмов (метод ``on_spectrum``) или получает
+    столбцы через ``append``, если спектры сводятся в другом потоке.
+
+    :param history: Число хранимых столбцов (оценок спектра)
+    :param max_freq: Верхняя отображаемая частота в Гц
+    :param resolution: Ширина строки изображения в Гц
+    :param floor: Уровень в дБ, которым заполнено изображение до первых спектров
+    """
+
+    def __init__(self, history: int = 600, max_freq: float = 40.0, resolution: float = 0.5,
+                 floor: float = 0.0):
+        if max_freq <= 0 or resolution <= 0:
+            raise ValueError("Частота и разрешение должны быть положительными")
+        self.rows = int(np.ceil(max_freq / resolution))
+        self.edges = np.arange(self.rows + 1) * resolution
+        self.floor = floor
+        self.version = 0
+        self.__buffer = RingBuffer(history, channels=self.rows)
+        self.__freqs_len = None
+        self.__start = None
+        self.__stop = None
+        self.__cumulative = None
+        self.clear()
+
+    @property
+    def history(self) -> int:
+        """Число столбцов изображения."""
+        return self.__buffer.capacity
+
+    @property
+    def image(self) -> np.ndarray:
+        """
+        Изображение формы (history, rows): время по первой оси, частота — по второй.
+
+        Представление буфера без копирования, действительное до следующего ``append``.
+        """
+        return self.__buffer.latest()
+
+    def reduce(self, freqs: np.ndarray, spectrum: np.ndarray) -> np.ndarray:
+        """
+        Сводит амплитудный спектр к столбцу изображения.
+
+        Границы строк в бинах вычисляются один раз для данной сетки частот,
+        после чего средние по строкам получаются из накопленной суммы спектра.
+
+        :param freqs: Частоты бинов в Гц (по возрастанию)
+        :param spectrum: Амплитуды для частот ``freqs``
+        :return: Столбец длиной ``rows`` в дБ; строки без бинов повторяют ближайший нижний бин
+        """
+        if self.__freqs_len != len(freqs):
+            self.__start = np.searchsorted(freqs, self.edges[:-1], side='left')
+            self.__stop = np.searchsorted(freqs, self.edges[1:], side='left')
+            # Строка уже шага сетки частот берёт ближайший бин
+            self.__stop = np.maximum(self.__stop, np.minimum(self.__start + 1, len(freqs)))
+            self.__start = np.minimum(self.__start, self.__stop - 1)
+            self.__cumulative = np.zeros(len(freqs) + 1)
+            self.__freqs_len = len(freqs)
+
+        np.cumsum(spectrum, out=self.__cumulative[1:])
+        mean = (self.__cumulative[self.__stop] - self.__cumulative[self.__start]) / (self.__stop - self.__start)
+        return 20 * np.log10(mean + 1e-12)
+
+    def append(self, columns: np.ndarray):
+        """
+        Дописывает один или несколько столбцов, вытесняя самые старые.
+
+        :param columns: Столбец длиной ``rows`` из ``reduce`` или матрица (n, rows) таких столбцов
+        """
+        self.__buffer.extend(np.asarray(columns).reshape(-1, self.rows))
+        self.version += 1
+
+    def on_spectrum(self, freqs: np.ndarray, spectrum: np.ndarray) -> None:
+        self.append(self.reduce(freqs, spectrum))
+
+    def clear(self):
+        """
+        Заполняет изображение уровнем ``floor``.
+        """
+        self.__buffer.clear()
+        self.__buffer.extend(np.full((self.history, self.rows), self.floor))
+        self.version += 1
@@ -0,0 +1,104 @@
+import threading
+
+import numpy as np
+import pytest
+
+from processor.acquisition import AcquisitionThread
+from processor.sources import SampleSource
+
+
+class ListSource(SampleSource):
+    """Отдаёт заранее заданные блоки; ``drained`` — все блоки отданы и уже поставлены в очередь."""
+
+    def __init__(self, chunks, generations=None):
+        self.chunks = list(chunks)
+        self.generations = generations or [0] * len(self.chunks)
+        self.position = 0
+        self.drained = threading.Event()
+
+    def open(self):
+        return True
+
+    def pull_chunk(self, timeout=0.0):
+        if self.position == len(self.chunks):
+            self.drained.set()
+            return np.empty((0, 1)), np.empty(0)
+        chunk = self.chunks[self.position]
+        self.position += 1
+        return chunk, chunk[:, 0]
+
+    @property
+    def exhausted(self):
+        return self.position == len(self.chunks)
+
+    @property
+    def generation(self):
+        return self.generations[max(self.position - 1, 0)]
+
+
+def make_chunks(count, size=4):
+    return [np.arange(i * size, (i + 1) * size, dtype=float).reshape(-1, 1) for i in range(count)]
+
+
+def fill(policy, chunks, queue_size=3, generations=None):
+    source = ListSource(chunks, generations)
+    acquisition = AcquisitionThread(source, queue_size=queue_size, policy=policy, pull_timeout=0.01)
+    acquisition.start()
+    assert source.drained.wait(5)
+    return acquisition
+
+
+def drain(acquisition):
+    received = []
+    while not acquisition.finished:
+        chunk = acquisition.get(timeout=1)
+        if chunk is not None:
+            received.append(chunk)
+    acquisition.stop()
+    return received
+
+
+def test_drop_newest_keeps_first_chunks():
+    acquisition = fill('drop_newest', make_chunks(10))
+    received = drain(acquisition)
+    np.testing.assert_array_equal(np.concatenate([t for _, t, _ in received]), np.arange(12))
+    assert acquisition.dropped_samples == 28
+
+
+def test_drop_oldest_keeps_last_chunks():
+    acquisition = fill('drop_oldest', make_chunks(10))
+    received = drain(acquisition)
+    np.testing.assert_array_equal(np.concatenate([t for _, t, _ in received]), np.arange(28, 40))
+    assert acquisition.dropped_samples == 28
+
+
+def test_coalesce_loses_nothing():
+    acquisition = fill('coalesce', make_chunks(10))
+    received = drain(acquisition)
+    assert len(received) <= 3
+    samples = np.concatenate([s for s, _, _ in received])
+    np.testing.assert_array_equal(samples[:, 0], np.arange(40))
+    np.testing.assert_array_equal(np.concatenate([t for _, t, _ in received]), np.arange(40))
+    assert acquisition.dropped_samples == 0
+
+
+def test_coalesce_does_not_merge_generations():
+    acquisition = fill('coalesce', make_chunks(4), queue_size=1, generations=[0, 0, 1, 1])
+    received = drain(acquisition)
+    assert [generation for _, _, generation in received] == [1]
+    np.testing.assert_array_equal(received[0][1], np.arange(8, 16))
+    assert acquisition.dropped_samples == 8
+
+
+def test_block_waits_for_consumer():
+    source = ListSource(make_chunks(10))
+    acquisition = AcquisitionThread(source, queue_size=2, policy='block', pull_timeout=0.01)
+    acquisition.start()
+    received = drain(acquisition)
+    np.testing.assert_array_equal(np.concatenate([t for _, t, _ in received]), np.arange(40))
+    assert acquisition.dropped_samples == 0
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        AcquisitionThread(ListSource([]), policy='spill')
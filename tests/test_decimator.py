@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from filter.decimator import Decimator, decimation_factor
+from processor.sources import FileSource
+
+FS = 500.0
+
+
+def signal(n: int, channels: int = 2):
+    rng = np.random.default_rng(0)
+    samples = rng.standard_normal((n, channels))
+    timestamps = 100.0 + np.arange(n) / FS
+    return samples, timestamps
+
+
+def run(decimator: Decimator, samples: np.ndarray, timestamps: np.ndarray, sizes):
+    bounds = np.cumsum((0,) + tuple(sizes))
+    assert bounds[-1] == len(samples)
+    outputs = [decimator.process(samples[a:b], timestamps[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    return np.concatenate([out for out, _ in outputs]), np.concatenate([ts for _, ts in outputs])
+
+
+@pytest.mark.parametrize("sizes", [
+    (1, 999),
+    (1, 1, 1, 997),
+    (4, 250, 3, 743),
+    (333, 333, 334),
+    tuple([1] * 1000),
+])
+def test_output_independent_of_chunking(sizes):
+    samples, timestamps = signal(1000)
+    whole, whole_ts = run(Decimator(4, fs=FS), samples, timestamps, (1000,))
+    chunked, chunked_ts = run(Decimator(4, fs=FS), samples, timestamps, sizes)
+    np.testing.assert_allclose(chunked, whole, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(chunked_ts, whole_ts)
+    assert len(whole) == 250
+
+
+def test_timestamps_are_uniform_from_first_sample():
+    samples, timestamps = signal(400)
+    _, out_ts = run(Decimator(5, fs=FS), samples, timestamps, (1, 399))
+    np.testing.assert_allclose(np.diff(out_ts), 5 / FS)
+
+
+def test_passes_through_without_decimation():
+    samples, timestamps = signal(10)
+    out, out_ts = Decimator(1).process(samples, timestamps)
+    assert out is not None and np.array_equal(out, samples)
+    assert np.array_equal(out_ts, timestamps)
+
+
+def test_reset_forgets_history():
+    samples, timestamps = signal(200)
+    decimator = Decimator(4, fs=FS)
+    first, first_ts = decimator.process(samples, timestamps)
+    decimator.reset()
+    again, again_ts = decimator.process(samples, timestamps)
+    np.testing.assert_array_equal(again, first)
+    np.testing.assert_array_equal(again_ts, first_ts)
+
+
+def test_decimation_factor():
+    assert decimation_factor(1000, 125) == 8
+    assert decimation_factor(500, 125) == 4
+    assert decimation_factor(250, 300) == 1
+    assert decimation_factor(250, None) == 1
+
+
+def test_timestamps_may_appear_after_untimed_chunks():
+    samples, timestamps = signal(400)
+    decimator = Decimator(4, fs=FS)
+    out, out_ts = decimator.process(samples[:100])
+    assert out_ts is None
+    out, out_ts = decimator.process(samples[100:], timestamps[100:])
+    assert len(out_ts) == len(out)
+    np.testing.assert_allclose(np.diff(out_ts), 4 / FS)
+
+
+def test_estimated_rate_with_jitter_keeps_nominal_factor():
+    assert decimation_factor(499.99, 125) == 4
+    assert decimation_factor(1000 * (1 - 1e-4), 125) == 8
+    assert decimation_factor(374, 125) == 2
+
+
+def test_replayed_recording_gets_nominal_rate(tmp_path):
+    rng = np.random.default_rng(1)
+    timestamps = 5000.0 + np.arange(2000) / FS + rng.normal(0, 1e-6, 2000)
+    path = str(tmp_path / "session.npy")
+    np.save(path, np.column_stack((timestamps, np.zeros((2000, 8)))))
+    source = FileSource(path)
+    assert source.open()
+    assert source.nominal_srate == FS
+    assert decimation_factor(source.nominal_srate, 125) == 4
+    source.close()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from filter.envelope import RunningRMS
+from filter.refractory import hysteresis_mask
+
+
+def direct_rms(x, window):
+    rms = np.full(x.shape, np.nan)
+    for end in range(window, len(x) + 1):
+        segment = x[end - window:end]
+        full = np.isfinite(segment).all(axis=0)
+        rms[end - 1] = np.where(full, np.sqrt(np.mean(segment ** 2, axis=0)), np.nan)
+    return rms
+
+
+@pytest.mark.parametrize("window", [1, 5, 32])
+def test_running_rms_matches_direct_window(window):
+    rng = np.random.default_rng(window)
+    x = rng.standard_normal((300, 2))
+    x[100, 0] = np.nan
+    envelope = RunningRMS(window)
+    y = np.concatenate([envelope.process(chunk) for chunk in np.array_split(x, [3, 4, 50, 51, 170])])
+    np.testing.assert_allclose(y, direct_rms(x, window), rtol=1e-10, atol=1e-9)
+
+    envelope.reset()
+    np.testing.assert_allclose(envelope.process(x[:, 1]), direct_rms(x[:, 1], window), rtol=1e-10, atol=1e-9)
+
+
+def test_running_rms_rejects_empty_window():
+    with pytest.raises(ValueError):
+        RunningRMS(0)
+
+
+def hysteresis_loop(values, on_threshold, off_threshold, active):
+    mask = []
+    for value in values:
+        if value > on_threshold:
+            active = True
+        elif value < off_threshold:
+            active = False
+        mask.append(active)
+    return mask, active
+
+
+@pytest.mark.parametrize("active", [False, True])
+def test_hysteresis_mask_matches_loop(active):
+    rng = np.random.default_rng(3)
+    values = rng.uniform(0, 10, 200)
+    values[[10, 50]] = np.nan
+    state = expected_state = active
+    for chunk in np.array_split(values, [0, 1, 77, 150]):
+        mask, state = hysteresis_mask(chunk, 6, 4, state)
+        expected, expected_state = hysteresis_loop(chunk, 6, 4, expected_state)
+        np.testing.assert_array_equal(mask, expected)
+        assert state == expected_state
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from recorder.event_store import SessionEventStore
+from recorder.session_recorder import EVENT_BLINK, EVENT_CLENCH, EVENT_RHYTHM
+
+
+def session(seed=0):
+    rng = np.random.default_rng(seed)
+    blinks = np.sort(rng.uniform(0, 100, 150))
+    clenches = np.sort(rng.uniform(0, 100, 40))
+    rhythm_times = np.arange(0.5, 100, 0.5)
+    rhythms = rng.uniform(1, 10, (len(rhythm_times), 3)).astype(np.float32)
+    return blinks, clenches, rhythm_times, rhythms
+
+
+def fill(store, blinks, clenches, rhythm_times, rhythms, chunk=7):
+    for i in range(0, len(rhythm_times), chunk):
+        start, end = rhythm_times[i] - 0.5, rhythm_times[min(i + chunk, len(rhythm_times)) - 1]
+        store.add_events(EVENT_BLINK, blinks[(blinks >= start) & (blinks < end)])
+        store.add_events(EVENT_CLENCH, clenches[(clenches >= start) & (clenches < end)])
+        store.add_rhythms(rhythm_times[i:i + chunk], rhythms[i:i + chunk])
+    store.add_events(EVENT_BLINK, blinks[blinks >= rhythm_times[-1]])
+    store.add_events(EVENT_CLENCH, clenches[clenches >= rhythm_times[-1]])
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_range_queries_match_brute_force(tmp_path, spill):
+    blinks, clenches, rhythm_times, rhythms = session()
+    store = SessionEventStore(str(tmp_path) if spill else None, segment_size=16)
+    fill(store, blinks, clenches, rhythm_times, rhythms)
+    if spill:
+        assert len(list(tmp_path.glob("blinks_*.npy"))) >= 4
+        assert len(list(tmp_path.glob("rhythms_*.npy"))) >= 4
+
+    for start, end in [(None, None), (0, 100), (10.25, 10.25), (3.5, 57.5), (16.0, 16.5), (None, 42.0), (99.0, None)]:
+        lo = -np.inf if start is None else start
+        hi = np.inf if end is None else end
+        np.testing.assert_array_equal(store.events(EVENT_BLINK, start, end), blinks[(blinks >= lo) & (blinks < hi)])
+        assert store.count(EVENT_CLENCH, start, end) == np.count_nonzero((clenches >= lo) & (clenches < hi))
+
+        selected = (rhythm_times >= lo) & (rhythm_times < hi)
+        rows = store.rhythms(start, end)
+        np.testing.assert_array_equal(rows["timestamp"], rhythm_times[selected])
+        np.testing.assert_array_equal(rows["alpha"], rhythms[selected, 0])
+        assert store.count(EVENT_RHYTHM, start, end) == np.count_nonzero(selected)
+
+        means = store.mean_rhythms(start, end)
+        if selected.any():
+            expected = rhythms[selected].astype(np.float64).mean(axis=0)
+            np.testing.assert_allclose([means["alpha"], means["beta"], means["ratio"]], expected, rtol=1e-12)
+        else:
+            assert np.isnan(store.mean_ratio(start, end))
+
+
+def test_spilled_store_keeps_bounded_memory(tmp_path):
+    store = SessionEventStore(str(tmp_path), segment_size=8)
+    store.add_events(EVENT_BLINK, np.arange(100, dtype=float))
+    assert store.count(EVENT_BLINK) == 100
+    assert len(list(tmp_path.glob("blinks_*.npy"))) == 11
+    np.testing.assert_array_equal(store.events(EVENT_BLINK, 37.5, 45), np.arange(38, 45))
+
+
+def test_late_events_are_ordered():
+    store = SessionEventStore()
+    store.add_events(EVENT_BLINK, np.array([1.0, 3.0, 5.0]))
+    store.add_events(EVENT_BLINK, np.array([4.0, 2.0]))
+    np.testing.assert_array_equal(store.events(EVENT_BLINK), [1, 2, 3, 4, 5])
+    np.testing.assert_array_equal(store.events(EVENT_BLINK, 2, 4), [2, 3])
+
+
+def test_rates_and_time_range():
+    store = SessionEventStore()
+    assert np.isnan(store.time_range()[0])
+    store.add_events(EVENT_BLINK, np.arange(0, 60, 2, dtype=float))
+    store.add_rhythms(np.array([60.0]), np.array([[2.0, 1.0, 2.0]]))
+    assert store.time_range() == (0.0, 60.0)
+    assert store.events_per_minute(EVENT_BLINK) == 30
+    assert store.events_per_minute(EVENT_BLINK, 0, 30) == 30
+    assert np.isnan(store.events_per_minute(EVENT_BLINK, 10, 10))
+    summary = store.summary()
+    assert summary["blinks"] == 30 and summary["rhythms"] == 1 and summary["mean_ratio"] == 2.0
@@ -0,0 +1,57 @@
+import pytest
+
+from bench.synthetic import SyntheticEEG, SyntheticSource
+from processor.eeg_processor import EEGProcessor
+from processor.execution import EXECUTION_MODES, DeferredListener
+
+
+class Events:
+    def __init__(self):
+        self.calls = []
+
+    def on_blink(self, timestamp):
+        self.calls.append(("blink", timestamp))
+
+    def on_clench(self, timestamp):
+        self.calls.append(("clench", timestamp))
+
+    def on_rhythm(self, alpha_power, beta_power, alpha_beta_ratio):
+        self.calls.append(("rhythm", alpha_power, beta_power, alpha_beta_ratio))
+
+
+def run(eeg, execution, **listeners):
+    processor = EEGProcessor(source=SyntheticSource(eeg, chunk_size=32), execution=execution, **listeners)
+    assert processor.initialize_stream()
+    while processor.step():
+        pass
+    processor.close()
+
+
+def test_execution_modes_deliver_identical_events():
+    eeg = SyntheticEEG(duration=20, seed=5)
+    results = {}
+    for execution in EXECUTION_MODES:
+        events = Events()
+        run(eeg, execution, blink_listener=events, clench_listener=events, rhythm_listener=events)
+        results[execution] = events.calls
+
+    reference = results[EXECUTION_MODES[0]]
+    assert {call[0] for call in reference} == {"blink", "clench", "rhythm"}
+    for execution in EXECUTION_MODES[1:]:
+        assert results[execution] == reference, execution
+
+
+@pytest.mark.parametrize("execution", EXECUTION_MODES)
+def test_missing_listeners_are_skipped(execution):
+    events = Events()
+    run(SyntheticEEG(duration=5, seed=5), execution, blink_listener=events)
+    assert {call[0] for call in events.calls} <= {"blink"}
+
+
+def test_deferred_listener_drops_calls_without_listener():
+    deferred = DeferredListener()
+    deferred.on_blink(1.0)
+    deferred.replay(None)
+    events = Events()
+    deferred.replay(events)
+    assert events.calls == []
@@ -0,0 +1,81 @@
+import re
+
+import numpy as np
+import pytest
+
+from bench.synthetic import SyntheticEEG, SyntheticSource
+from processor.eeg_processor import EEGProcessor
+from processor.instrumentation import Histogram, PipelineMetrics
+
+
+def test_histogram_percentiles_are_bucket_upper_bounds():
+    histogram = Histogram(buckets_per_decade=10)
+    values = np.arange(1, 101) * 1e-3
+    for value in values:
+        histogram.record(value)
+    step = 10 ** 0.1
+    for q in (50, 90, 99):
+        exact = np.percentile(values, q, method="inverted_cdf")
+        assert exact <= histogram.percentile(q) <= exact * step
+    assert histogram.percentile(100) == pytest.approx(0.1)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["mean"] == pytest.approx(values.mean())
+    assert snapshot["max"] == pytest.approx(0.1)
+
+
+def test_histogram_empty_and_overflow():
+    histogram = Histogram(low=1e-3, high=1.0)
+    assert histogram.percentile(50) == 0.0
+    histogram.record(5.0)
+    histogram.record(7.0)
+    assert histogram.counts[-1] == 2
+    assert histogram.percentile(50) == 7.0
+
+
+def test_prometheus_text():
+    metrics = PipelineMetrics(clock=lambda: 10.0)
+    metrics.stage("blink", started=0.0)
+    metrics.chunk(32, last_timestamp=9.5)
+    metrics.event("blink", 9.75)
+    metrics.event("rhythm")
+    text = metrics.to_prometheus()
+
+    assert "# TYPE eeg_stage_seconds histogram" in text
+    assert "# TYPE eeg_event_lag_seconds histogram" in text
+    assert 'eeg_event_lag_seconds_count{event="blink"} 1' in text
+    assert 'eeg_event_lag_seconds_count{event="rhythm"} 1' in text
+    assert re.search(r'^eeg_event_lag_seconds_sum\{event="rhythm"\} 0\.5$', text, re.M)
+    assert "eeg_chunk_samples_count 1" in text
+
+    buckets = [int(count) for count in re.findall(r'^eeg_stage_seconds_bucket\{stage="blink",le="[^"]+"\} (\d+)$',
+                                                     text, re.M)]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == 1
+    assert text.endswith("\n")
+
+
+def test_dump_replaces_file(tmp_path):
+    metrics = PipelineMetrics()
+    path = str(tmp_path / "eeg.prom")
+    metrics.dump(path)
+    with open(path) as f:
+        assert f.read() == metrics.to_prometheus()
+    assert not (tmp_path / "eeg.prom.tmp").exists()
+
+
+def test_processor_metrics_without_listeners():
+    eeg = SyntheticEEG(duration=10, seed=1)
+    metrics = PipelineMetrics(clock=lambda: eeg.duration)
+    processor = EEGProcessor(source=SyntheticSource(eeg, chunk_size=25), metrics=metrics)
+    assert processor.initialize_stream()
+    while processor.step():
+        pass
+    processor.close()
+
+    snapshot = metrics.snapshot()
+    chunks = len(eeg.timestamps) // 25
+    assert snapshot["chunk_sizes"]["count"] == chunks
+    for stage in ("pull", "preprocess", "blink", "jaw", "rhythm"):
+        assert snapshot["stages"][stage]["count"] == chunks
+    assert snapshot["event_lag"]["rhythm"]["count"] > 0
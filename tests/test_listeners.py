@@ -0,0 +1,98 @@
+import numpy as np
+
+from blink.blink_detector import BlinkBatchListener, emit_blinks
+from processor.execution import DeferredListener
+from processor.instrumentation import PipelineMetrics, TimedRhythmListener
+from processor.publisher import PublishingRhythmListener, ResultPublisher
+from recorder.session_recorder import RecordingRhythmListener, SessionRecorder
+from rhytm.rhytm_analyzer import RhythmAnalyzer, RhythmAnalyzerListener, emit_rhythms
+
+RHYTHMS = np.array([[1.0, 2.0, 0.5], [3.0, 1.0, 3.0]])
+
+
+class SingleRhythms(RhythmAnalyzerListener):
+    """Слушатель без пакетных и необязательных методов."""
+
+    def __init__(self):
+        self.rows = []
+
+    def on_rhythm(self, alpha_power, beta_power, alpha_beta_ratio):
+        self.rows.append((alpha_power, beta_power, alpha_beta_ratio))
+
+
+class AllRhythms(SingleRhythms):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def on_band_powers(self, band_powers):
+        self.calls.append("on_band_powers")
+
+    def on_band_matrix(self, band_powers, band_names, channels):
+        self.calls.append("on_band_matrix")
+
+    def on_band_estimates(self, timestamps, band_powers, band_names):
+        self.calls.append("on_band_estimates")
+
+    def on_spectrum(self, freqs, spectrum):
+        self.calls.append("on_spectrum")
+
+
+class NullPublisher(ResultPublisher):
+    def publish_events(self, kind, timestamps):
+        pass
+
+    def publish_rhythms(self, rhythms):
+        pass
+
+
+class Blinks(BlinkBatchListener):
+    def __init__(self):
+        self.batches = []
+
+    def on_blinks(self, timestamps):
+        self.batches.append(list(timestamps))
+
+
+def chain(listener, directory):
+    listener = PublishingRhythmListener(NullPublisher(), listener)
+    listener = RecordingRhythmListener(SessionRecorder(directory), listener)
+    return TimedRhythmListener(PipelineMetrics(), listener)
+
+
+def analyze(listener):
+    rng = np.random.default_rng(0)
+    RhythmAnalyzer(fs=125, hop=0.5).analyze(rng.standard_normal((500, 8)), listener, np.arange(500) / 125)
+
+
+def test_wrappers_forward_optional_methods(tmp_path):
+    listener = AllRhythms()
+    analyze(chain(listener, str(tmp_path)))
+    assert len(listener.rows) == 6
+    expected = ["on_band_powers", "on_band_matrix", "on_spectrum"] * 6 + ["on_band_estimates"]
+    assert listener.calls == expected
+
+
+def test_wrappers_skip_missing_methods_and_listener(tmp_path):
+    listener = SingleRhythms()
+    analyze(chain(listener, str(tmp_path)))
+    assert len(listener.rows) == 6
+    analyze(chain(None, str(tmp_path)))
+
+
+def test_deferred_listener_replays_in_order():
+    deferred_blinks = DeferredListener()
+    emit_blinks(deferred_blinks, np.array([1.0, 2.0]))
+    deferred = DeferredListener()
+    emit_rhythms(deferred, RHYTHMS)
+    deferred.on_spectrum(np.arange(3), np.ones(3))
+    deferred.on_rhythm(5.0, 5.0, 1.0)
+
+    blinks = Blinks()
+    rhythms = AllRhythms()
+    deferred_blinks.replay(blinks)
+    deferred.replay(rhythms)
+    assert blinks.batches == [[1.0, 2.0]]
+    assert rhythms.rows == [(1.0, 2.0, 0.5), (3.0, 1.0, 3.0), (5.0, 5.0, 1.0)]
+    assert rhythms.calls == ["on_spectrum"]
+    assert deferred.calls == []
@@ -0,0 +1,136 @@
+import os
+import types
+import uuid
+
+import numpy as np
+import pytest
+
+from bench.synthetic import SyntheticEEG, SyntheticSource
+from buffer.shared_ring import SharedRingReader
+from processor.eeg_processor import EEGProcessor
+from processor.outputs import SocketPublisher, SocketReceiver, decode_results, encode_results
+from processor.publisher import STREAM_RHYTHMS, PublisherGroup, SharedStreamPublisher, segment_name
+from recorder.event_store import SessionEventStore
+from recorder.session_recorder import EVENT_BLINK, EVENT_CLENCH, EVENT_RHYTHM, EVENTS_FILE, SessionRecorder, \
+    load_events
+
+BANDS = ("alpha", "beta")
+
+
+def chunk(*timestamps):
+    return types.SimpleNamespace(timestamps=np.array(timestamps, dtype=float))
+
+
+def test_encode_decode_round_trip():
+    rhythms = np.array([[1.0, 2.0, 0.5], [4.0, 2.0, 2.0]])
+    message = decode_results(encode_results(7, 12.5, np.array([1.0, 2.0]), np.array([3.0]), rhythms,
+                                            np.array([12.0, 12.5])))
+    assert message.sequence == 7
+    assert message.timestamp == 12.5
+    np.testing.assert_array_equal(message.blinks, [1.0, 2.0])
+    np.testing.assert_array_equal(message.clenches, [3.0])
+    np.testing.assert_array_equal(message.rhythms, rhythms)
+    np.testing.assert_array_equal(message.rhythm_timestamps, [12.0, 12.5])
+
+
+def test_decode_rejects_foreign_and_truncated_messages():
+    data = encode_results(0, 0.0, np.array([1.0]), np.empty(0), np.empty((0, 3)), np.empty(0))
+    with pytest.raises(ValueError):
+        decode_results(b"XXXX" + data[4:])
+    with pytest.raises(ValueError):
+        decode_results(data[:-8])
+
+
+@pytest.fixture
+def address(tmp_path):
+    # Путь Unix-сокета ограничен ~100 символами, поэтому короткое имя во временном каталоге
+    path = os.path.join("/tmp", f"eeg-{uuid.uuid4().hex[:8]}.sock")
+    yield path
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def test_receive_without_messages_returns_none(address):
+    receiver = SocketReceiver(address)
+    try:
+        assert receiver.receive(0) is None
+        assert receiver.receive(0.01) is None
+    finally:
+        receiver.close()
+
+
+def test_socket_publisher_batches_chunk_results(address):
+    publisher = SocketPublisher(address)
+    publisher.start()
+
+    # Получателя ещё нет: сообщение отбрасывается, номер всё равно расходуется
+    publisher.publish_chunk(chunk(1.0))
+    publisher.publish_events(EVENT_BLINK, np.array([0.9]))
+    publisher.flush()
+    assert publisher.dropped_messages == 1
+
+    receiver = SocketReceiver(address)
+    try:
+        publisher.publish_chunk(chunk(1.5, 2.0))
+        publisher.publish_events(EVENT_BLINK, np.array([1.6, 1.7]))
+        publisher.publish_events(EVENT_CLENCH, np.array([1.8]))
+        publisher.publish_rhythms(np.array([[1.0, 2.0, 0.5], [4.0, 2.0, 2.0]]))
+        publisher.publish_band_estimates(np.array([1.75, np.nan]), np.array([[1.0, 2.0], [4.0, 2.0]]), BANDS)
+        publisher.flush()
+        # Блок без результатов не отправляется
+        publisher.publish_chunk(chunk(2.5))
+        publisher.flush()
+
+        message = receiver.receive(1.0)
+        assert receiver.receive(0) is None
+    finally:
+        receiver.close()
+        publisher.stop()
+
+    assert publisher.sent_messages == 1
+    assert message.sequence == 1
+    assert message.timestamp == 2.0
+    np.testing.assert_array_equal(message.blinks, [1.6, 1.7])
+    np.testing.assert_array_equal(message.clenches, [1.8])
+    np.testing.assert_allclose(message.rhythms, [[1.0, 2.0, 0.5], [4.0, 2.0, 2.0]])
+    np.testing.assert_array_equal(message.rhythm_timestamps, [1.75, 2.0])
+
+
+def test_publishers_stamp_each_estimate(tmp_path):
+    eeg = SyntheticEEG(duration=10, seed=2)
+    prefix = f"test{os.getpid()}{uuid.uuid4().hex[:6]}"
+    store = SessionEventStore()
+    shared = SharedStreamPublisher(prefix)
+    # UDP: очередь Unix-датаграмм может быть короче числа блоков, а получатель читает после обработки
+    receiver = SocketReceiver(("127.0.0.1", 0))
+    sender = SocketPublisher(receiver.address)
+    recording = str(tmp_path / "session")
+    processor = EEGProcessor(source=SyntheticSource(eeg, chunk_size=100), rhythm_hop=0.2,
+                             publisher=PublisherGroup([store, shared, sender]),
+                             recorder=SessionRecorder(recording))
+    assert processor.initialize_stream()
+    ring = SharedRingReader(segment_name(prefix, STREAM_RHYTHMS))
+    while processor.step():
+        pass
+    shared_rows, lost = ring.read()
+    ring.close()
+    processor.close()
+
+    received = []
+    message = receiver.receive(0)
+    while message is not None:
+        received.append(message.rhythm_timestamps)
+        message = receiver.receive(0)
+    receiver.close()
+    assert sender.dropped_messages == 0
+
+    # Оценка каждые 25 сэмплов, начиная с заполнения секундного окна
+    expected = eeg.timestamps[24::25][4:]
+    np.testing.assert_array_equal(store.rhythms()["timestamp"], expected)
+    assert lost == 0
+    np.testing.assert_array_equal(shared_rows[:, 0], expected)
+    np.testing.assert_array_equal(np.concatenate(received), expected)
+    events = load_events(os.path.join(recording, EVENTS_FILE))
+    np.testing.assert_array_equal(events["timestamp"][events["kind"] == EVENT_RHYTHM], expected)
+    np.testing.assert_allclose(shared_rows[:, 1:], store.rhythms()[["alpha", "beta", "ratio"]].tolist(),
+                               rtol=1e-6)
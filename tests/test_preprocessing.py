@@ -0,0 +1,62 @@
+import blink.blink_detector
+import jaws.jaw_clench_detector
+from bench.synthetic import SyntheticEEG, SyntheticSource
+from blink.blink_detector import BlinkDetector
+from filter.preprocessing import Preprocessor
+from jaws.jaw_clench_detector import JawClenchDetector
+from processor.eeg_processor import EEGProcessor
+
+
+class Events:
+    def __init__(self):
+        self.blinks = []
+        self.clenches = []
+
+    def on_blink(self, timestamp):
+        self.blinks.append(timestamp)
+
+    def on_clench(self, timestamp):
+        self.clenches.append(timestamp)
+
+
+def count_preprocessors(monkeypatch):
+    created = []
+
+    class CountingPreprocessor(Preprocessor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(blink.blink_detector, "Preprocessor", CountingPreprocessor)
+    monkeypatch.setattr(jaws.jaw_clench_detector, "Preprocessor", CountingPreprocessor)
+    return created
+
+
+def test_processor_detectors_use_shared_preprocessor(monkeypatch):
+    created = count_preprocessors(monkeypatch)
+    events = Events()
+    processor = EEGProcessor(source=SyntheticSource(SyntheticEEG(duration=10, seed=6), chunk_size=25),
+                             blink_listener=events, clench_listener=events)
+    assert processor.initialize_stream()
+    while processor.step():
+        pass
+    processor.reset()
+    processor.close()
+    assert created == []
+    assert events.blinks
+
+
+def test_standalone_detect_creates_preprocessor_once(monkeypatch):
+    created = count_preprocessors(monkeypatch)
+    eeg = SyntheticEEG(duration=10, seed=6)
+    blink_detector = BlinkDetector(fs=eeg.fs)
+    jaw_detector = JawClenchDetector(fs=eeg.fs)
+    blink_detector.reset()
+    assert created == []
+
+    events = Events()
+    for samples, timestamps in eeg.chunks(25):
+        blink_detector.detect(samples, timestamps, events)
+        jaw_detector.detect(samples, timestamps, events)
+    assert len(created) == 2
+    assert events.blinks
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from filter.refractory import apply_refractory, threshold_window_mask
+
+
+def refractory_loop(times, last_time, interval):
+    events = []
+    for t in times:
+        if t - last_time > interval:
+            events.append(t)
+            last_time = t
+    return events, last_time
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_refractory_matches_sample_loop(seed):
+    rng = np.random.default_rng(seed)
+    times = np.sort(rng.uniform(0, 10, 200))
+    last_time = 0.0
+    expected_last = 0.0
+    expected_events = []
+    # Кандидаты приходят блоками, состояние переносится между ними
+    for chunk in np.array_split(times, 7):
+        events, last_time = apply_refractory(chunk, last_time, 0.3)
+        loop_events, expected_last = refractory_loop(chunk, expected_last, 0.3)
+        np.testing.assert_array_equal(events, loop_events)
+        expected_events.extend(loop_events)
+        assert last_time == expected_last
+    assert len(expected_events) > 1
+
+
+def test_refractory_interval_is_strict():
+    events, last_time = apply_refractory(np.array([0.25, 0.5, 0.75, 1.0]), 0.0, 0.25)
+    np.testing.assert_array_equal(events, [0.5, 1.0])
+    assert last_time == 1.0
+
+    events, last_time = apply_refractory(np.array([]), 1.5, 0.3)
+    assert len(events) == 0 and last_time == 1.5
+
+
+def test_threshold_window_mask_matches_loop():
+    rng = np.random.default_rng(1)
+    values = rng.uniform(0, 200, (100, 2))
+    values[:5] = [[50, 150], [150, 50], [51, 10], [10, 149], [10, 10]]
+    expected = [any(50 < v < 150 for v in row) for row in values.tolist()]
+    np.testing.assert_array_equal(threshold_window_mask(values, 50, 150), expected)
+    np.testing.assert_array_equal(threshold_window_mask(values[:, 0], 50, 150),
+                                  [50 < v < 150 for v in values[:, 0].tolist()])
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from bench.synthetic import SyntheticEEG, SyntheticSource
+from processor.eeg_processor import EEGProcessor
+from processor.sources import FileSource
+from recorder.session_recorder import (EVENT_BLINK, EVENT_CLENCH, EVENT_RHYTHM, EVENTS_FILE, SAMPLES_FILE,
+                                       SessionRecorder, load_events)
+
+
+def run(source, directory: str):
+    processor = EEGProcessor(source=source, recorder=SessionRecorder(directory))
+    assert processor.initialize_stream()
+    while processor.step():
+        pass
+    processor.close()
+
+
+def test_recording_replays_through_file_source(tmp_path):
+    eeg = SyntheticEEG(duration=30, seed=3)
+    live = str(tmp_path / "live")
+    # Без слушателей: записываются только события
+    run(SyntheticSource(eeg, chunk_size=25), live)
+
+    source = FileSource(os.path.join(live, SAMPLES_FILE), channels=eeg.channels, chunk_size=64)
+    assert source.open()
+    assert source.nominal_srate == eeg.fs
+    chunks = []
+    while not source.exhausted:
+        chunks.append(source.pull_chunk())
+    source.close()
+    np.testing.assert_array_equal(np.concatenate([samples for samples, _ in chunks]), eeg.samples)
+    np.testing.assert_array_equal(np.concatenate([timestamps for _, timestamps in chunks]), eeg.timestamps)
+
+    events = load_events(os.path.join(live, EVENTS_FILE))
+    assert np.count_nonzero(events["kind"] == EVENT_BLINK) > 0
+    assert np.count_nonzero(events["kind"] == EVENT_RHYTHM) > 0
+
+    replay = str(tmp_path / "replay")
+    run(FileSource(os.path.join(live, SAMPLES_FILE), channels=eeg.channels, chunk_size=25), replay)
+    replayed = load_events(os.path.join(replay, EVENTS_FILE))
+    for kind in (EVENT_BLINK, EVENT_CLENCH):
+        np.testing.assert_array_equal(replayed["timestamp"][replayed["kind"] == kind],
+                                      events["timestamp"][events["kind"] == kind])
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    recorder = SessionRecorder(str(tmp_path), queue_size=2)
+    for i in range(3):
+        recorder.record_chunk(np.zeros((4, 2)), np.arange(4) + 4 * i)
+    assert recorder.dropped == 1
+
+    recorder.start()
+    recorder.stop()
+    rows = np.fromfile(tmp_path / SAMPLES_FILE).reshape(-1, 3)
+    np.testing.assert_array_equal(rows[:, 0], np.arange(8))
+
+
+def test_events_keep_their_timestamps(tmp_path):
+    recorder = SessionRecorder(str(tmp_path))
+    recorder.start()
+    recorder.record_chunk(np.zeros((2, 1)), [1.0, 2.0])
+    recorder.record_events(EVENT_CLENCH, np.array([1.5, 1.75]))
+    recorder.record_event(EVENT_RHYTHM, values=(1.0, 2.0, 0.5))
+    recorder.stop()
+    events = load_events(str(tmp_path / EVENTS_FILE))
+    np.testing.assert_array_equal(events["kind"], [EVENT_CLENCH, EVENT_CLENCH, EVENT_RHYTHM])
+    np.testing.assert_array_equal(events["timestamp"], [1.5, 1.75, 2.0])
+    np.testing.assert_array_equal(events["values"][2], [1.0, 2.0, 0.5])
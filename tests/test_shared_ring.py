@@ -0,0 +1,127 @@
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from bench.synthetic import SyntheticEEG, SyntheticSource
+from blink.blink_detector import BlinkDetector
+from buffer.shared_ring import SharedRingBuffer, SharedRingReader
+from processor.eeg_processor import EEGProcessor
+from processor.publisher import STREAM_FILTERED, SharedStreamPublisher, segment_name
+
+CAPACITY = 10
+
+
+@pytest.fixture
+def ring():
+    writer = SharedRingBuffer(f"test-ring-{os.getpid()}-{uuid.uuid4().hex[:8]}", ["t", "value"], CAPACITY)
+    reader = SharedRingReader(writer.name)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def rows(start: int, n: int) -> np.ndarray:
+    index = np.arange(start, start + n, dtype=float)
+    return np.column_stack((index, -index))
+
+
+def test_columns_and_capacity(ring):
+    writer, reader = ring
+    assert reader.columns == ["t", "value"]
+    assert reader.capacity == CAPACITY
+    assert not reader.closed
+
+
+def test_wraparound_keeps_rows_contiguous(ring):
+    writer, reader = ring
+    received = []
+    written = 0
+    for n in (7, 3, 9, 1, 10, 6, 8):
+        writer.write(rows(written, n))
+        written += n
+        view, start = reader.view()
+        assert start == written - n
+        # Зеркальная запись: даже перешедший через конец блок — непрерывное представление
+        assert view.flags.c_contiguous
+        assert reader.is_valid(start)
+        received.append(view.copy())
+    np.testing.assert_array_equal(np.concatenate(received), rows(0, written))
+    assert reader.sequence == written
+
+
+def test_write_longer_than_capacity_keeps_latest(ring):
+    writer, reader = ring
+    writer.write(rows(0, 3 * CAPACITY + 4))
+    data, lost = reader.read()
+    np.testing.assert_array_equal(data, rows(2 * CAPACITY + 4, CAPACITY))
+    assert lost == 2 * CAPACITY + 4
+
+
+def test_view_overwritten_by_writer_is_detected(ring):
+    writer, reader = ring
+    writer.write(rows(0, 6))
+    view, start = reader.view()
+    writer.write(rows(6, CAPACITY - 6))
+    # Ещё не перезаписано: в буфере помещаются все строки с номера start
+    assert reader.is_valid(start)
+    np.testing.assert_array_equal(view, rows(0, 6))
+
+    writer.write(rows(CAPACITY, 1))
+    assert not reader.is_valid(start)
+
+
+def test_read_reports_lost_rows(ring):
+    writer, reader = ring
+    writer.write(rows(0, 4))
+    data, lost = reader.read()
+    assert lost == 0
+    np.testing.assert_array_equal(data, rows(0, 4))
+
+    writer.write(rows(4, CAPACITY + 5))
+    data, lost = reader.read()
+    assert lost == 5
+    np.testing.assert_array_equal(data, rows(9, CAPACITY))
+
+    data, lost = reader.read()
+    assert len(data) == 0 and lost == 0
+
+
+def test_seek_latest_skips_written_rows(ring):
+    writer, reader = ring
+    writer.write(rows(0, 5))
+    reader.seek_latest()
+    writer.write(rows(5, 2))
+    data, lost = reader.read()
+    np.testing.assert_array_equal(data, rows(5, 2))
+    assert lost == 0
+
+
+def test_close_is_visible_to_reader(ring):
+    writer, reader = ring
+    writer.write(rows(0, 3))
+    writer.close()
+    assert reader.closed
+    data, _ = reader.read()
+    np.testing.assert_array_equal(data, rows(0, 3))
+
+
+def test_default_published_streams_are_the_blink_streams():
+    eeg = SyntheticEEG(fs=500, duration=4, seed=1)
+    publisher = SharedStreamPublisher(f"test{os.getpid()}{uuid.uuid4().hex[:6]}")
+    processor = EEGProcessor(source=SyntheticSource(eeg, chunk_size=100), publisher=publisher)
+    assert processor.initialize_stream()
+    assert publisher.streams == BlinkDetector(fs=500).streams
+    reader = SharedRingReader(segment_name(publisher.prefix, STREAM_FILTERED))
+    while processor.step():
+        pass
+    filtered, lost = reader.read()
+    reader.close()
+    processor.close()
+
+    assert reader.columns == ["timestamp", "ch3", "ch4"]
+    assert lost == 0
+    # Каналы прорежены детектором морганий до 125 Гц
+    np.testing.assert_allclose(np.diff(filtered[:, 0]), 4 / 500)
+    assert len(filtered) == len(eeg.timestamps) // 4
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from scipy.signal import sosfilt, sosfilt_zi
+
+from bench.synthetic import SyntheticEEG, SyntheticSource
+from blink.blink_detector import BlinkDetector
+from filter.signal_filter import StreamingFilter, design_filter
+from jaws.jaw_clench_detector import JawClenchDetector
+from processor.eeg_processor import EEGProcessor
+
+
+@pytest.mark.parametrize("sizes", [(1, 499), (7, 13, 480), (250, 250)])
+def test_streaming_filter_is_chunk_independent(sizes):
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((500, 2))
+    sos = design_filter('low', 10, 125, 4)
+    expected = sosfilt(sos, x, axis=0, zi=sosfilt_zi(sos)[:, :, None] * x[0])[0]
+
+    streaming = StreamingFilter(cutoff=10, fs=125)
+    bounds = np.cumsum((0,) + sizes)
+    y = np.concatenate([streaming.process(x[a:b]) for a, b in zip(bounds[:-1], bounds[1:])])
+    np.testing.assert_allclose(y, expected, rtol=1e-12, atol=1e-12)
+
+    streaming.reset()
+    np.testing.assert_allclose(streaming.process(x), expected, rtol=1e-12, atol=1e-12)
+
+
+class Events:
+    def __init__(self):
+        self.blinks = []
+        self.clenches = []
+
+    def on_blink(self, timestamp):
+        self.blinks.append(timestamp)
+
+    def on_clench(self, timestamp):
+        self.clenches.append(timestamp)
+
+    def on_rhythm(self, alpha_power, beta_power, alpha_beta_ratio):
+        pass
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_processor_passes_filter_mode_to_detectors(streaming):
+    eeg = SyntheticEEG(duration=30, seed=4)
+    events = Events()
+    processor = EEGProcessor(source=SyntheticSource(eeg, chunk_size=25), blink_listener=events,
+                             clench_listener=events, rhythm_listener=events,
+                             streaming=streaming)
+    assert processor.initialize_stream()
+    while processor.step():
+        pass
+    processor.close()
+
+    expected = Events()
+    blink = BlinkDetector(fs=eeg.fs, streaming=streaming)
+    jaw = JawClenchDetector(fs=eeg.fs, streaming=streaming)
+    assert {spec.mode for spec in blink.streams} == {'causal' if streaming else 'window'}
+    for samples, timestamps in eeg.chunks(25):
+        blink.detect(samples, timestamps, expected)
+        jaw.detect(samples, timestamps, expected)
+    assert events.blinks == expected.blinks
+    assert events.clenches == expected.clenches
+    assert events.blinks
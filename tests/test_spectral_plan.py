@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from scipy.fft import rfft
+from scipy.signal import windows
+
+from rhytm.rhytm_analyzer import RhythmAnalyzer
+from rhytm.spectral_plan import DEFAULT_BANDS, SlidingDFT, SpectralPlan
+
+FS = 125
+N = 250
+
+
+def test_plan_band_powers_match_explicit_sums():
+    rng = np.random.default_rng(3)
+    y = rng.standard_normal((N, 2))
+    plan = SpectralPlan(N, FS, DEFAULT_BANDS)
+    spectrum = plan.spectrum(y)
+    powers = plan.band_powers(spectrum)
+    for i, name in enumerate(plan.band_names):
+        low, high = DEFAULT_BANDS[name]
+        mask = (plan.freqs >= low) & (plan.freqs <= high)
+        np.testing.assert_allclose(powers[i], spectrum[mask].sum(axis=0))
+    np.testing.assert_allclose(plan.band_powers(plan.spectrum(y[:, 0])), powers[:, 0])
+
+
+def test_plan_spectrum_matches_windowed_rfft():
+    rng = np.random.default_rng(4)
+    y = rng.standard_normal(N)
+    plan = SpectralPlan(N, FS, {"alpha": (8, 13)}, fft_len=512)
+    expected = np.abs(np.fft.rfft(y * np.hamming(N), n=512))
+    np.testing.assert_allclose(plan.spectrum(y), expected, rtol=1e-10, atol=1e-12)
+    assert len(plan.freqs) == len(expected)
+
+
+def direct_band_powers(y: np.ndarray) -> np.ndarray:
+    """Мощности полос по прямому ДПФ окна с периодическим окном Хэмминга."""
+    plan = SpectralPlan(N, FS, DEFAULT_BANDS, fft_len=N)
+    window = windows.hamming(N, sym=False).reshape((-1,) + (1,) * (y.ndim - 1))
+    return plan.band_powers(np.abs(rfft(y * window, axis=0)))
+
+
+@pytest.mark.parametrize("channels", [(), (3,)])
+def test_sliding_dft_matches_direct_dft(channels):
+    rng = np.random.default_rng(1)
+    x = rng.standard_normal((4 * N,) + channels)
+    dft = SlidingDFT(N, FS, DEFAULT_BANDS)
+    dft.sync(x[:N])
+    np.testing.assert_allclose(dft.band_powers(), direct_band_powers(x[:N]), rtol=1e-9)
+
+    end = N
+    for step in (1, 7, 40, 3, 125, 64, 1, 200):
+        new = x[end:end + step]
+        dft.update(new - x[end - N:end - N + step])
+        end += step
+        np.testing.assert_allclose(dft.band_powers(), direct_band_powers(x[end - N:end]), rtol=1e-8)
+
+
+def test_sliding_dft_step_longer_than_window():
+    rng = np.random.default_rng(2)
+    x = rng.standard_normal(3 * N)
+    dft = SlidingDFT(N, FS, DEFAULT_BANDS)
+    dft.sync(x[:N])
+    step = N + 30
+    dft.update(x[N:N + step] - x[:step])
+    np.testing.assert_allclose(dft.band_powers(), direct_band_powers(x[step:step + N]), rtol=1e-8)
+
+
+def test_sliding_dft_reset_requires_sync():
+    dft = SlidingDFT(N, FS, DEFAULT_BANDS)
+    assert not dft.ready
+    dft.sync(np.zeros(N))
+    assert dft.ready and not dft.stale
+    dft.update(np.zeros(N))
+    assert dft.stale
+    dft.reset()
+    assert not dft.ready
+
+
+class _Rhythms:
+    def __init__(self):
+        self.rows = []
+
+    def on_rhythm(self, alpha_power, beta_power, alpha_beta_ratio):
+        self.rows.append((alpha_power, beta_power, alpha_beta_ratio))
+
+
+@pytest.mark.parametrize("mode", ["fft", "welch", "sdft"])
+def test_hop_estimates_do_not_depend_on_chunking(mode):
+    rng = np.random.default_rng(5)
+    x = rng.standard_normal((10 * FS, 8))
+    whole = _Rhythms()
+    RhythmAnalyzer(fs=FS, hop=0.2, mode=mode).analyze(x, whole)
+    chunked = _Rhythms()
+    analyzer = RhythmAnalyzer(fs=FS, hop=0.2, mode=mode)
+    start = 0
+    for size in rng.integers(1, 40, size=1000):
+        analyzer.analyze(x[start:start + size], chunked)
+        start += size
+        if start >= len(x):
+            break
+    assert len(whole.rows) == (10 * FS - (N if mode == "sdft" else FS)) // 25 + 1
+    np.testing.assert_allclose(chunked.rows, whole.rows, rtol=1e-7)
@@ -0,0 +1,20 @@
+import numpy as np
+
+from rhytm.spectrogram import Spectrogram
+
+
+def test_block_append_matches_column_appends():
+    rng = np.random.default_rng(7)
+    freqs = np.linspace(0, 62.5, 129)
+    columns = [Spectrogram(history=8).reduce(freqs, spectrum) for spectrum in rng.random((5, 129))]
+
+    single = Spectrogram(history=8)
+    for column in columns:
+        single.append(column)
+    block = Spectrogram(history=8)
+    version = block.version
+    block.append(np.array(columns))
+
+    np.testing.assert_array_equal(block.image, single.image)
+    np.testing.assert_array_equal(block.image[-5:], np.array(columns))
+    assert block.version == version + 1
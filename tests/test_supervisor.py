@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+import numpy as np
+from pylsl import StreamInfo, StreamOutlet
+
+from processor.supervisor import STATE_FAILED, STATE_FINISHED, STATE_RUNNING, MultiStreamListener, \
+    PipelineSupervisor
+
+FS = 125
+# Собственный тип потоков, чтобы супервизор не подхватил чужие потоки в сети
+STREAM_TYPE = f"EEGTest{os.getpid()}"
+
+
+class StateListener(MultiStreamListener):
+    def __init__(self):
+        self.states = []
+
+    def on_blink(self, stream_id, timestamp):
+        pass
+
+    def on_clench(self, stream_id, timestamp):
+        pass
+
+    def on_rhythm(self, stream_id, alpha_power, beta_power, alpha_beta_ratio):
+        pass
+
+    def on_pipeline_state(self, stream_id, state):
+        self.states.append(state)
+
+
+def outlet(source_id: str) -> StreamOutlet:
+    return StreamOutlet(StreamInfo(f"EEG-{source_id}", STREAM_TYPE, 8, FS, "float32", source_id))
+
+
+def poll_until(supervisor: PipelineSupervisor, condition, timeout: float):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        supervisor.poll()
+
+
+def test_missing_stream_fails_without_restart():
+    stream = outlet(f"gone-{os.getpid()}")
+    listener = StateListener()
+    supervisor = PipelineSupervisor(listener, stream_type=STREAM_TYPE, wait_time=1.0, pin_cores=False)
+    assert supervisor.start()
+    del stream
+    try:
+        poll_until(supervisor, lambda: STATE_FAILED in listener.states, timeout=30)
+    finally:
+        supervisor.stop()
+    assert listener.states == [STATE_RUNNING, STATE_FAILED]
+
+
+def test_stop_finishes_running_pipeline():
+    stream = outlet(f"live-{os.getpid()}")
+    done = threading.Event()
+
+    def feed():
+        rng = np.random.default_rng(0)
+        while not done.is_set():
+            stream.push_chunk(rng.standard_normal((FS // 10, 8)).tolist())
+            time.sleep(0.1)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    listener = StateListener()
+    supervisor = PipelineSupervisor(listener, stream_type=STREAM_TYPE, wait_time=1.0, pin_cores=False)
+    try:
+        assert supervisor.start()
+        poll_until(supervisor, lambda: False, timeout=5)
+    finally:
+        supervisor.stop()
+        done.set()
+        feeder.join()
+    assert listener.states == [STATE_RUNNING, STATE_FINISHED]
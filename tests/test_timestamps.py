@@ -0,0 +1,67 @@
+import numpy as np
+
+from processor.timestamps import TimestampMonitor
+
+FS = 250.0
+CHUNK = 10
+
+
+def chunks(timestamps: np.ndarray):
+    for start in range(0, len(timestamps), CHUNK):
+        yield timestamps[start:start + CHUNK]
+
+
+def test_delivery_jitter_is_not_a_break():
+    rng = np.random.default_rng(0)
+    n = 50 * CHUNK
+    timestamps = np.arange(n) / FS
+    # Блок целиком сдвинут на случайную задержку доставки — соседние блоки даже перекрываются
+    timestamps += np.repeat(rng.uniform(0, 0.05, n // CHUNK), CHUNK)
+    monitor = TimestampMonitor(FS)
+    for part in chunks(timestamps):
+        assert len(monitor.check(part)) == 0
+    assert monitor.breaks == 0
+    assert monitor.samples == n
+    assert 0 < monitor.jitter <= monitor.max_jitter < monitor.max_gap
+
+
+def test_gap_is_counted_with_lost_samples():
+    timestamps = np.arange(100) / FS
+    timestamps[60:] += 1.0
+    monitor = TimestampMonitor(FS)
+    breaks = [monitor.check(part) for part in chunks(timestamps)]
+    assert [list(b) for b in breaks if len(b)] == [[0]]
+    assert monitor.gaps == 1
+    assert monitor.backward_jumps == 0
+    assert monitor.lost_samples == 250
+
+
+def test_break_inside_chunk_reports_sample_index():
+    timestamps = np.arange(CHUNK) / FS
+    timestamps[4:] += 2.0
+    monitor = TimestampMonitor(FS)
+    np.testing.assert_array_equal(monitor.check(timestamps), [4])
+    assert monitor.gaps == 1
+    # Часы привязаны к метке после разрыва: следующий блок непрерывен
+    assert len(monitor.check(timestamps[-1] + np.arange(1, CHUNK + 1) / FS)) == 0
+
+
+def test_backward_jump():
+    timestamps = np.arange(100) / FS
+    timestamps[50:] -= 1.0
+    monitor = TimestampMonitor(FS)
+    for part in chunks(timestamps):
+        monitor.check(part)
+    assert monitor.backward_jumps == 1
+    assert monitor.gaps == 0
+    assert monitor.lost_samples == 0
+    assert monitor.breaks == 1
+
+
+def test_restart_skips_comparison_with_previous_chunk():
+    monitor = TimestampMonitor(FS)
+    monitor.check(np.arange(CHUNK) / FS)
+    monitor.restart()
+    assert len(monitor.check(100 + np.arange(CHUNK) / FS)) == 0
+    assert monitor.breaks == 0
+    assert monitor.samples == 2 * CHUNK